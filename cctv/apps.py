@@ -1,6 +1,55 @@
 from django.apps import AppConfig
+import logging
 import os
 import threading
+import time
+
+logger = logging.getLogger('cctv.bootstrap')
+
+# Set once the startup thread has finished (successfully or not)
+workers_bootstrapped = threading.Event()
+_bootstrap_lock = threading.Lock()
+_bootstrap_thread = None
+
+
+def start_background_workers():
+    """Start all camera detection workers on a daemon thread.
+    
+    Called from CctvConfig.ready() for runserver, and from the Gunicorn
+    post_fork hook (gunicorn_config.py) when running under Gunicorn.
+    Safe to call more than once - only the first call starts the thread.
+    """
+    global _bootstrap_thread
+    
+    # Start workers in a separate thread so server startup isn't blocked
+    def start_workers():
+        from django.apps import apps
+        from django.db import connections
+        try:
+            # ready() runs while the registry is still finishing - wait for that
+            # (milliseconds) instead of a fixed multi-second sleep
+            while not apps.ready:
+                time.sleep(0.05)
+            from .views import start_all_background_workers_internal
+            logger.info("Auto-starting detection workers")
+            started = start_all_background_workers_internal()
+            if started:
+                logger.info("Started %d detection workers: %s", len(started), started)
+            else:
+                logger.warning("No cameras found or all workers failed to start")
+        except Exception:
+            logger.exception("Could not auto-start workers")
+        finally:
+            # This thread's DB connection would otherwise stay open until exit
+            connections.close_all()
+            workers_bootstrapped.set()
+    
+    with _bootstrap_lock:
+        if _bootstrap_thread is not None:
+            return _bootstrap_thread
+        _bootstrap_thread = threading.Thread(target=start_workers, name='cctv-bootstrap', daemon=True)
+        _bootstrap_thread.start()
+        return _bootstrap_thread
 
 
 class CctvConfig(AppConfig):
@@ -11,42 +60,18 @@ class CctvConfig(AppConfig):
         """Called when Django starts - auto-start background workers"""
         import sys
         
-        # Only run for actual server processes
-        running_server = False
-        if 'runserver' in sys.argv:
-            running_server = True
-        elif any('gunicorn' in arg for arg in sys.argv):
-            running_server = True
-        
-        if not running_server:
+        # Gunicorn with our config preloads the app in the master and starts
+        # workers from its post_fork hook instead (never before fork)
+        if os.environ.get('CCTV_WORKER_BOOTSTRAP') == 'post_fork':
             return
         
-        # For Gunicorn with preload_app: only start once (main process)
-        # For regular runserver: use environment variable check
-        if os.environ.get('CCTV_WORKERS_STARTED') == 'true':
+        # Only run for actual server processes
+        if 'runserver' in sys.argv:
+            # With the autoreloader the parent process only watches files; the
+            # server runs in the child, which Django marks with RUN_MAIN=true
+            if os.environ.get('RUN_MAIN') != 'true' and '--noreload' not in sys.argv:
+                return
+        elif not any('gunicorn' in arg for arg in sys.argv):
             return
-        os.environ['CCTV_WORKERS_STARTED'] = 'true'
-        
-        # Start workers in a separate thread after delay
-        def start_workers_delayed():
-            import time
-            time.sleep(8)  # Wait for Django + models to be fully loaded
-            try:
-                from .views import start_all_background_workers_internal
-                print("\n" + "=" * 60)
-                print(f"  🚀 AUTO-STARTING DETECTION WORKERS")
-                print("=" * 60)
-                started = start_all_background_workers_internal()
-                print("=" * 60)
-                if started:
-                    print(f"  ✅ STARTED {len(started)} DETECTION WORKERS: {started}")
-                else:
-                    print("  ⚠️  No cameras found or all failed to start")
-                print("=" * 60 + "\n")
-            except Exception as e:
-                print(f"[WARNING] Could not auto-start workers: {e}")
-                import traceback
-                traceback.print_exc()
         
-        thread = threading.Thread(target=start_workers_delayed, daemon=True)
-        thread.start()
+        start_background_workers()
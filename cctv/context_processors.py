@@ -4,6 +4,13 @@ Context processors for Hotel CCTV Monitoring System
 from django.conf import settings
 from .translations import get_translation
 
+# Built once at import - the same objects are handed to every template
+AVAILABLE_LANGS = (
+    {'code': 'ko', 'name': '한국어'},
+    {'code': 'en', 'name': 'English'},
+)
+SUPPORTED_LANGS = frozenset(lang['code'] for lang in AVAILABLE_LANGS)
+
 
 def language_context(request):
     """Add language and translations to template context"""
@@ -11,7 +18,7 @@ def language_context(request):
     lang = request.session.get('lang', request.COOKIES.get('lang', 'ko'))
     
     # Validate language
-    if lang not in ['ko', 'en']:
+    if lang not in SUPPORTED_LANGS:
         lang = 'ko'
     
     # Get translations
@@ -21,16 +28,17 @@ def language_context(request):
         'current_lang': lang,
         'translations': translations,
         't': translations,  # Shorthand alias
-        'available_langs': [
-            {'code': 'ko', 'name': '한국어'},
-            {'code': 'en', 'name': 'English'},
-        ],
+        'available_langs': AVAILABLE_LANGS,
     }
 
 
+# Fixed for the lifetime of the process (RequestContext copies it, never mutates it)
+APP_CONTEXT = {
+    'app_version': '1.0.0',
+    'debug_mode': settings.DEBUG,
+}
+
+
 def app_context(request):
     """Add app-wide context variables"""
-    return {
-        'app_version': '1.0.0',
-        'debug_mode': settings.DEBUG,
-    }
+    return APP_CONTEXT
@@ -0,0 +1,65 @@
+"""
+Django management command to export the cash pose model to a TensorRT engine.
+The engine is written next to the .pt file and picked up automatically by
+the detectors when running on CUDA (use --model to export the violence pose
+or fire model as well).
+"""
+
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Export the cash pose model to a TensorRT FP16 engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model',
+            default=settings.DETECTION_CONFIG.get('CASH_POSE_MODEL', 'yolov8s-pose.pt'),
+            help='Model filename inside MODELS_DIR (defaults to the cash pose model)',
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=settings.DETECTION_CONFIG.get('INFERENCE_BATCH_SIZE', 16),
+            help='Maximum batch size the engine accepts',
+        )
+        parser.add_argument(
+            '--imgsz',
+            type=int,
+            default=640,
+            help='Inference image size',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import torch
+            from ultralytics import YOLO
+        except ImportError as e:
+            raise CommandError(f'Ultralytics/torch not available: {e}')
+
+        if not torch.cuda.is_available():
+            raise CommandError('TensorRT export requires a CUDA GPU')
+
+        models_dir = Path(settings.DETECTION_CONFIG['MODELS_DIR'])
+        model_path = models_dir / options['model']
+        if not model_path.exists():
+            raise CommandError(f'Model not found: {model_path}')
+
+        self.stdout.write(f"Exporting {model_path} (batch<={options['batch']}, imgsz={options['imgsz']})...")
+
+        # dynamic=True keeps single-frame live inference working alongside
+        # batched offline inference up to --batch frames
+        model = YOLO(str(model_path))
+        engine_path = model.export(
+            format='engine',
+            half=True,
+            dynamic=True,
+            batch=options['batch'],
+            imgsz=options['imgsz'],
+            device=0,
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'TensorRT engine written to {engine_path}'))
@@ -0,0 +1,28 @@
+# Generated migration for event/camera lookup indexes
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cctv', '0004_polygon_zones_gemini_settings'),
+    ]
+
+    operations = [
+        # Per-branch "today's events" range queries on the dashboard
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['branch', 'created_at'], name='events_branch_created_idx'),
+        ),
+        # Event list filtered by type, newest first
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['event_type', 'created_at'], name='events_type_created_idx'),
+        ),
+        # Online camera counts per branch
+        migrations.AddIndex(
+            model_name='camera',
+            index=models.Index(fields=['branch', 'status'], name='cameras_branch_status_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated migration for narrowing event bounding box columns to int16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cctv', '0005_event_camera_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='bbox_x1',
+            field=models.SmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='bbox_y1',
+            field=models.SmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='bbox_x2',
+            field=models.SmallIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='bbox_y2',
+            field=models.SmallIntegerField(default=0),
+        ),
+    ]
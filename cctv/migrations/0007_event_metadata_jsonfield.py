@@ -0,0 +1,68 @@
+# Generated migration for storing event metadata as JSON
+
+import json
+
+from django.db import migrations, models
+
+
+def text_to_json(apps, schema_editor):
+    """Old rows hold either a JSON string or the relative path of the exported JSON file"""
+    Event = apps.get_model('cctv', 'Event')
+    for event in Event.objects.exclude(metadata__isnull=True).exclude(metadata='').iterator():
+        try:
+            value = json.loads(event.metadata)
+        except ValueError:
+            value = None
+        if not isinstance(value, dict):
+            value = {'json_path': event.metadata}
+        Event.objects.filter(pk=event.pk).update(metadata_json=value)
+
+
+def json_to_text(apps, schema_editor):
+    Event = apps.get_model('cctv', 'Event')
+    for event in Event.objects.exclude(metadata_json__isnull=True).iterator():
+        value = event.metadata_json
+        text = value.get('json_path') if isinstance(value, dict) and 'json_path' in value else json.dumps(value)
+        Event.objects.filter(pk=event.pk).update(metadata=text)
+
+
+def add_gin_index(apps, schema_editor):
+    # jsonb GIN index only exists on PostgreSQL
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('CREATE INDEX IF NOT EXISTS event_meta_gin ON events USING gin (metadata)')
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS event_meta_gin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cctv', '0006_event_bbox_smallint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='metadata_json',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.RunPython(text_to_json, json_to_text),
+        migrations.RemoveField(
+            model_name='event',
+            name='metadata',
+        ),
+        migrations.RenameField(
+            model_name='event',
+            old_name='metadata_json',
+            new_name='metadata',
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='metadata',
+            field=models.JSONField(blank=True, null=True, help_text='JSON with detection parameters'),
+        ),
+        migrations.RunPython(add_gin_index, drop_gin_index),
+    ]
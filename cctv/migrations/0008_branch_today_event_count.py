@@ -0,0 +1,40 @@
+# Generated migration for the denormalized per-branch "events today" counter
+
+from datetime import datetime, time, timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_today_counts(apps, schema_editor):
+    Branch = apps.get_model('cctv', 'Branch')
+    Event = apps.get_model('cctv', 'Event')
+    today = timezone.localdate()
+    start = timezone.make_aware(datetime.combine(today, time.min))
+    counts = (
+        Event.objects.filter(created_at__gte=start, created_at__lt=start + timedelta(days=1))
+        .values('branch_id').annotate(n=models.Count('id'))
+    )
+    for row in counts:
+        Branch.objects.filter(pk=row['branch_id']).update(today_event_count=row['n'], today_event_date=today)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cctv', '0007_event_metadata_jsonfield'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='branch',
+            name='today_event_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='branch',
+            name='today_event_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_today_counts, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,15 @@
 """
 Models for Hotel CCTV Monitoring System
 """
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
+from django.utils.functional import cached_property
 
 
 class User(AbstractUser):
@@ -46,6 +52,16 @@ class Region(models.Model):
         return self.name
 
 
+class BranchQuerySet(models.QuerySet):
+    def with_counts(self):
+        """Annotate camera/online camera counts in a single query
+        (today's events come from the denormalized counter on Branch)"""
+        return self.annotate(
+            camera_count=models.Count('cameras', distinct=True),
+            online_count=models.Count('cameras', filter=models.Q(cameras__status='online'), distinct=True),
+        )
+
+
 class Branch(models.Model):
     """Hotel/Project branches"""
     STATUS_CHOICES = [
@@ -64,6 +80,13 @@ class Branch(models.Model):
     # Project managers assigned to this branch
     managers = models.ManyToManyField(User, related_name='managed_branches', blank=True)
     
+    # Denormalized "events today" counter, maintained by the Event save/delete signals.
+    # today_event_date is the local date the counter belongs to.
+    today_event_count = models.PositiveIntegerField(default=0)
+    today_event_date = models.DateField(blank=True, null=True)
+    
+    objects = BranchQuerySet.as_manager()
+    
     class Meta:
         db_table = 'branches'
         ordering = ['name']
@@ -72,15 +95,36 @@ class Branch(models.Model):
     def __str__(self):
         return f"{self.name} ({self.region.name})"
     
+    # The count helpers use the with_counts() annotations when present
     def get_camera_count(self):
-        return self.cameras.count()
+        count = getattr(self, 'camera_count', None)
+        return count if count is not None else self.cameras.count()
     
     def get_online_camera_count(self):
-        return self.cameras.filter(status='online').count()
+        count = getattr(self, 'online_count', None)
+        return count if count is not None else self.cameras.filter(status='online').count()
     
     def get_today_event_count(self):
-        today = timezone.now().date()
-        return self.events.filter(created_at__date=today).count()
+        # Counter is stale (0 events so far) once the date rolls over
+        return self.today_event_count if self.today_event_date == timezone.localdate() else 0
+
+
+@dataclass(frozen=True, slots=True)
+class DetectionSettings:
+    """Immutable snapshot of a camera's detection settings (see Camera.detection_settings)"""
+    detect_cash: bool
+    detect_violence: bool
+    detect_fire: bool
+    cash_confidence: float
+    violence_confidence: float
+    fire_confidence: float
+    hand_touch_distance: int
+    hand_tracking_duration: int
+    use_polygon_zones: bool
+    cashier_zone: Tuple[int, int, int, int]  # x, y, width, height
+    cash_drawer_zone: Tuple[int, int, int, int]
+    cashier_zone_polygon: Optional[Tuple[Tuple[int, int], ...]]
+    cash_drawer_zone_polygon: Optional[Tuple[Tuple[int, int], ...]]
 
 
 class Camera(models.Model):
@@ -152,10 +196,28 @@ class Camera(models.Model):
         db_table = 'cameras'
         ordering = ['branch', 'camera_id']
         unique_together = ['branch', 'camera_id']
+        indexes = [
+            models.Index(fields=['branch', 'status'], name='cameras_branch_status_idx'),
+        ]
     
     def __str__(self):
         return f"{self.camera_id} - {self.name}"
     
+    # cached_property values derived from the row - dropped on save/refresh
+    _CACHED_SETTINGS = ('detection_settings', 'cashier_polygon_np', 'cash_drawer_polygon_np')
+    
+    def _clear_cached_settings(self):
+        for name in self._CACHED_SETTINGS:
+            self.__dict__.pop(name, None)
+    
+    def save(self, *args, **kwargs):
+        self._clear_cached_settings()
+        super().save(*args, **kwargs)
+    
+    def refresh_from_db(self, *args, **kwargs):
+        self._clear_cached_settings()
+        super().refresh_from_db(*args, **kwargs)
+    
     def get_cashier_zone(self):
         """Get cashier zone as dict"""
         return {
@@ -232,6 +294,43 @@ class Camera(models.Model):
         self.use_polygon_zones = True
         self.save()
     
+    @staticmethod
+    def _polygon_to_array(polygon_json):
+        """Parse a JSON polygon into a contiguous (N, 2) int32 array, None if invalid"""
+        import json
+        import numpy as np
+        if not polygon_json:
+            return None
+        try:
+            points = np.ascontiguousarray(json.loads(polygon_json), dtype=np.int32)
+        except (ValueError, TypeError):
+            return None
+        if points.ndim != 2 or points.shape[0] < 3 or points.shape[1] != 2:
+            return None
+        return points
+    
+    # Parsed once per instance - per-frame drawing and zone tests use these
+    # directly (cv2.fillPoly / cv2.polylines / cv2.pointPolygonTest)
+    @cached_property
+    def cashier_polygon_np(self):
+        return self._polygon_to_array(self.cashier_zone_polygon)
+    
+    @cached_property
+    def cash_drawer_polygon_np(self):
+        return self._polygon_to_array(self.cash_drawer_zone_polygon)
+    
+    def points_in_cashier_zone(self, points):
+        """Point-in-polygon test for an (N, 2) array of points, returns a bool array"""
+        import cv2
+        import numpy as np
+        polygon = self.cashier_polygon_np
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        if polygon is None:
+            return np.zeros(len(points), dtype=bool)
+        # pointPolygonTest: >0 inside, 0 on edge, <0 outside
+        return np.array([cv2.pointPolygonTest(polygon, (float(x), float(y)), False) >= 0
+                         for x, y in points], dtype=bool)
+    
     def get_gemini_prompts(self):
         """Get custom Gemini prompts (or defaults)"""
         from detectors.gemini_validator import GeminiValidator
@@ -249,6 +348,30 @@ class Camera(models.Model):
             'fire': self.fire_confidence
         }
     
+    @cached_property
+    def detection_settings(self):
+        """Detection settings built once per instance (use in worker/detector loops)"""
+        def as_points(polygon):
+            return tuple(tuple(int(v) for v in p) for p in polygon) if polygon else None
+        
+        return DetectionSettings(
+            detect_cash=self.detect_cash,
+            detect_violence=self.detect_violence,
+            detect_fire=self.detect_fire,
+            cash_confidence=self.cash_confidence,
+            violence_confidence=self.violence_confidence,
+            fire_confidence=self.fire_confidence,
+            hand_touch_distance=self.hand_touch_distance,
+            hand_tracking_duration=self.hand_tracking_duration,
+            use_polygon_zones=self.use_polygon_zones,
+            cashier_zone=(self.cashier_zone_x, self.cashier_zone_y,
+                          self.cashier_zone_width, self.cashier_zone_height),
+            cash_drawer_zone=(self.cash_drawer_zone_x, self.cash_drawer_zone_y,
+                              self.cash_drawer_zone_width, self.cash_drawer_zone_height),
+            cashier_zone_polygon=as_points(self.get_cashier_zone_polygon_points()),
+            cash_drawer_zone_polygon=as_points(self.get_cash_drawer_zone_polygon_points()),
+        )
+    
     def get_detection_settings(self):
         """Get full detection settings for this camera"""
         return {
@@ -267,6 +390,20 @@ class Camera(models.Model):
         }
 
 
+class EventQuerySet(models.QuerySet):
+    def bbox_array(self):
+        """All bounding boxes as an (N, 4) int16 array [x1, y1, x2, y2] for bulk analytics"""
+        import numpy as np
+        rows = list(self.values_list('bbox_x1', 'bbox_y1', 'bbox_x2', 'bbox_y2'))
+        return np.array(rows, dtype=np.int16).reshape(-1, 4)
+
+
+class EventManager(models.Manager.from_queryset(EventQuerySet)):
+    def get_queryset(self):
+        # Event lists (and __str__) always touch these FKs - join them up front
+        return super().get_queryset().select_related('branch', 'camera', 'reviewed_by')
+
+
 class Event(models.Model):
     """Detection events"""
     TYPE_CHOICES = [
@@ -288,18 +425,19 @@ class Event(models.Model):
     confidence = models.FloatField(default=0.0)
     frame_number = models.IntegerField(default=0)
     
-    # Bounding box
-    bbox_x1 = models.IntegerField(default=0)
-    bbox_y1 = models.IntegerField(default=0)
-    bbox_x2 = models.IntegerField(default=0)
-    bbox_y2 = models.IntegerField(default=0)
+    # Bounding box - int16 is plenty for frame coordinates (up to 32767px)
+    bbox_x1 = models.SmallIntegerField(default=0)
+    bbox_y1 = models.SmallIntegerField(default=0)
+    bbox_x2 = models.SmallIntegerField(default=0)
+    bbox_y2 = models.SmallIntegerField(default=0)
     
     # Clip path if exported
     clip_path = models.CharField(max_length=500, blank=True, null=True)
     thumbnail_path = models.CharField(max_length=500, blank=True, null=True)
     
-    # JSON metadata with detection parameters
-    metadata = models.TextField(blank=True, null=True, help_text='JSON with detection parameters')
+    # Detection parameters (json_log = {path, offset} of the line in the daily JSONL log;
+    # older events carry json_path to a per-event JSON file)
+    metadata = models.JSONField(blank=True, null=True, help_text='JSON with detection parameters')
     
     notes = models.TextField(blank=True, null=True)
     reviewed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='reviewed_events')
@@ -307,9 +445,15 @@ class Event(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = EventManager()
+    
     class Meta:
         db_table = 'events'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['branch', 'created_at'], name='events_branch_created_idx'),
+            models.Index(fields=['event_type', 'created_at'], name='events_type_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_event_type_display()} - {self.camera.camera_id} ({self.created_at.strftime('%Y-%m-%d %H:%M')})"
@@ -380,3 +524,28 @@ class GeminiLog(models.Model):
     def __str__(self):
         status = "✓" if self.is_validated else "✗"
         return f"[{status}] {self.event_type} - {self.camera.camera_id} ({self.created_at.strftime('%Y-%m-%d %H:%M')})"
+
+
+@receiver(post_save, sender=Event)
+def increment_branch_event_count(sender, instance, created, **kwargs):
+    """Bump the branch's today counter in a single UPDATE (resets on date rollover)"""
+    if not created:
+        return
+    today = timezone.localdate()
+    Branch.objects.filter(pk=instance.branch_id).update(
+        today_event_count=models.Case(
+            models.When(today_event_date=today, then=models.F('today_event_count') + 1),
+            default=models.Value(1),
+        ),
+        today_event_date=today,
+    )
+
+
+@receiver(post_delete, sender=Event)
+def decrement_branch_event_count(sender, instance, **kwargs):
+    if not instance.created_at or timezone.localdate(instance.created_at) != timezone.localdate():
+        return
+    Branch.objects.filter(
+        pk=instance.branch_id, today_event_date=timezone.localdate(), today_event_count__gt=0
+    ).update(today_event_count=models.F('today_event_count') - 1)
+
@@ -1,3 +1,226 @@
-from django.test import TestCase
+import math
+import random
+from datetime import timedelta
 
-# Create your tests here.
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from .models import Branch, Camera, Event, Region
+
+
+class ClosePairsTests(SimpleTestCase):
+    """CashTransactionDetector._close_hand_pairs vs the old nested person/hand loops"""
+
+    HAND_TOUCH_DISTANCE = 80
+
+    def setUp(self):
+        from detectors.cash_detector import CashTransactionDetector
+        self.detector = CashTransactionDetector({'hand_touch_distance': self.HAND_TOUCH_DISTANCE})
+
+    def nested_loop_pairs(self, people_hands):
+        """The pre-vectorization loop from _detect_hand_touch/detect_hand_proximity"""
+        pairs = []
+        for i, person1 in enumerate(people_hands):
+            for j, person2 in enumerate(people_hands):
+                if i >= j:
+                    continue
+                p1_in = person1.get('in_cashier_zone', False)
+                p2_in = person2.get('in_cashier_zone', False)
+                if not ((p1_in and not p2_in) or (not p1_in and p2_in)):
+                    continue
+                for hand1_name, hand1_pos in person1.get('hands', {}).items():
+                    for hand2_name, hand2_pos in person2.get('hands', {}).items():
+                        distance = math.sqrt((hand1_pos[0] - hand2_pos[0]) ** 2 +
+                                             (hand1_pos[1] - hand2_pos[1]) ** 2)
+                        if distance < self.HAND_TOUCH_DISTANCE:
+                            pairs.append((i, j, hand1_name, hand1_pos, hand2_name, hand2_pos, distance))
+        return pairs
+
+    def random_people(self, rng, count, roles=(True, False)):
+        people = []
+        for _ in range(count):
+            hands = {}
+            for name in rng.sample(['left', 'right'], rng.randint(0, 2)):
+                hands[name] = (rng.randint(0, 300), rng.randint(0, 300), round(rng.random(), 3))
+            people.append({'hands': hands, 'in_cashier_zone': rng.choice(roles)})
+        return people
+
+    def assertSamePairs(self, people_hands):
+        expected = self.nested_loop_pairs(people_hands)
+        actual = self.detector._close_hand_pairs(people_hands)
+        # Same pairs in the same order (min() tie-breaking depends on it)
+        self.assertEqual([p[:6] for p in actual], [p[:6] for p in expected])
+        for got, want in zip(actual, expected):
+            self.assertAlmostEqual(got[6], want[6], places=9)
+
+    def test_matches_nested_loops_on_random_scenes(self):
+        rng = random.Random(1234)
+        for _ in range(500):
+            self.assertSamePairs(self.random_people(rng, rng.randint(0, 6)))
+
+    def test_no_people(self):
+        self.assertEqual(self.detector._close_hand_pairs([]), [])
+
+    def test_single_role_never_pairs(self):
+        rng = random.Random(99)
+        for role in (True, False):
+            for _ in range(50):
+                people = self.random_people(rng, rng.randint(1, 5), roles=(role,))
+                self.assertEqual(self.detector._close_hand_pairs(people), [])
+                self.assertEqual(self.nested_loop_pairs(people), [])
+
+    def test_threshold_is_exclusive(self):
+        people = [
+            {'hands': {'left': (0, 0, 0.9)}, 'in_cashier_zone': True},
+            {'hands': {'right': (self.HAND_TOUCH_DISTANCE, 0, 0.9),
+                       'left': (self.HAND_TOUCH_DISTANCE - 1, 0, 0.9)}, 'in_cashier_zone': False},
+        ]
+        self.assertSamePairs(people)
+        self.assertEqual([p[4] for p in self.detector._close_hand_pairs(people)], ['left'])
+
+
+class PeopleKernelTests(SimpleTestCase):
+    """detectors._kernels (pure-Python path) vs the per-person CashTransactionDetector methods"""
+
+    POLYGON = [[100, 100], [400, 100], [500, 300], [250, 420], [100, 300]]
+
+    def setUp(self):
+        from detectors import _kernels
+        from detectors.cash_detector import CashTransactionDetector
+        # Numba dispatchers keep the original function as .py_func
+        self.extract_people = getattr(_kernels.extract_people, 'py_func', _kernels.extract_people)
+        self.point_in_polygon = getattr(_kernels.point_in_polygon, 'py_func', _kernels.point_in_polygon)
+        self.detector = CashTransactionDetector({'cashier_zone_polygon': self.POLYGON})
+
+    def edge_points(self):
+        """Vertices, edge midpoints and points just either side of every edge"""
+        points = []
+        n = len(self.POLYGON)
+        for k in range(n):
+            (x1, y1), (x2, y2) = self.POLYGON[k], self.POLYGON[(k + 1) % n]
+            mx, my = (x1 + x2) // 2, (y1 + y2) // 2
+            points += [(x1, y1), (mx, my)]
+            points += [(mx + dx, my + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+        return points
+
+    def test_point_in_polygon_matches_ray_casting(self):
+        import numpy as np
+        polygon = np.asarray(self.POLYGON, dtype=np.float64)
+        points = self.edge_points() + [(x, y) for x in range(0, 601, 25) for y in range(0, 501, 25)]
+        for point in points:
+            self.assertEqual(self.point_in_polygon(point[0], point[1], polygon),
+                             self.detector._point_in_polygon(point, self.POLYGON), point)
+
+    def test_degenerate_polygon_is_never_inside(self):
+        import numpy as np
+        self.assertFalse(self.point_in_polygon(150, 150, np.empty((0, 2))))
+        self.assertFalse(self.point_in_polygon(150, 150, np.asarray([[100, 100], [400, 400]], dtype=np.float64)))
+
+    def random_people(self, rng, count):
+        import numpy as np
+        # Coordinates on a 1/16 px grid are exact in float32, so the float32
+        # keypoints the old methods see and the float64 kernel input agree
+        grid = lambda hi: rng.randint(0, hi * 16) / 16
+        # Exactly 0.3 only on the wrists (>= cut-off): the hip/shoulder > 0.3
+        # check on a float32 0.3 depends on NumPy's scalar promotion rules
+        confs = [0.0, 0.29, 0.31, 0.5, 0.9]
+        wrist_confs = [0.0, 0.29, 0.3, 0.31, 0.9]
+        kpts = np.zeros((count, 17, 3), dtype=np.float32)
+        boxes = np.zeros((count, 4), dtype=np.float32)
+        edges = self.edge_points()
+        for p in range(count):
+            for k in range(17):
+                kpts[p, k] = (grid(600), grid(500), rng.choice(wrist_confs if k in (9, 10) else confs))
+            if rng.random() < 0.3:
+                # Put the hip center exactly on a zone edge/vertex
+                ex, ey = rng.choice(edges)
+                kpts[p, 11, :2] = (ex - 3, ey - 5)
+                kpts[p, 12, :2] = (ex + 3, ey + 5)
+                kpts[p, 11, 2] = kpts[p, 12, 2] = 0.9
+            x1, y1 = grid(500), grid(400)
+            boxes[p] = (x1, y1, x1 + grid(100), y1 + grid(100))
+        return kpts, boxes
+
+    def test_extract_people_matches_per_person_methods(self):
+        import numpy as np
+        rng = random.Random(4321)
+        for _ in range(200):
+            kpts, boxes = self.random_people(rng, rng.randint(0, 5))
+            centers, in_zone, wrists, wrist_ok = self.extract_people(
+                kpts.astype(np.float64), boxes.astype(np.float64), self.detector._cashier_poly_array, 0.3)
+            for idx, (person_kpts, box) in enumerate(zip(kpts, boxes)):
+                bbox = tuple(map(int, box))
+                self.assertEqual((int(centers[idx, 0]), int(centers[idx, 1])),
+                                 self.detector.get_person_center(person_kpts, bbox))
+                self.assertEqual(bool(in_zone[idx]), self.detector.is_person_in_cashier_zone(person_kpts, bbox))
+                hands = {}
+                for k, name in enumerate(('left', 'right')):
+                    if wrist_ok[idx, k]:
+                        wx, wy, wc = wrists[idx, k]
+                        hands[name] = (int(wx), int(wy), float(wc))
+                expected = self.detector.get_hand_positions(person_kpts)
+                self.assertEqual(hands.keys(), expected.keys())
+                for name in hands:
+                    self.assertEqual(hands[name][:2], expected[name][:2])
+                    self.assertAlmostEqual(hands[name][2], expected[name][2], places=6)
+
+    def test_no_zone_means_nobody_in_zone(self):
+        import numpy as np
+        kpts, boxes = self.random_people(random.Random(7), 4)
+        _, in_zone, _, _ = self.extract_people(
+            kpts.astype(np.float64), boxes.astype(np.float64), np.empty((0, 2)), 0.3)
+        self.assertFalse(in_zone.any())
+
+
+class BranchEventCounterTests(TestCase):
+    """Branch.today_event_count is kept up to date by the Event post_save/post_delete signals"""
+
+    def setUp(self):
+        region = Region.objects.create(name='Seoul', code='SEO')
+        self.branch = Branch.objects.create(name='Gangnam', region=region)
+        self.camera = Camera.objects.create(branch=self.branch, camera_id='CAM-SEO-01',
+                                            name='Lobby', rtsp_url='rtsp://127.0.0.1/stream')
+
+    def create_event(self):
+        return Event.objects.create(branch=self.branch, camera=self.camera, event_type='cash')
+
+    def count(self):
+        self.branch.refresh_from_db()
+        return self.branch.get_today_event_count()
+
+    def test_create_increments(self):
+        self.create_event()
+        self.assertEqual(self.count(), 1)
+        self.create_event()
+        self.assertEqual(self.count(), 2)
+        self.assertEqual(self.branch.today_event_date, timezone.localdate())
+
+    def test_update_does_not_increment(self):
+        event = self.create_event()
+        event.status = 'confirmed'
+        event.save()
+        self.assertEqual(self.count(), 1)
+
+    def test_delete_decrements(self):
+        first = self.create_event()
+        self.create_event()
+        first.delete()
+        self.assertEqual(self.count(), 1)
+
+    def test_deleting_previous_day_event_keeps_today_count(self):
+        old = self.create_event()
+        self.create_event()
+        Event.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=1))
+        old.refresh_from_db()
+        old.delete()
+        self.assertEqual(self.count(), 2)
+
+    def test_date_rollover_resets_count(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        Branch.objects.filter(pk=self.branch.pk).update(today_event_count=5, today_event_date=yesterday)
+        # Stale counter reads as zero until the first event of the new day
+        self.assertEqual(self.count(), 0)
+        self.create_event()
+        self.assertEqual(self.count(), 1)
+        self.assertEqual(self.branch.today_event_count, 1)
+        self.assertEqual(self.branch.today_event_date, timezone.localdate())
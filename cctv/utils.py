@@ -0,0 +1,83 @@
+"""
+Small shared helpers for the CCTV app
+"""
+import json
+import os
+import threading
+from datetime import date
+from pathlib import Path
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps_line(obj):
+    """Serialize obj to one compact, newline-terminated UTF-8 JSON line (orjson when installed)"""
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass  # e.g. non-str dict keys - let the stdlib encoder handle it
+    return (json.dumps(obj, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def format_uptime(seconds):
+    """Format elapsed seconds as HH:MM:SS"""
+    s = int(seconds)
+    return f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}"
+
+
+class EventJsonLog:
+    """
+    Daily append-only JSONL log of event metadata for one camera.
+
+    The file (media/json/events_<camera>_<YYYYMMDD>.jsonl) is opened once
+    with O_APPEND and reused until the date changes, so each event is a
+    single write() instead of creating a new JSON file.
+    """
+
+    def __init__(self, camera_id):
+        self.camera_id = camera_id
+        self._lock = threading.Lock()
+        self._fd = None
+        self._day = None
+        self._relative_path = None
+
+    def _open_for(self, day):
+        from django.conf import settings
+
+        if self._fd is not None:
+            os.close(self._fd)
+        json_dir = Path(settings.MEDIA_ROOT) / 'json'
+        json_dir.mkdir(parents=True, exist_ok=True)
+        filename = f"events_{self.camera_id}_{day.strftime('%Y%m%d')}.jsonl"
+        self._fd = os.open(json_dir / filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._day = day
+        self._relative_path = f"json/{filename}"
+
+    def append(self, metadata):
+        """Append one event as a JSON line, returning {'path', 'offset'} of the line"""
+        line = dumps_line(metadata)
+        with self._lock:
+            today = date.today()
+            if today != self._day:
+                self._open_for(today)
+            os.write(self._fd, line)
+            # O_APPEND leaves the offset at the end of what we just wrote
+            offset = os.lseek(self._fd, 0, os.SEEK_CUR) - len(line)
+            return {'path': self._relative_path, 'offset': offset}
+
+
+_event_logs = {}
+_event_logs_lock = threading.Lock()
+
+
+def get_event_log(camera_id):
+    """Shared EventJsonLog for a camera (one open file per camera per process)"""
+    with _event_logs_lock:
+        if camera_id not in _event_logs:
+            _event_logs[camera_id] = EventJsonLog(camera_id)
+        return _event_logs[camera_id]
@@ -0,0 +1,166 @@
+"""
+Video/image encoding helpers shared by the camera workers and live stream.
+
+Clip frames are piped to ffmpeg as raw BGR instead of being written to an
+MJPG temp file and transcoded, and NVENC is used when the GPU supports it.
+Live-view JPEGs are encoded with nvjpeg (torchvision) on CUDA hosts.
+"""
+import subprocess
+import threading
+
+import cv2
+import numpy as np
+
+# ffmpeg video args per encoder - both produce browser-playable H.264
+NVENC_ARGS = ['-c:v', 'h264_nvenc', '-preset', 'p4', '-rc', 'vbr', '-cq', '23', '-b:v', '0']
+X264_ARGS = ['-c:v', 'libx264', '-preset', 'fast', '-crf', '23']
+
+_nvenc_available = {}  # ffmpeg_path -> bool (probed once per process)
+_probe_lock = threading.Lock()
+
+
+def nvenc_available(ffmpeg_path='ffmpeg'):
+    """Check once whether ffmpeg can actually open an NVENC session."""
+    with _probe_lock:
+        if ffmpeg_path not in _nvenc_available:
+            try:
+                # Listing encoders is not enough - the build may have NVENC
+                # without a usable GPU, so encode one tiny test frame
+                result = subprocess.run([
+                    ffmpeg_path, '-hide_banner', '-loglevel', 'error',
+                    '-f', 'lavfi', '-i', 'color=black:s=256x256',
+                    '-frames:v', '1', '-c:v', 'h264_nvenc', '-f', 'null', '-'
+                ], capture_output=True, timeout=15)
+                _nvenc_available[ffmpeg_path] = result.returncode == 0
+            except Exception:
+                _nvenc_available[ffmpeg_path] = False
+            print(f"[Encode] NVENC {'available' if _nvenc_available[ffmpeg_path] else 'not available'} - "
+                  f"using {'h264_nvenc' if _nvenc_available[ffmpeg_path] else 'libx264'}")
+        return _nvenc_available[ffmpeg_path]
+
+
+def get_h264_args(ffmpeg_path='ffmpeg'):
+    """ffmpeg video codec args for the best available H.264 encoder"""
+    return NVENC_ARGS if nvenc_available(ffmpeg_path) else X264_ARGS
+
+
+def encode_frames_h264(frames, output_path, fps, ffmpeg_path='ffmpeg', timeout=180, overlay=None):
+    """
+    Encode BGR frames straight to an H.264 MP4 through an ffmpeg stdin pipe.
+
+    `frames` may be any re-iterable sequence; it is read lazily while writing
+    (None entries are skipped), so a ring-buffer view can drop slots that are
+    overwritten mid-encode.
+    `overlay`, if given, is called on a scratch copy of each frame before it is
+    written, so the source frames are never modified.
+    Falls back to libx264 if the NVENC encode fails.
+    Returns (success, error_message).
+    """
+    first = next((f for f in frames if f is not None), None)
+    if first is None:
+        return False, 'No frames'
+
+    height, width = first.shape[:2]
+    scratch = np.empty_like(first) if overlay else None
+
+    def run(codec_args):
+        cmd = [
+            ffmpeg_path, '-y', '-hide_banner', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+            '-s', f'{width}x{height}', '-r', str(fps),
+            '-i', '-',
+            *codec_args,
+            '-pix_fmt', 'yuv420p',
+            '-movflags', '+faststart',
+            str(output_path)
+        ]
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            for frame in frames:
+                if frame is None or frame.shape[:2] != (height, width):
+                    continue
+                if overlay:
+                    np.copyto(scratch, frame)
+                    overlay(scratch)
+                    frame = scratch
+                proc.stdin.write(np.ascontiguousarray(frame).data)
+            proc.stdin.close()
+            proc.wait(timeout=timeout)
+        except BrokenPipeError:
+            proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            return False, 'FFmpeg timeout'
+        stderr = proc.stderr.read().decode(errors='ignore')
+        proc.stderr.close()
+        return proc.returncode == 0, stderr[:300]
+
+    codec_args = get_h264_args(ffmpeg_path)
+    ok, error = run(codec_args)
+    if not ok and codec_args is NVENC_ARGS:
+        print(f"[Encode] NVENC encode failed, retrying with libx264: {error}")
+        ok, error = run(X264_ARGS)
+    return ok, error
+
+
+def render_label(text, color, box_width=240, font_scale=0.7):
+    """
+    Rasterize a clip/thumbnail label once into a small BGR tile.
+
+    The tile is the filled black box at (10, 10) with the text drawn on it,
+    widened if the text would run past the box. Blit it with blit_label()
+    instead of calling cv2.rectangle/putText on every frame.
+    """
+    (text_w, _), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, 2)
+    tile = np.zeros((36, max(box_width, text_w + 10) + 1, 3), dtype=np.uint8)
+    cv2.putText(tile, text, (5, 25), cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, 2)
+    return tile
+
+
+def blit_label(frame, tile, x=10, y=10):
+    """Copy a render_label() tile onto the frame in place (a plain slice copy)."""
+    h = min(tile.shape[0], frame.shape[0] - y)
+    w = min(tile.shape[1], frame.shape[1] - x)
+    if h > 0 and w > 0:
+        frame[y:y + h, x:x + w] = tile[:h, :w]
+    return frame
+
+
+_gpu_jpeg_ok = None  # None = not probed yet
+
+
+def _gpu_jpeg_available():
+    """Check once whether torchvision can encode JPEGs on the GPU (nvjpeg)"""
+    global _gpu_jpeg_ok
+    if _gpu_jpeg_ok is None:
+        try:
+            import torch
+            from torchvision.io import encode_jpeg as tv_encode_jpeg
+            _gpu_jpeg_ok = False
+            if torch.cuda.is_available():
+                tv_encode_jpeg(torch.zeros((3, 16, 16), dtype=torch.uint8, device='cuda'))
+                _gpu_jpeg_ok = True
+        except Exception:
+            _gpu_jpeg_ok = False
+    return _gpu_jpeg_ok
+
+
+def encode_jpeg(frame, quality=85, use_gpu=True):
+    """
+    Encode a BGR frame to JPEG bytes.
+
+    Uses nvjpeg via torchvision when CUDA is available, otherwise (or on any
+    GPU error) falls back to cv2.imencode.
+    """
+    if use_gpu and _gpu_jpeg_available():
+        try:
+            import torch
+            from torchvision.io import encode_jpeg as tv_encode_jpeg
+            tensor = torch.from_numpy(frame).to('cuda', non_blocking=True)
+            tensor = tensor.flip(-1).permute(2, 0, 1).contiguous()  # BGR HWC -> RGB CHW
+            return tv_encode_jpeg(tensor, quality=quality).cpu().numpy().tobytes()
+        except Exception:
+            pass
+    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes()
@@ -60,6 +60,7 @@ except ImportError as e:
     print(f"Warning: Gemini validator not available - {e}")
 
 import threading
+import queue
 import time
 
 # Global detector instances per camera
@@ -291,7 +292,7 @@ def manage_branches(request):
     if not user.is_admin():
         return redirect('cctv:home')
     
-    branches = Branch.objects.all().select_related('region')
+    branches = Branch.objects.all().select_related('region').with_counts()
     regions = Region.objects.all()
     
     # Get filter parameters
@@ -433,7 +434,7 @@ def api_branches(request):
     user = request.user
     
     if request.method == 'GET':
-        branches = get_user_branches(user).select_related('region')
+        branches = get_user_branches(user).select_related('region').with_counts()
         data = [{
             'id': b.id,
             'name': b.name,
@@ -1397,6 +1398,12 @@ def get_detector_for_camera(camera):
             'violence_pose_model': settings.DETECTION_CONFIG.get('VIOLENCE_POSE_MODEL', 'yolov8n-pose.pt'),
             'fire_yolo_model': settings.DETECTION_CONFIG.get('FIRE_YOLO_MODEL', 'yolov8n.pt'),
             'fire_model': settings.DETECTION_CONFIG.get('FIRE_MODEL', 'fire_smoke_yolov8.pt'),
+            'detection_resolution': settings.DETECTION_CONFIG.get('DETECTION_RESOLUTION', 640),
+            'pose_imgsz': settings.DETECTION_CONFIG.get('POSE_IMGSZ', 640),
+            'batch_size': settings.DETECTION_CONFIG.get('INFERENCE_BATCH_SIZE', 16),
+            'motion_gate_ratio': settings.DETECTION_CONFIG.get('MOTION_GATE_RATIO', 0),
+            # generate_frames() only decodes every FRAME_SKIP-th frame
+            'frame_stride': settings.DETECTION_CONFIG.get('FRAME_SKIP', 1),
             'cashier_zone': [
                 camera.cashier_zone_x,
                 camera.cashier_zone_y,
@@ -1429,6 +1436,70 @@ def get_detector_for_camera(camera):
     return camera_detectors[camera.id]
 
 
+class FrameProducer(threading.Thread):
+    """Decode frames on a background thread so reads overlap with inference.
+    
+    Pushes (frame_number, frame) tuples into a bounded queue, followed by
+    None once the capture is exhausted. The consumer calls get() instead of
+    cap.read() and must call stop() before releasing the capture.
+    
+    With drop_old=True the oldest queued frame is discarded when the queue
+    is full, so a slow consumer always sees the most recent frame (live view).
+    
+    With stride > 1 every frame is grabbed (demuxed) but only frame numbers
+    divisible by stride are decoded and queued.
+    """
+    
+    def __init__(self, cap, maxsize=32, drop_old=False, stride=1):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.drop_old = drop_old
+        self.stride = max(1, int(stride))
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        frame_number = 0
+        while not self._stop_event.is_set():
+            if not self.cap.grab():
+                break
+            frame_number += 1
+            if frame_number % self.stride != 0:
+                continue  # skipped frame - never decoded
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                break
+            if not self._put((frame_number, frame)):
+                return
+        self._put(None)  # End of stream
+    
+    def _put(self, item):
+        """Blocking put that gives up once stop() has been called"""
+        if self.drop_old:
+            try:
+                self.queue.get_nowait()  # Discard stale frame
+            except queue.Empty:
+                pass
+            self.queue.put_nowait(item)
+            return True
+        
+        while not self._stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def get(self):
+        """Next (frame_number, frame) tuple, or None at end of stream"""
+        return self.queue.get()
+    
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=2)
+
+
 def generate_frames(camera):
     """Generator for video frames with detection overlay.
     
@@ -1444,12 +1515,16 @@ def generate_frames(camera):
             if not worker.running:
                 worker = None
     
+    from .video_encoding import encode_jpeg
+    from detectors import get_device
+    
+    # JPEG encode on the GPU (nvjpeg) when USE_GPU resolves to CUDA
+    use_gpu = get_device(settings.DETECTION_CONFIG.get('USE_GPU', 'auto')) == 'cuda'
+    
     # If worker exists, use its frames
     if worker is not None:
         print(f"[{camera.camera_id}] Using shared connection from background worker")
         
-        # Pre-allocate encode params - quality 75 for faster encoding
-        encode_params = [cv2.IMWRITE_JPEG_QUALITY, 75]
         last_frame_time = 0
         
         while worker.running:
@@ -1458,9 +1533,10 @@ def generate_frames(camera):
                 # Throttle to ~30fps
                 current_time = time.time()
                 if current_time - last_frame_time >= 0.033:
-                    _, buffer = cv2.imencode('.jpg', frame, encode_params)
+                    # Quality 75 for faster encoding
+                    jpeg = encode_jpeg(frame, 75, use_gpu)
                     yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+                           b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
                     last_frame_time = current_time
             time.sleep(0.015)  # ~66fps check rate for smoother streaming
         return
@@ -1495,19 +1571,20 @@ def generate_frames(camera):
     detector = get_detector_for_camera(camera)
     fps = cap.get(cv2.CAP_PROP_FPS) or 30
     frame_skip = settings.DETECTION_CONFIG['FRAME_SKIP']
-    frame_count = 0
+    
+    # Decode on a separate thread and keep only the newest frame, so latency
+    # stays bounded when detection is slower than the camera
+    # Skipped frames are only grabbed, never decoded
+    producer = FrameProducer(cap, maxsize=1, drop_old=True, stride=frame_skip)
+    producer.start()
     
     try:
         while True:
-            ret, frame = cap.read()
-            if not ret:
+            item = producer.get()
+            if item is None:
                 break
             
-            frame_count += 1
-            
-            # Skip frames for performance
-            if frame_count % frame_skip != 0:
-                continue
+            frame_count, frame = item
             
             # Process frame with detector
             if detector:
@@ -1519,11 +1596,12 @@ def generate_frames(camera):
                     save_detection(camera, det, frame_count)
             
             # Encode frame
-            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+            jpeg = encode_jpeg(frame, 85, use_gpu)
             yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
+                   b'Content-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n')
     
     finally:
+        producer.stop()
         cap.release()
         # Don't set offline when stream ends normally
         # Camera stays online until connection actually fails
@@ -1711,38 +1789,27 @@ def draw_debug_frame(frame, camera, pose_model=None, fps=0.0):
     zx, zy, zw, zh = cashier_zone
     
     # Draw cashier zone (POLYGON ONLY - no rectangle fallback)
-    if camera.cashier_zone_polygon:
-        try:
-            cashier_polygon = json.loads(camera.cashier_zone_polygon)
-            if len(cashier_polygon) >= 3:
-                # Draw polygon
-                points = np.array(cashier_polygon, np.int32)
-                points = points.reshape((-1, 1, 2))
-                cv2.polylines(frame, [points], True, (0, 255, 255), 3)
-                # Label at first point
-                label_x, label_y = int(cashier_polygon[0][0]), int(cashier_polygon[0][1])
-                cv2.rectangle(frame, (label_x, label_y - 30), (label_x + 150, label_y), (0, 255, 255), -1)
-                cv2.putText(frame, "CASHIER ZONE", (label_x + 5, label_y - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
-        except Exception as e:
-            pass  # No fallback to rectangle
+    # Polygons are parsed once per camera instance (Camera.cashier_polygon_np)
+    cashier_polygon = camera.cashier_polygon_np
+    if cashier_polygon is not None:
+        # Draw polygon
+        cv2.polylines(frame, [cashier_polygon.reshape((-1, 1, 2))], True, (0, 255, 255), 3)
+        # Label at first point
+        label_x, label_y = int(cashier_polygon[0][0]), int(cashier_polygon[0][1])
+        cv2.rectangle(frame, (label_x, label_y - 30), (label_x + 150, label_y), (0, 255, 255), -1)
+        cv2.putText(frame, "CASHIER ZONE", (label_x + 5, label_y - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
     # No rectangle fallback - polygon only mode
     
     # Draw cash drawer zone (POLYGON ONLY) if enabled
     if camera.cash_drawer_zone_enabled:
-        if camera.cash_drawer_zone_polygon:
-            try:
-                drawer_polygon = json.loads(camera.cash_drawer_zone_polygon)
-                if len(drawer_polygon) >= 3:
-                    # Draw polygon
-                    points = np.array(drawer_polygon, np.int32)
-                    points = points.reshape((-1, 1, 2))
-                    cv2.polylines(frame, [points], True, (0, 255, 0), 3)
-                    # Label at first point
-                    label_x, label_y = int(drawer_polygon[0][0]), int(drawer_polygon[0][1])
-                    cv2.rectangle(frame, (label_x, label_y - 30), (label_x + 180, label_y), (0, 255, 0), -1)
-                    cv2.putText(frame, "CASH DRAWER", (label_x + 5, label_y - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
-            except Exception as e:
-                pass  # No fallback to rectangle
+        drawer_polygon = camera.cash_drawer_polygon_np
+        if drawer_polygon is not None:
+            # Draw polygon
+            cv2.polylines(frame, [drawer_polygon.reshape((-1, 1, 2))], True, (0, 255, 0), 3)
+            # Label at first point
+            label_x, label_y = int(drawer_polygon[0][0]), int(drawer_polygon[0][1])
+            cv2.rectangle(frame, (label_x, label_y - 30), (label_x + 180, label_y), (0, 255, 0), -1)
+            cv2.putText(frame, "CASH DRAWER", (label_x + 5, label_y - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
         # No rectangle fallback - polygon only mode
     
     # Get pose model if not provided
@@ -1771,22 +1838,17 @@ def draw_debug_frame(frame, camera, pose_model=None, fps=0.0):
                 boxes = result.boxes.xyxy.cpu().numpy()
                 confs = result.boxes.conf.cpu().numpy()  # Get confidence scores
                 
+                # Cashier zone membership of every person's box center in one
+                # call (POLYGON-ONLY MODE - all False without a polygon)
+                int_boxes = boxes.astype(int)
+                centers = np.stack([(int_boxes[:, 0] + int_boxes[:, 2]) // 2,
+                                    (int_boxes[:, 1] + int_boxes[:, 3]) // 2], axis=1)
+                in_zone_mask = camera.points_in_cashier_zone(centers)
+                
                 for idx, (kpts, box, conf) in enumerate(zip(keypoints_data, boxes, confs)):
                     x1, y1, x2, y2 = map(int, box)
                     person_conf = float(conf)  # Person detection confidence
-                    
-                    # Determine if person is in cashier zone (POLYGON-ONLY MODE)
-                    person_center = ((x1 + x2) // 2, (y1 + y2) // 2)
-                    
-                    # Check against polygon if exists
-                    in_zone = False
-                    if camera.cashier_zone_polygon:
-                        try:
-                            cashier_poly = json.loads(camera.cashier_zone_polygon)
-                            if len(cashier_poly) >= 3:
-                                in_zone = point_in_polygon(person_center, cashier_poly)
-                        except:
-                            pass
+                    in_zone = bool(in_zone_mask[idx])
                     
                     # Label as Cashier or Client with confidence
                     role = "CASHIER" if in_zone else "CLIENT"
@@ -2091,7 +2153,7 @@ def api_detection_debug_info(request, camera_id):
             'consecutive_frames': getattr(detector.fire_detector, 'consecutive_fire', 0),
             'min_frames_required': getattr(detector.fire_detector, 'min_fire_frames', 10),
         },
-        'recent_alerts': detector.alerts_history[-10:] if hasattr(detector, 'alerts_history') else [],
+        'recent_alerts': list(detector.alerts_history)[-10:] if hasattr(detector, 'alerts_history') else [],
     }
     
     return JsonResponse(info)
@@ -2451,14 +2513,12 @@ class BackgroundCameraWorker:
         self.fps_start_time = None
         self.current_fps = 0.0
     
-    def get_uptime(self):
-        """Get worker uptime as formatted string"""
+    def get_uptime(self, now=None):
+        """Get worker uptime as formatted string (pass `now` when listing many workers)"""
         if not self.start_time:
             return "Not started"
-        elapsed = datetime.now() - self.start_time
-        hours, remainder = divmod(int(elapsed.total_seconds()), 3600)
-        minutes, seconds = divmod(remainder, 60)
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+        from .utils import format_uptime
+        return format_uptime(((now or datetime.now()) - self.start_time).total_seconds())
     
     def get_stats(self):
         """Get worker statistics"""
@@ -2482,18 +2542,19 @@ class BackgroundCameraWorker:
         # - rtsp_transport=tcp: Use TCP instead of UDP to avoid packet loss
         # - stimeout=60000000: 60 second socket timeout (in microseconds) - prevents premature timeout
         # - max_delay=1000000: Max delay 1 second
-        # - fflags=nobuffer+discardcorrupt: Reduce buffering, discard corrupt frames
+        # - fflags=nobuffer+discardcorrupt+flush_packets: Reduce buffering, discard corrupt frames
+        # - flags=low_delay, reorder_queue_size=0: Hand frames out as soon as they decode
         # - analyzeduration=2000000: Analyze for 2 seconds max
         # - probesize=2000000: Probe size 2MB
-        # - buffer_size=4096000: 4MB buffer for network stability
-        os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = 'rtsp_transport;tcp|stimeout;60000000|max_delay;1000000|fflags;nobuffer+discardcorrupt|analyzeduration;2000000|probesize;2000000|buffer_size;4096000'
+        # - buffer_size=4096000: 4MB socket buffer for network stability
+        os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = 'rtsp_transport;tcp|stimeout;60000000|max_delay;1000000|fflags;nobuffer+discardcorrupt+flush_packets|flags;low_delay|reorder_queue_size;0|analyzeduration;2000000|probesize;2000000|buffer_size;4096000'
         
         cap = cv2.VideoCapture(rtsp_url, cv2.CAP_FFMPEG)
         
         # Set additional capture properties - balanced timeouts
         cap.set(cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, 30000)  # 30s connection timeout
         cap.set(cv2.CAP_PROP_READ_TIMEOUT_MSEC, 15000)  # 15s read timeout 
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 5)  # Slightly larger buffer for stability
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Latest frame only - the reader drains continuously
         
         return cap
     
@@ -2519,7 +2580,7 @@ class BackgroundCameraWorker:
         if not DETECTOR_AVAILABLE:
             return None
         
-        zone = camera.get_cashier_zone()
+        cam_settings = camera.detection_settings
         config = {
             'models_dir': str(self.models_dir),
             # GPU/CPU setting from environment
@@ -2529,19 +2590,23 @@ class BackgroundCameraWorker:
             'violence_pose_model': settings.DETECTION_CONFIG.get('VIOLENCE_POSE_MODEL', 'yolov8n-pose.pt'),
             'fire_yolo_model': settings.DETECTION_CONFIG.get('FIRE_YOLO_MODEL', 'yolov8n.pt'),
             'fire_model': settings.DETECTION_CONFIG.get('FIRE_MODEL', 'fire_smoke_yolov8.pt'),
+            'detection_resolution': settings.DETECTION_CONFIG.get('DETECTION_RESOLUTION', 640),
+            'pose_imgsz': settings.DETECTION_CONFIG.get('POSE_IMGSZ', 640),
+            'batch_size': settings.DETECTION_CONFIG.get('INFERENCE_BATCH_SIZE', 16),
+            'motion_gate_ratio': settings.DETECTION_CONFIG.get('MOTION_GATE_RATIO', 0),
             # Detection settings
-            'cashier_zone': [zone['x'], zone['y'], zone['width'], zone['height']],
-            'hand_touch_distance': camera.hand_touch_distance,
+            'cashier_zone': list(cam_settings.cashier_zone),
+            'hand_touch_distance': cam_settings.hand_touch_distance,
             'pose_confidence': 0.5,
             'min_transaction_frames': 1,  # Immediate cash detection
-            'fire_confidence': camera.fire_confidence,
+            'fire_confidence': cam_settings.fire_confidence,
             'min_fire_frames': 3,
-            'violence_confidence': camera.violence_confidence,
+            'violence_confidence': cam_settings.violence_confidence,
             'min_violence_frames': 10,
-            'detect_cash': camera.detect_cash,
-            'detect_violence': camera.detect_violence,
-            'detect_fire': camera.detect_fire,
-            'cash_confidence': camera.cash_confidence,
+            'detect_cash': cam_settings.detect_cash,
+            'detect_violence': cam_settings.detect_violence,
+            'detect_fire': cam_settings.detect_fire,
+            'cash_confidence': cam_settings.cash_confidence,
         }
         return UnifiedDetector(config)
     
@@ -2622,24 +2687,13 @@ class BackgroundCameraWorker:
                         'fire_confidence': getattr(fd, 'fire_confidence', 0.5),
                     }
             
-            # Save JSON file to media/json folder
-            json_dir = os.path.join(settings.MEDIA_ROOT, 'json')
-            os.makedirs(json_dir, exist_ok=True)
-            
-            # Generate JSON filename matching clip pattern
-            json_filename = f"{event_type}_{camera.camera_id}_{timestamp.strftime('%Y%m%d_%H%M%S')}.json"
-            json_path = os.path.join(json_dir, json_filename)
-            
             # Convert numpy types to JSON-serializable types
             event_metadata = self.convert_to_json_serializable(event_metadata)
             
-            # Write JSON file with pretty formatting
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(event_metadata, f, indent=2, ensure_ascii=False)
-            
-            # Store relative path for database
-            json_relative_path = f"json/{json_filename}"
-            print(f"[JSON] Saved metadata: {json_relative_path}")
+            # Append to the camera's daily JSONL log (one write, no new file per event)
+            from .utils import get_event_log
+            json_log = get_event_log(camera.camera_id).append(event_metadata)
+            print(f"[JSON] Logged metadata: {json_log['path']} @ {json_log['offset']}")
             
             event = Event.objects.create(
                 branch=camera.branch,
@@ -2653,9 +2707,9 @@ class BackgroundCameraWorker:
                 bbox_y2=bbox[3] if bbox else 0,
                 clip_path=clip_path,
                 thumbnail_path=thumbnail_path,
-                metadata=json_relative_path,  # Store path to JSON file
+                metadata={**event_metadata, 'json_log': json_log},
             )
-            print(f"[DB] Saved event: {event_type} (id={event.id}) with JSON: {json_relative_path}")
+            print(f"[DB] Saved event: {event_type} (id={event.id}) with JSON: {json_log['path']}")
             return event
         except Exception as e:
             print(f"[DB] Error saving event: {e}")
@@ -2666,15 +2720,16 @@ class BackgroundCameraWorker:
     def save_clip(self, frames, camera, detection_type, fps=30):
         """Save video clip directly to media folder for web access.
         
-        Uses H.264 encoding via ffmpeg for browser compatibility.
+        Frames are piped straight into ffmpeg as H.264 (NVENC when available)
+        for browser compatibility - no intermediate MJPG file.
         """
         if not frames or len(frames) == 0:
             print(f"[Clip] No frames to save")
             return None
         
         import cv2
-        import subprocess
         import uuid
+        from .video_encoding import blit_label, encode_frames_h264, render_label
         
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         unique_id = uuid.uuid4().hex[:6]  # Add unique ID to prevent conflicts
@@ -2686,85 +2741,42 @@ class BackgroundCameraWorker:
         thumb_dir = Path(settings.MEDIA_ROOT) / 'thumbnails'
         thumb_dir.mkdir(parents=True, exist_ok=True)
         
-        temp_filename = f"{camera.camera_id}_{detection_type}_{timestamp}_{unique_id}_temp.avi"
         final_filename = f"{camera.camera_id}_{detection_type}_{timestamp}.mp4"
-        
-        temp_path = clip_dir / temp_filename
         final_path = clip_dir / final_filename
         
-        height, width = frames[0].shape[:2]
-        
-        # Use MJPG codec for temp file (reliable, fast)
-        fourcc = cv2.VideoWriter_fourcc(*'MJPG')
-        out = cv2.VideoWriter(str(temp_path), fourcc, fps, (width, height))
-        
-        if not out.isOpened():
-            print(f"[Clip] Failed to open video writer")
-            return None
-        
-        # Write frames with detection label
-        frame_count = 0
-        for frame in frames:
-            if frame is None:
-                continue
-            # Add detection type label
-            label = f"{detection_type.upper()} DETECTED"
-            cv2.rectangle(frame, (10, 10), (250, 45), (0, 0, 0), -1)
-            color = {'cash': (0, 255, 0), 'violence': (0, 0, 255), 'fire': (0, 165, 255)}.get(detection_type, (255, 255, 255))
-            cv2.putText(frame, label, (15, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-            out.write(frame)
-            frame_count += 1
-        
-        out.release()
-        out = None  # Ensure handle is released
-        
-        print(f"[Clip] Wrote {frame_count} frames to temp file")
+        # Add detection type label (rasterized once, then slice-copied per frame).
+        # The encoder applies it to a scratch copy - buffered frames are shared
+        # with the live view and must stay untouched
+        color = {'cash': (0, 255, 0), 'violence': (0, 0, 255), 'fire': (0, 165, 255)}.get(detection_type, (255, 255, 255))
+        label_tile = render_label(f"{detection_type.upper()} DETECTED", color)
+        frame_count = sum(1 for frame in frames if frame is not None)
         
-        # Convert to H.264 MP4 using ffmpeg
+        # Encode to H.264 MP4 using ffmpeg
         # Use global lock to prevent concurrent FFmpeg operations causing corruption
         ffmpeg_path = settings.DETECTION_CONFIG.get('FFMPEG_PATH', 'ffmpeg')
         with _ffmpeg_lock:
-          try:
-            result = subprocess.run([
-                ffmpeg_path, '-y', '-i', str(temp_path),
-                '-c:v', 'libx264', '-preset', 'fast', '-crf', '23',
-                '-pix_fmt', 'yuv420p',
-                '-movflags', '+faststart',
-                '-r', str(fps),
-                str(final_path)
-            ], capture_output=True, timeout=180)
-            
-            # Clean up temp file with retry for Windows file locking
-            self._safe_delete(temp_path)
-            
-            if result.returncode == 0 and final_path.exists():
-                print(f"[Clip] Saved: {final_path} ({final_path.stat().st_size / 1024:.1f} KB)")
-            else:
-                print(f"[Clip] FFmpeg error: {result.stderr.decode()[:300]}")
+            try:
+                ok, error = encode_frames_h264(frames, final_path, fps, ffmpeg_path=ffmpeg_path,
+                                               overlay=lambda frame: blit_label(frame, label_tile))
+            except FileNotFoundError:
+                print(f"[Clip] FFmpeg not found")
                 return None
-                
-          except subprocess.TimeoutExpired:
-            print(f"[Clip] FFmpeg timeout")
-            self._safe_delete(temp_path)
-            return None
-          except FileNotFoundError:
-            print(f"[Clip] FFmpeg not found")
-            self._safe_delete(temp_path)
-            return None
-          except Exception as e:
-            print(f"[Clip] Error: {e}")
-            self._safe_delete(temp_path)
+            except Exception as e:
+                print(f"[Clip] Error: {e}")
+                return None
+        
+        if ok and final_path.exists():
+            print(f"[Clip] Saved {frame_count} frames: {final_path} ({final_path.stat().st_size / 1024:.1f} KB)")
+        else:
+            print(f"[Clip] FFmpeg error: {error}")
             return None
         
         # Save thumbnail from last frame
         thumb_filename = f"{camera.camera_id}_{detection_type}_{timestamp}.jpg"
         thumb_path = thumb_dir / thumb_filename
         
-        thumb_frame = frames[-1].copy()
-        label = f"{detection_type.upper()}"
-        color = {'cash': (0, 255, 0), 'violence': (0, 0, 255), 'fire': (0, 165, 255)}.get(detection_type, (255, 255, 255))
-        cv2.rectangle(thumb_frame, (10, 10), (150, 45), (0, 0, 0), -1)
-        cv2.putText(thumb_frame, label, (15, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+        thumb_frame = blit_label(frames[-1].copy(), label_tile)
+        thumb_frame = blit_label(thumb_frame, render_label(detection_type.upper(), color, box_width=140, font_scale=0.8))
         cv2.imwrite(str(thumb_path), thumb_frame)
         
         print(f"[Clip] Thumbnail: {thumb_path}")
@@ -2869,16 +2881,14 @@ class BackgroundCameraWorker:
         if cap is None or not cap.isOpened():
             self.status = 'error'
             self.last_error = f'Cannot open stream after {max_connect_retries} attempts: {camera.rtsp_url}'
-            camera.status = 'offline'
-            camera.save()
+            Camera.objects.filter(pk=self.camera_id).update(status='offline')
             return
         
         fps = cap.get(cv2.CAP_PROP_FPS) or 30
         self.stream_fps = fps  # Store for clip saver
         self.status = 'running'
-        camera.status = 'online'
-        camera.last_connected = timezone.now()
-        camera.save()
+        # Single UPDATE by pk - no model save() round trip
+        Camera.objects.filter(pk=self.camera_id).update(status='online', last_connected=timezone.now())
         
         consecutive_failures = 0
         max_failures = 20  # Max consecutive read failures before reconnect (increased)
@@ -2912,23 +2922,23 @@ class BackgroundCameraWorker:
                             print(f"[Worker] Reconnected successfully")
                 continue
             
-            # Successful frame read
+            # Successful frame read - one clock read per frame, shared below
+            now = time.time()
             consecutive_failures = 0
-            last_success_time = time.time()
+            last_success_time = now
             frame_count += 1
             self.frame_count = frame_count
             
-            # Calculate FPS
+            # Calculate FPS - just count frames, only do the division once a second
             if self.fps_start_time is None:
-                self.fps_start_time = time.time()
+                self.fps_start_time = now
                 self.fps_counter = 0
             else:
                 self.fps_counter += 1
-                elapsed = time.time() - self.fps_start_time
-                if elapsed >= 1.0:  # Update FPS every second
-                    self.current_fps = self.fps_counter / elapsed
+                if now - self.fps_start_time >= 1.0:  # Update FPS every second
+                    self.current_fps = self.fps_counter / (now - self.fps_start_time)
                     self.fps_counter = 0
-                    self.fps_start_time = time.time()
+                    self.fps_start_time = now
             
             # Update current frame for live viewing (minimal lock time)
             with self.frame_lock:
@@ -2936,10 +2946,12 @@ class BackgroundCameraWorker:
                 if self.current_frame_with_overlay is None:
                     self.current_frame_with_overlay = frame
             
-            # Buffer every 2nd frame for clips (reduces memory, still smooth)
+            # Buffer every 2nd frame for clips (reduces memory, still smooth).
+            # cap.read() hands back a fresh array each time and nothing writes
+            # into it afterwards (save_clip labels a scratch copy), so no copy
             if frame_count % 2 == 0:
                 with self.raw_buffer_lock:
-                    self.raw_frame_buffer.append(frame.copy())
+                    self.raw_frame_buffer.append(frame)
                     if len(self.raw_frame_buffer) > self.clip_buffer_size:
                         self.raw_frame_buffer.pop(0)
             
@@ -2963,10 +2975,7 @@ class BackgroundCameraWorker:
             self.detection_thread.join(timeout=5)
         
         self.status = 'stopped'
-        camera = self.get_camera()
-        if camera:
-            camera.status = 'offline'
-            camera.save()
+        Camera.objects.filter(pk=self.camera_id).update(status='offline')
     
     def run_detection(self):
         """Detection processing loop - runs in separate thread.
@@ -2982,6 +2991,13 @@ class BackgroundCameraWorker:
         
         last_settings_check = time.time()
         
+        # Gemini validator (and its API client) is created once per worker
+        validator = None
+        if GEMINI_AVAILABLE and settings.DETECTION_CONFIG.get('GEMINI_VALIDATION_ENABLED', True):
+            gemini_api_key = getattr(settings, 'GEMINI_API_KEY', '')
+            if gemini_api_key:
+                validator = GeminiValidator(api_key=gemini_api_key)
+        
         print(f"[Detection] Started detection loop for camera {camera.camera_id}")
         
         while self.running:
@@ -3000,15 +3016,18 @@ class BackgroundCameraWorker:
             
             # Reload camera settings periodically
             if time.time() - last_settings_check > 30:
-                camera = self.get_camera()
-                if camera and self.detector:
-                    self.detector.detect_cash = camera.detect_cash
-                    self.detector.detect_violence = camera.detect_violence
-                    self.detector.detect_fire = camera.detect_fire
+                # Only the toggles are applied here, so fetch just those columns
+                toggles = Camera.objects.filter(pk=self.camera_id).values(
+                    'detect_cash', 'detect_violence', 'detect_fire').first()
+                if toggles and self.detector:
+                    self.detector.detect_cash = toggles['detect_cash']
+                    self.detector.detect_violence = toggles['detect_violence']
+                    self.detector.detect_fire = toggles['detect_fire']
                 last_settings_check = time.time()
             
             try:
-                # Process frame WITH overlay
+                # Process frame WITH overlay (drawn in place, hence the copy -
+                # the raw frame is also the live view and clip buffer entry)
                 result = self.detector.process_frame(frame.copy(), draw_overlay=True)
                 frame_with_overlay = result.get('frame', frame)
                 
@@ -3051,17 +3070,14 @@ class BackgroundCameraWorker:
                     gemini_confidence = 1.0
                     gemini_reason = "Validation skipped"
                     
-                    if GEMINI_AVAILABLE and settings.DETECTION_CONFIG.get('GEMINI_VALIDATION_ENABLED', True):
+                    if validator is not None:
                         try:
-                            gemini_api_key = getattr(settings, 'GEMINI_API_KEY', '')
-                            if gemini_api_key:
-                                validator = GeminiValidator(api_key=gemini_api_key)
-                                gemini_validated, gemini_confidence, gemini_reason = validator.validate_event(frame, event_type)
-                                print(f"[Detection] Gemini validation: {event_type} = {gemini_validated} ({gemini_reason})")
-                                
-                                if not gemini_validated:
-                                    print(f"[Detection] Event rejected by Gemini: {event_type} - {gemini_reason}")
-                                    continue  # Skip saving this event
+                            gemini_validated, gemini_confidence, gemini_reason = validator.validate_event(frame, event_type)
+                            print(f"[Detection] Gemini validation: {event_type} = {gemini_validated} ({gemini_reason})")
+                            
+                            if not gemini_validated:
+                                print(f"[Detection] Event rejected by Gemini: {event_type} - {gemini_reason}")
+                                continue  # Skip saving this event
                         except Exception as e:
                             print(f"[Detection] Gemini validation error: {e}")
                             # On error, allow the event (don't block on validation errors)
@@ -3308,31 +3324,35 @@ def get_background_worker_status(request):
     if not request.user.is_admin():
         return JsonResponse({'error': 'Admin only'}, status=403)
     
+    # One query for all cameras (only the columns we need), done before
+    # taking the worker lock
+    cameras = {c['id']: c for c in Camera.objects.values('id', 'camera_id', 'name')}
+    
     statuses = {}
+    now = datetime.now()  # one clock read for every worker's uptime
     with background_worker_lock:
         for camera_id, worker in list(background_workers.items()):
-            camera = Camera.objects.filter(id=camera_id).first()
+            camera = cameras.get(camera_id)
             
             statuses[camera_id] = {
-                'camera_id': worker.camera_code if hasattr(worker, 'camera_code') else (camera.camera_id if camera else f'cam-{camera_id}'),
-                'camera_name': camera.name if camera else 'Unknown',
+                'camera_id': worker.camera_code if hasattr(worker, 'camera_code') else (camera['camera_id'] if camera else f'cam-{camera_id}'),
+                'camera_name': camera['name'] if camera else 'Unknown',
                 'status': worker.status,
                 'running': worker.running,
                 'frame_count': worker.frame_count,
                 'last_error': worker.last_error,
-                'uptime': worker.get_uptime(),
+                'uptime': worker.get_uptime(now),
                 'events_detected': worker.events_detected,
                 'frames_processed': worker.frames_processed,
                 'start_time': worker.start_time.isoformat() if worker.start_time else None,
             }
     
     # Also include cameras without workers
-    all_cameras = Camera.objects.all()
-    for camera in all_cameras:
-        if camera.id not in statuses:
-            statuses[camera.id] = {
-                'camera_id': camera.camera_id,
-                'camera_name': camera.name,
+    for camera_id, camera in cameras.items():
+        if camera_id not in statuses:
+            statuses[camera_id] = {
+                'camera_id': camera['camera_id'],
+                'camera_name': camera['name'],
                 'status': 'stopped',
                 'running': False,
                 'frame_count': 0,
@@ -3404,11 +3424,12 @@ def stop_all_background_workers(request):
     if not request.user.is_admin():
         return JsonResponse({'error': 'Admin only'}, status=403)
     
+    camera_codes = dict(Camera.objects.values_list('id', 'camera_id'))
+    
     stopped = []
     with background_worker_lock:
         for camera_id, worker in list(background_workers.items()):
-            camera = Camera.objects.filter(id=camera_id).first()
-            camera_code = camera.camera_id if camera else f'cam-{camera_id}'
+            camera_code = camera_codes.get(camera_id, f'cam-{camera_id}')
             worker.stop()
             stopped.append(camera_code)
         background_workers.clear()
@@ -3418,6 +3439,12 @@ def stop_all_background_workers(request):
 
 # ==================== TEST DETECTION API ====================
 
+# Bound concurrent offline test jobs - each one loads its own set of YOLO
+# models, so parallel uploads would duplicate VRAM and fight over the GPU
+_test_process_slots = threading.BoundedSemaphore(
+    max(1, int(settings.DETECTION_CONFIG.get('TEST_PROCESS_WORKERS', 1)))
+)
+
 @login_required
 @require_http_methods(['POST'])
 def api_test_upload(request):
@@ -3484,6 +3511,13 @@ def api_test_process(request):
     if not request.user.is_admin():
         return JsonResponse({'error': 'Admin only'}, status=403)
     
+    # Queue behind any running job instead of loading another model set
+    with _test_process_slots:
+        return _process_test_video(request)
+
+
+def _process_test_video(request):
+    """Run detection over an uploaded test video (called under _test_process_slots)"""
     import json
     import cv2
     import time
@@ -3517,7 +3551,9 @@ def api_test_process(request):
         if cash_drawer_zone:
             params['cash_drawer_zone'] = cash_drawer_zone
         
-        frame_skip = data.get('frame_skip', 2)
+        # Inference stride - decode every frame but only run detection on every Nth
+        frame_skip = max(1, int(data.get('frame_skip', settings.DETECTION_CONFIG.get('FRAME_SKIP', 2))))
+        params['frame_stride'] = frame_skip
         
         if not video_path or not Path(video_path).exists():
             return JsonResponse({'error': 'Video file not found'}, status=400)
@@ -3533,6 +3569,9 @@ def api_test_process(request):
             'violence_pose_model': settings.DETECTION_CONFIG.get('VIOLENCE_POSE_MODEL', 'yolov8n-pose.pt'),
             'fire_yolo_model': settings.DETECTION_CONFIG.get('FIRE_YOLO_MODEL', 'yolov8n.pt'),
             'fire_model': settings.DETECTION_CONFIG.get('FIRE_MODEL', 'fire_smoke_yolov8.pt'),
+            'detection_resolution': settings.DETECTION_CONFIG.get('DETECTION_RESOLUTION', 640),
+            'pose_imgsz': settings.DETECTION_CONFIG.get('POSE_IMGSZ', 640),
+            'batch_size': settings.DETECTION_CONFIG.get('INFERENCE_BATCH_SIZE', 16),
             **params
         }
         detector = UnifiedDetector(config)
@@ -3575,261 +3614,288 @@ def api_test_process(request):
         last_transaction_events = []
         last_frame_detections = []
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            frame_count += 1
-            
-            # Always draw cashier zone on every frame (if debug_overlay is enabled)
-            if cashier_zone and debug_overlay:
-                zone_x1, zone_y1, zone_x2, zone_y2 = cashier_zone
-                # Draw semi-transparent rectangle
-                overlay = frame.copy()
-                cv2.rectangle(overlay, (zone_x1, zone_y1), (zone_x2, zone_y2), (0, 255, 0), -1)
-                cv2.addWeighted(overlay, 0.15, frame, 0.85, 0, frame)
-                # Draw border
-                cv2.rectangle(frame, (zone_x1, zone_y1), (zone_x2, zone_y2), (0, 255, 0), 3)
-                # Draw label
-                cv2.putText(frame, "CASHIER ZONE", (zone_x1 + 10, zone_y1 + 35),
-                           cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
+        # Batched inference: buffer frames until batch_size detection frames are
+        # queued, then run the cash pose model once for the batch. The size is
+        # the detector's own, which an exported TensorRT engine is built for
+        batch_size = detector.cash_detector.batch_size
+        video_done = False
+        
+        # Decode on a separate thread so reads overlap with batched inference
+        producer = FrameProducer(cap)
+        producer.start()
+        
+        # Always stop the decode thread and release the capture/writer, even if
+        # inference or drawing raises - otherwise a failed upload leaks both
+        try:
+            while not video_done:
+                batch = []
+                detect_numbers = []
+                detect_frames = []
+                while len(detect_frames) < batch_size:
+                    item = producer.get()
+                    if item is None:
+                        video_done = True
+                        break
+                    frame_count, frame = item
+                    batch.append((frame_count, frame))
+                    if frame_count % frame_skip == 0:
+                        detect_numbers.append(frame_count)
+                        detect_frames.append(frame)
             
-            # Draw cash drawer zone (for two-step detection)
-            if cash_drawer_zone and debug_overlay:
-                cdz = cash_drawer_zone
-                # Cash drawer zone format: [x, y, width, height]
-                cdz_x1, cdz_y1 = int(cdz[0]), int(cdz[1])
-                cdz_x2, cdz_y2 = cdz_x1 + int(cdz[2]), cdz_y1 + int(cdz[3])
-                # Draw semi-transparent rectangle (cyan color)
-                overlay = frame.copy()
-                cv2.rectangle(overlay, (cdz_x1, cdz_y1), (cdz_x2, cdz_y2), (255, 255, 0), -1)
-                cv2.addWeighted(overlay, 0.2, frame, 0.8, 0, frame)
-                # Draw border (cyan)
-                cv2.rectangle(frame, (cdz_x1, cdz_y1), (cdz_x2, cdz_y2), (255, 255, 0), 2)
-                # Draw label
-                cv2.putText(frame, "CASH DRAWER", (cdz_x1 + 5, cdz_y1 + 20),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
+                if not batch:
+                    break
             
-            # Always show frame info (if debug_overlay is enabled)
-            timestamp = frame_count / fps if fps > 0 else 0
+                # The batch call is the ONLY cash inference for these frames - the
+                # state machine advances once per detection frame, so results are
+                # looked up by frame number rather than re-running detect()
+                cash_results = {}
+                if 'cash' in detection_types and detect_frames:
+                    cash_results = dict(zip(detect_numbers, detector.cash_detector.detect_batch(detect_frames)))
             
-            if debug_overlay:
-                # Draw frame info background on every frame
-                cv2.rectangle(frame, (5, 5), (450, 40), (0, 0, 0), -1)
-                cv2.rectangle(frame, (5, 5), (450, 40), (255, 255, 255), 2)
+                for frame_count, frame in batch:
+                    # Always draw cashier zone on every frame (if debug_overlay is enabled)
+                    if cashier_zone and debug_overlay:
+                        zone_x1, zone_y1, zone_x2, zone_y2 = cashier_zone
+                        # Draw semi-transparent rectangle
+                        overlay = frame.copy()
+                        cv2.rectangle(overlay, (zone_x1, zone_y1), (zone_x2, zone_y2), (0, 255, 0), -1)
+                        cv2.addWeighted(overlay, 0.15, frame, 0.85, 0, frame)
+                        # Draw border
+                        cv2.rectangle(frame, (zone_x1, zone_y1), (zone_x2, zone_y2), (0, 255, 0), 3)
+                        # Draw label
+                        cv2.putText(frame, "CASHIER ZONE", (zone_x1 + 10, zone_y1 + 35),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 255, 0), 2)
                 
-                # Frame number and timestamp on every frame
-                frame_info = f"Frame: {frame_count}/{total_frames} | Time: {timestamp:.2f}s"
-                cv2.putText(frame, frame_info, (10, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            
-            # Run detection only on selected frames, but draw on ALL frames
-            should_detect = frame_count % frame_skip == 0
-            
-            if should_detect:
-                processed_count += 1
+                    # Draw cash drawer zone (for two-step detection)
+                    if cash_drawer_zone and debug_overlay:
+                        cdz = cash_drawer_zone
+                        # Cash drawer zone format: [x, y, width, height]
+                        cdz_x1, cdz_y1 = int(cdz[0]), int(cdz[1])
+                        cdz_x2, cdz_y2 = cdz_x1 + int(cdz[2]), cdz_y1 + int(cdz[3])
+                        # Draw semi-transparent rectangle (cyan color)
+                        overlay = frame.copy()
+                        cv2.rectangle(overlay, (cdz_x1, cdz_y1), (cdz_x2, cdz_y2), (255, 255, 0), -1)
+                        cv2.addWeighted(overlay, 0.2, frame, 0.8, 0, frame)
+                        # Draw border (cyan)
+                        cv2.rectangle(frame, (cdz_x1, cdz_y1), (cdz_x2, cdz_y2), (255, 255, 0), 2)
+                        # Draw label
+                        cv2.putText(frame, "CASH DRAWER", (cdz_x1 + 5, cdz_y1 + 20),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
                 
-                # Initialize for new detection
-                frame_detections = []
-                debug_info = []
-            
-                # Run cash detection
-                if 'cash' in detection_types:
-                    cash_dets = detector.cash_detector.detect(frame)
-                    frame_detections.extend(cash_dets)
+                    # Always show frame info (if debug_overlay is enabled)
+                    timestamp = frame_count / fps if fps > 0 else 0
+                
+                    if debug_overlay:
+                        # Draw frame info background on every frame
+                        cv2.rectangle(frame, (5, 5), (450, 40), (0, 0, 0), -1)
+                        cv2.rectangle(frame, (5, 5), (450, 40), (255, 255, 255), 2)
                     
-                    # Get and store debug info
-                    debug_data = detector.cash_detector.last_detection_debug
+                        # Frame number and timestamp on every frame
+                        frame_info = f"Frame: {frame_count}/{total_frames} | Time: {timestamp:.2f}s"
+                        cv2.putText(frame, frame_info, (10, 30),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+                
+                    # Run detection only on selected frames, but draw on ALL frames
+                    should_detect = frame_count % frame_skip == 0
+                
+                    if should_detect:
+                        processed_count += 1
                     
-                    if debug_data.get('people'):
-                        last_debug_people = debug_data.get('people', [])
+                        # Initialize for new detection
+                        frame_detections = []
+                        debug_info = []
+                
+                        # Run cash detection
+                        if 'cash' in detection_types:
+                            # Results from the batched pose call for this frame
+                            cash_dets, debug_data = cash_results[frame_count]
+                            frame_detections.extend(cash_dets)
                         
-                        # Add people count to debug info
-                        debug_info.append(f"People: {debug_data.get('num_people', 0)} "
-                                        f"(Cashier: {debug_data.get('num_cashier', 0)}, "
-                                        f"Client: {debug_data.get('num_client', 0)})")
-                    else:
-                        last_debug_people = []
+                            if debug_data.get('people'):
+                                last_debug_people = debug_data.get('people', [])
+                            
+                                # Add people count to debug info
+                                debug_info.append(f"People: {debug_data.get('num_people', 0)} "
+                                                f"(Cashier: {debug_data.get('num_cashier', 0)}, "
+                                                f"Client: {debug_data.get('num_client', 0)})")
+                            else:
+                                last_debug_people = []
+                        
+                            # Store transaction events
+                            if debug_data.get('transaction_events'):
+                                last_transaction_events = debug_data.get('transaction_events', [])
+                                for event in last_transaction_events:
+                                    distance = event.get('distance', 0)
+                                    debug_info.append(f"Hand Distance: {distance:.0f}px")
+                            else:
+                                last_transaction_events = []
+                        
+                            # Store debug info for next frames
+                            last_debug_info = debug_info.copy()
                     
-                    # Store transaction events
-                    if debug_data.get('transaction_events'):
-                        last_transaction_events = debug_data.get('transaction_events', [])
-                        for event in last_transaction_events:
-                            distance = event.get('distance', 0)
-                            debug_info.append(f"Hand Distance: {distance:.0f}px")
-                    else:
-                        last_transaction_events = []
+                        # Run other detections
+                        if 'violence' in detection_types:
+                            violence_dets = detector.violence_detector.detect(frame)
+                            frame_detections.extend(violence_dets)
+                        
+                        if 'fire' in detection_types:
+                            fire_dets = detector.fire_detector.detect(frame)
+                            frame_detections.extend(fire_dets)
                     
-                    # Store debug info for next frames
-                    last_debug_info = debug_info.copy()
+                        # Store detection boxes for next frames
+                        last_frame_detections = frame_detections.copy()
+                    else:
+                        # Use previous frame's detections and debug info
+                        frame_detections = last_frame_detections.copy()
+                        debug_info = last_debug_info.copy()
                 
-                # Run other detections
-                if 'violence' in detection_types:
-                    violence_dets = detector.violence_detector.detect(frame)
-                    frame_detections.extend(violence_dets)
-                    
-                if 'fire' in detection_types:
-                    fire_dets = detector.fire_detector.detect(frame)
-                    frame_detections.extend(fire_dets)
+                    # Draw people on ALL frames (detected or skipped) - only if debug_overlay is enabled
+                    if debug_overlay and last_debug_people:
+                        for person in last_debug_people:
+                            px1, py1, px2, py2 = person['bbox']
+                            # Orange for CASHIER (in_zone=True), Blue for CLIENT (in_zone=False)
+                            person_color = (0, 165, 255) if person.get('in_zone') else (255, 100, 100)
+                            cv2.rectangle(frame, (px1, py1), (px2, py2), person_color, 3)
+                        
+                            # Person label with background
+                            person_label = person.get('role', 'PERSON')
+                            (text_width, text_height), _ = cv2.getTextSize(
+                                person_label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+                            cv2.rectangle(frame, (px1, py1 - text_height - 10),
+                                         (px1 + text_width + 10, py1), person_color, -1)
+                            cv2.putText(frame, person_label, (px1 + 5, py1 - 5),
+                                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+                        
+                            # Draw pose keypoints
+                            if person.get('keypoints'):
+                                for kp in person['keypoints']:
+                                    if len(kp) >= 3 and kp[2] > 0.5:  # confidence check
+                                        x, y = int(kp[0]), int(kp[1])
+                                        if 0 <= x < frame.shape[1] and 0 <= y < frame.shape[0]:
+                                            cv2.circle(frame, (x, y), 4, (0, 255, 255), -1)
+                                            cv2.circle(frame, (x, y), 6, (0, 0, 0), 1)
+                        
+                            # Draw hands with labels
+                            if person.get('hands'):
+                                hand_labels = ['L', 'R']
+                                for i, hand in enumerate(person['hands']):
+                                    if len(hand) >= 2:
+                                        hx, hy = int(hand[0]), int(hand[1])
+                                        # Draw hand circles
+                                        cv2.circle(frame, (hx, hy), 12, (255, 0, 255), -1)
+                                        cv2.circle(frame, (hx, hy), 15, (255, 255, 255), 2)
+                                        # Hand label
+                                        hand_label = hand_labels[i] if i < len(hand_labels) else "H"
+                                        cv2.putText(frame, hand_label, (hx - 5, hy + 5),
+                                                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
                 
-                # Store detection boxes for next frames
-                last_frame_detections = frame_detections.copy()
-            else:
-                # Use previous frame's detections and debug info
-                frame_detections = last_frame_detections.copy()
-                debug_info = last_debug_info.copy()
-            
-            # Draw people on ALL frames (detected or skipped) - only if debug_overlay is enabled
-            if debug_overlay and last_debug_people:
-                for person in last_debug_people:
-                    px1, py1, px2, py2 = person['bbox']
-                    # Orange for CASHIER (in_zone=True), Blue for CLIENT (in_zone=False)
-                    person_color = (0, 165, 255) if person.get('in_zone') else (255, 100, 100)
-                    cv2.rectangle(frame, (px1, py1), (px2, py2), person_color, 3)
-                    
-                    # Person label with background
-                    person_label = person.get('role', 'PERSON')
-                    (text_width, text_height), _ = cv2.getTextSize(
-                        person_label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
-                    cv2.rectangle(frame, (px1, py1 - text_height - 10),
-                                 (px1 + text_width + 10, py1), person_color, -1)
-                    cv2.putText(frame, person_label, (px1 + 5, py1 - 5),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-                    
-                    # Draw pose keypoints
-                    if person.get('keypoints'):
-                        for kp in person['keypoints']:
-                            if len(kp) >= 3 and kp[2] > 0.5:  # confidence check
-                                x, y = int(kp[0]), int(kp[1])
-                                if 0 <= x < frame.shape[1] and 0 <= y < frame.shape[0]:
-                                    cv2.circle(frame, (x, y), 4, (0, 255, 255), -1)
-                                    cv2.circle(frame, (x, y), 6, (0, 0, 0), 1)
-                    
-                    # Draw hands with labels
-                    if person.get('hands'):
-                        hand_labels = ['L', 'R']
-                        for i, hand in enumerate(person['hands']):
-                            if len(hand) >= 2:
-                                hx, hy = int(hand[0]), int(hand[1])
-                                # Draw hand circles
-                                cv2.circle(frame, (hx, hy), 12, (255, 0, 255), -1)
-                                cv2.circle(frame, (hx, hy), 15, (255, 255, 255), 2)
-                                # Hand label
-                                hand_label = hand_labels[i] if i < len(hand_labels) else "H"
-                                cv2.putText(frame, hand_label, (hx - 5, hy + 5),
-                                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 2)
-            
-            # Draw transaction event lines on ALL frames - only if debug_overlay is enabled
-            if debug_overlay and last_transaction_events:
-                for event in last_transaction_events:
-                    # Get person indices and hand names from event
-                    p1_idx = event.get('person1_idx')
-                    p2_idx = event.get('person2_idx')
-                    hand1_name = event.get('hand1')  # 'left' or 'right'
-                    hand2_name = event.get('hand2')  # 'left' or 'right'
-                    
-                    # Get hand coordinates from the people data
-                    h1_coords = None
-                    h2_coords = None
-                    
-                    if p1_idx is not None and p1_idx < len(last_debug_people):
-                        person1 = last_debug_people[p1_idx]
-                        if person1.get('hands'):
-                            # Hands are stored as list: [left_hand, right_hand]
-                            if hand1_name == 'left' and len(person1['hands']) > 0:
-                                h1_coords = person1['hands'][0]  # Left hand is index 0
-                            elif hand1_name == 'right' and len(person1['hands']) > 1:
-                                h1_coords = person1['hands'][1]  # Right hand is index 1
-                    
-                    if p2_idx is not None and p2_idx < len(last_debug_people):
-                        person2 = last_debug_people[p2_idx]
-                        if person2.get('hands'):
-                            # Hands are stored as list: [left_hand, right_hand]
-                            if hand2_name == 'left' and len(person2['hands']) > 0:
-                                h2_coords = person2['hands'][0]  # Left hand is index 0
-                            elif hand2_name == 'right' and len(person2['hands']) > 1:
-                                h2_coords = person2['hands'][1]  # Right hand is index 1
-                    
-                    if h1_coords and h2_coords and len(h1_coords) >= 2 and len(h2_coords) >= 2:
-                        # Draw magenta line between hands
-                        pt1 = (int(h1_coords[0]), int(h1_coords[1]))
-                        pt2 = (int(h2_coords[0]), int(h2_coords[1]))
-                        cv2.line(frame, pt1, pt2, (255, 0, 255), 4)
+                    # Draw transaction event lines on ALL frames - only if debug_overlay is enabled
+                    if debug_overlay and last_transaction_events:
+                        for event in last_transaction_events:
+                            # Get person indices and hand names from event
+                            p1_idx = event.get('person1_idx')
+                            p2_idx = event.get('person2_idx')
+                            hand1_name = event.get('hand1')  # 'left' or 'right'
+                            hand2_name = event.get('hand2')  # 'left' or 'right'
                         
-                        # Draw distance text on the line
-                        distance = event.get('distance', 0)
-                        mid_x = (pt1[0] + pt2[0]) // 2
-                        mid_y = (pt1[1] + pt2[1]) // 2
+                            # Get hand coordinates from the people data
+                            h1_coords = None
+                            h2_coords = None
                         
-                        # Draw background for text
-                        text = f"{distance:.0f}px"
-                        (text_width, text_height), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
-                        cv2.rectangle(frame, (mid_x - text_width//2 - 5, mid_y - text_height - 5),
-                                    (mid_x + text_width//2 + 5, mid_y + 5), (0, 0, 0), -1)
-                        cv2.putText(frame, text, (mid_x - text_width//2, mid_y),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 0, 255), 2)
+                            if p1_idx is not None and p1_idx < len(last_debug_people):
+                                person1 = last_debug_people[p1_idx]
+                                if person1.get('hands'):
+                                    # Hands are stored as list: [left_hand, right_hand]
+                                    if hand1_name == 'left' and len(person1['hands']) > 0:
+                                        h1_coords = person1['hands'][0]  # Left hand is index 0
+                                    elif hand1_name == 'right' and len(person1['hands']) > 1:
+                                        h1_coords = person1['hands'][1]  # Right hand is index 1
                         
-                        # Draw midpoint circle
-                        midpoint = event.get('midpoint')
-                        if midpoint and len(midpoint) >= 2:
-                            cv2.circle(frame, (int(midpoint[0]), int(midpoint[1])), 
-                                     10, (255, 255, 0), -1)
-                            cv2.circle(frame, (int(midpoint[0]), int(midpoint[1])), 
-                                     13, (0, 0, 0), 2)
-            
-            # Draw main detection boxes (always draw, including on skipped frames)
-            if should_detect:
-                last_frame_detections = frame_detections.copy()
-            else:
-                frame_detections = last_frame_detections.copy()
-            
-            for det in frame_detections:
-                # Draw bounding box
-                x1, y1, x2, y2 = det.bbox
-                color = {
-                    'CASH': (0, 255, 0),
-                    'VIOLENCE': (0, 0, 255),
-                    'FIRE': (0, 165, 255)
-                }.get(det.label, (255, 255, 255))
+                            if p2_idx is not None and p2_idx < len(last_debug_people):
+                                person2 = last_debug_people[p2_idx]
+                                if person2.get('hands'):
+                                    # Hands are stored as list: [left_hand, right_hand]
+                                    if hand2_name == 'left' and len(person2['hands']) > 0:
+                                        h2_coords = person2['hands'][0]  # Left hand is index 0
+                                    elif hand2_name == 'right' and len(person2['hands']) > 1:
+                                        h2_coords = person2['hands'][1]  # Right hand is index 1
+                        
+                            if h1_coords and h2_coords and len(h1_coords) >= 2 and len(h2_coords) >= 2:
+                                # Draw magenta line between hands
+                                pt1 = (int(h1_coords[0]), int(h1_coords[1]))
+                                pt2 = (int(h2_coords[0]), int(h2_coords[1]))
+                                cv2.line(frame, pt1, pt2, (255, 0, 255), 4)
+                            
+                                # Draw distance text on the line
+                                distance = event.get('distance', 0)
+                                mid_x = (pt1[0] + pt2[0]) // 2
+                                mid_y = (pt1[1] + pt2[1]) // 2
+                            
+                                # Draw background for text
+                                text = f"{distance:.0f}px"
+                                (text_width, text_height), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
+                                cv2.rectangle(frame, (mid_x - text_width//2 - 5, mid_y - text_height - 5),
+                                            (mid_x + text_width//2 + 5, mid_y + 5), (0, 0, 0), -1)
+                                cv2.putText(frame, text, (mid_x - text_width//2, mid_y),
+                                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 0, 255), 2)
+                            
+                                # Draw midpoint circle
+                                midpoint = event.get('midpoint')
+                                if midpoint and len(midpoint) >= 2:
+                                    cv2.circle(frame, (int(midpoint[0]), int(midpoint[1])), 
+                                             10, (255, 255, 0), -1)
+                                    cv2.circle(frame, (int(midpoint[0]), int(midpoint[1])), 
+                                             13, (0, 0, 0), 2)
                 
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
+                    # Draw main detection boxes (always draw, including on skipped frames)
+                    if should_detect:
+                        last_frame_detections = frame_detections.copy()
+                    else:
+                        frame_detections = last_frame_detections.copy()
                 
-                # Draw label with background
-                label_text = f"{det.label}: {det.confidence:.2f}"
-                (text_width, text_height), baseline = cv2.getTextSize(
-                    label_text, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
-                cv2.rectangle(frame, (x1, y1 - text_height - 10),
-                             (x1 + text_width + 10, y1), color, -1)
-                cv2.putText(frame, label_text, (x1 + 5, y1 - 5),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+                    for det in frame_detections:
+                        # Draw bounding box
+                        x1, y1, x2, y2 = det.bbox
+                        color = {
+                            'CASH': (0, 255, 0),
+                            'VIOLENCE': (0, 0, 255),
+                            'FIRE': (0, 165, 255)
+                        }.get(det.label, (255, 255, 255))
+                    
+                        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
+                    
+                        # Draw label with background
+                        label_text = f"{det.label}: {det.confidence:.2f}"
+                        (text_width, text_height), baseline = cv2.getTextSize(
+                            label_text, cv2.FONT_HERSHEY_SIMPLEX, 0.8, 2)
+                        cv2.rectangle(frame, (x1, y1 - text_height - 10),
+                                     (x1 + text_width + 10, y1), color, -1)
+                        cv2.putText(frame, label_text, (x1 + 5, y1 - 5),
+                                   cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+                    
+                        # Record detection once, on the frame that produced it (boxes held
+                        # over skipped frames are only redrawn). Compact tuple rows here,
+                        # materialized to dicts once after the loop
+                        if should_detect:
+                            detections.append((det.label, det.confidence, frame_count, det.bbox))
                 
-                # Save detection
-                timestamp = frame_count / fps if fps > 0 else 0
-                detections.append({
-                    'type': det.label.lower(),
-                    'confidence': det.confidence,
-                    'frame': frame_count,
-                    'timestamp': round(timestamp, 2),
-                    'bbox': det.bbox
-                })
-            
-            # Draw additional debug info if any (only if debug_overlay is enabled)
-            if debug_overlay and debug_info:
-                debug_y = 50
-                # Expand background for debug info
-                cv2.rectangle(frame, (5, 45), (450, 50 + len(debug_info) * 30), (0, 0, 0), -1)
-                cv2.rectangle(frame, (5, 45), (450, 50 + len(debug_info) * 30), (255, 255, 255), 2)
+                    # Draw additional debug info if any (only if debug_overlay is enabled)
+                    if debug_overlay and debug_info:
+                        debug_y = 50
+                        # Expand background for debug info
+                        cv2.rectangle(frame, (5, 45), (450, 50 + len(debug_info) * 30), (0, 0, 0), -1)
+                        cv2.rectangle(frame, (5, 45), (450, 50 + len(debug_info) * 30), (255, 255, 255), 2)
+                    
+                        for info in debug_info:
+                            cv2.putText(frame, info, (10, debug_y),
+                                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+                            debug_y += 30
                 
-                for info in debug_info:
-                    cv2.putText(frame, info, (10, debug_y),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-                    debug_y += 30
-            
-            out.write(frame)
-        
-        cap.release()
-        out.release()
+                    out.write(frame)
+        finally:
+            producer.stop()
+            cap.release()
+            out.release()
         
         # Convert to H.264 MP4 for browser compatibility
         import subprocess
@@ -3837,6 +3903,7 @@ def api_test_process(request):
         
         ffmpeg_cmd = [
             'ffmpeg',
+            '-hide_banner', '-loglevel', 'error',  # stderr only carries the errors
             '-i', str(temp_path),
             '-c:v', 'libx264',
             '-preset', 'fast',
@@ -3848,16 +3915,24 @@ def api_test_process(request):
             str(output_path)
         ]
         
+        # Check the return code rather than check=True - a failed encode is an
+        # expected outcome here, not worth raising (and building a traceback) for
         try:
             with _ffmpeg_lock:
-                subprocess.run(ffmpeg_cmd, check=True, capture_output=True)
-            
+                result = subprocess.run(ffmpeg_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            return_code = result.returncode
+        except FileNotFoundError:
+            print("[Test] FFmpeg not found")
+            return_code = None
+        
+        if return_code == 0:
             # Delete temp file
             if temp_path.exists():
                 os.remove(temp_path)
-                
-        except subprocess.CalledProcessError as e:
+        else:
             # If FFmpeg fails, use the temp file as output
+            if return_code is not None:
+                print(f"[Test] FFmpeg error: {result.stderr.decode(errors='ignore')[:300]}")
             import shutil
             shutil.move(str(temp_path), str(output_path))
         
@@ -3871,7 +3946,13 @@ def api_test_process(request):
                 'total_frames': total_frames,
                 'frames_processed': processed_count,
                 'processing_time': processing_time,
-                'detections': detections,
+                'detections': [{
+                    'type': label.lower(),
+                    'confidence': confidence,
+                    'frame': det_frame,
+                    'timestamp': round(det_frame / fps, 2) if fps > 0 else 0,
+                    'bbox': bbox
+                } for label, confidence, det_frame, bbox in detections],
                 'debug_overlay': debug_overlay
             }
         })
@@ -8,9 +8,13 @@ import django
 import cv2
 import time
 import json
+import queue
+import threading
 from pathlib import Path
 from datetime import datetime
-from multiprocessing import Process, Manager
+from multiprocessing import Array, Event, Lock, Process, Queue, Value, shared_memory
+
+import numpy as np
 
 # Setup Django environment
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hotel_cctv.settings')
@@ -18,6 +22,7 @@ django.setup()
 
 from django.conf import settings
 from cctv.models import Camera, Event
+from cctv.utils import format_uptime
 
 # Import detectors
 try:
@@ -35,15 +40,175 @@ except ImportError as e:
     GEMINI_AVAILABLE = False
     print(f"Warning: Gemini validator not available - {e}")
 
-# Global manager for all workers (create once, reuse)
-_manager = None
+# Largest live frame the shared preview buffer can hold (4K BGR). The pages
+# of /dev/shm are only committed as they are written, so smaller streams
+# don't pay for the full size.
+MAX_FRAME_BYTES = 3840 * 2160 * 3
+
+
+class WorkerSharedState:
+    """Fixed-layout worker status in shared memory (multiprocessing.Value/Array).
+    
+    Reads and writes are plain memory accesses guarded by a lock - no Manager
+    server process or pickling. Supports the dict-style access the worker loop
+    uses (state['status'], state.get(...), state.update(...)).
+    """
+    TEXT_SIZES = {'status': 32, 'error': 200}
+    
+    def __init__(self):
+        self._values = {
+            'running': Value('b', 0),
+            'frames_processed': Value('q', 0),
+            'events_detected': Value('i', 0),
+            'start_timestamp': Value('d', 0.0),
+            'last_heartbeat': Value('d', 0.0),
+        }
+        self._texts = {name: Array('c', size) for name, size in self.TEXT_SIZES.items()}
+        self['status'] = 'stopped'
+    
+    def __getitem__(self, key):
+        if key in self._texts:
+            return self._texts[key].value.decode('utf-8', errors='ignore')
+        value = self._values[key].value
+        return bool(value) if key == 'running' else value
+    
+    def __setitem__(self, key, value):
+        if key in self._texts:
+            size = self.TEXT_SIZES[key]
+            self._texts[key].value = (value or '').encode('utf-8')[:size - 1]
+        else:
+            self._values[key].value = value
+    
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def update(self, **fields):
+        for key, value in fields.items():
+            self[key] = value
+    
+    def snapshot(self):
+        return {key: self[key] for key in (*self._values, *self._texts)}
 
-def get_manager():
-    """Get or create the global Manager instance"""
-    global _manager
-    if _manager is None:
-        _manager = Manager()
-    return _manager
+
+class SharedFrame:
+    """Latest live frame shared through a SharedMemory block (no pickling)"""
+    
+    def __init__(self, capacity=MAX_FRAME_BYTES):
+        self.shm = shared_memory.SharedMemory(create=True, size=capacity)
+        self.shape = Array('i', 3, lock=False)
+        self.seq = Value('q', 0, lock=False)  # bumped on every write
+        self.lock = Lock()
+    
+    def write(self, frame):
+        if frame.nbytes > self.shm.size:
+            return False
+        with self.lock:
+            np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf)[...] = frame
+            self.shape[:] = frame.shape
+            self.seq.value += 1
+        return True
+    
+    def read(self):
+        """Copy of the latest frame, or None if nothing was written yet"""
+        with self.lock:
+            if self.seq.value == 0:
+                return None
+            shape = tuple(self.shape)
+            return np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf).copy()
+    
+    def close(self, unlink=False):
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+class FrameRing:
+    """Preallocated circular buffer of equally sized BGR frames for clips.
+    
+    append() copies into the next slot instead of allocating a new array and
+    shifting a list; latest(n) hands out a lazy view for the clip writer.
+    """
+    
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.buffer = None  # allocated on the first frame
+        self.written = 0  # total frames appended to the current buffer
+    
+    def __len__(self):
+        return min(self.written, self.capacity)
+    
+    def append(self, frame):
+        if self.buffer is None or self.buffer.shape[1:] != frame.shape:
+            # First frame, or the stream resolution changed after a reconnect.
+            # Views handed out earlier keep the old buffer alive.
+            self.buffer = np.empty((self.capacity, *frame.shape), dtype=np.uint8)
+            self.written = 0
+        np.copyto(self.buffer[self.written % self.capacity], frame)
+        self.written += 1
+    
+    def latest(self, n):
+        """Lazy view of the newest n frames (no copies)"""
+        n = min(n, len(self))
+        return FrameRingView(self, self.written - n, n)
+
+
+class FrameRingView:
+    """Sequence over a range of a FrameRing; overwritten slots read as None.
+    
+    The reader thread keeps appending while a clip is encoded, so slots can be
+    reused mid-encode. Iterate the view (rather than indexing it) to get
+    copies that are checked against the writer after the copy is taken.
+    """
+    
+    def __init__(self, ring, start, length):
+        self.ring = ring
+        self.buffer = ring.buffer
+        self.start = start
+        self.length = length
+    
+    def __len__(self):
+        return self.length
+    
+    def _overwritten(self, index):
+        """True once the ring may have started reusing frame index's slot"""
+        # append() copies into the slot while `written` already equals
+        # index + capacity, so that value counts as overwritten too. A
+        # replaced buffer (resolution change) is never written again
+        return self.ring.buffer is self.buffer and self.ring.written - index >= self.ring.capacity
+    
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.length
+        if not 0 <= i < self.length:
+            raise IndexError(i)
+        index = self.start + i
+        if self._overwritten(index):
+            return None
+        return self.buffer[index % self.ring.capacity]
+    
+    def __iter__(self):
+        """Yield intact frames, skipping overwritten ones.
+        
+        Each frame is copied into one reused scratch array and re-checked
+        after the copy, so a slot the reader thread reached during the copy
+        is dropped instead of mixing a newer frame into the clip. The yielded
+        array is only valid until the next iteration.
+        """
+        scratch = None
+        for i in range(self.length):
+            index = self.start + i
+            if self._overwritten(index):
+                continue
+            slot = self.buffer[index % self.ring.capacity]
+            if scratch is None:
+                scratch = np.empty_like(slot)
+            np.copyto(scratch, slot)
+            if self._overwritten(index):
+                continue
+            yield scratch
 
 
 class CameraWorkerProcess:
@@ -53,32 +218,22 @@ class CameraWorkerProcess:
         self.camera_id = camera_id
         self.process = None
         
-        # Use global Manager for cross-platform shared state
-        manager = get_manager()
-        
-        # Shared state dictionary (works on Windows + Linux)
-        self.shared_state = manager.dict({
-            'running': False,
-            'frames_processed': 0,
-            'events_detected': 0,
-            'start_timestamp': 0.0,
-            'status': 'stopped',
-            'error': '',
-        })
+        # Shared status counters/flags and the live-view frame
+        self.shared_state = WorkerSharedState()
+        self.shared_frame = SharedFrame()
         
-        # Queues for communication
-        self.command_queue = manager.Queue(maxsize=10)
-        self.frame_queue = manager.Queue(maxsize=2)  # Small queue for live frames
+        # Commands from the web process (rare - a plain pipe-backed queue)
+        self.command_queue = Queue(maxsize=10)
         
-        # Stop event
-        self.stop_flag = manager.Value('i', 0)  # 0=run, 1=stop
+        # Stop event - is_set() is a local semaphore check, no IPC round trip
+        self.stop_event = Event()
     
     def start(self):
         """Start worker process"""
         if self.process and self.process.is_alive():
             return False
         
-        self.stop_flag.value = 0
+        self.stop_event.clear()
         self.shared_state['running'] = True
         
         self.process = Process(
@@ -87,8 +242,8 @@ class CameraWorkerProcess:
                 self.camera_id,
                 self.shared_state,
                 self.command_queue,
-                self.frame_queue,
-                self.stop_flag,
+                self.shared_frame,
+                self.stop_event,
             ),
             daemon=True
         )
@@ -101,7 +256,7 @@ class CameraWorkerProcess:
             return True
         
         # Signal stop
-        self.stop_flag.value = 1
+        self.stop_event.set()
         self.shared_state['running'] = False
         
         # Wait for graceful shutdown
@@ -119,21 +274,19 @@ class CameraWorkerProcess:
     
     def get_status(self):
         """Get worker status"""
-        state = dict(self.shared_state)
+        state = self.shared_state.snapshot()
         
         uptime = None
         if state.get('start_timestamp', 0) > 0:
-            elapsed = time.time() - state['start_timestamp']
-            hours, remainder = divmod(int(elapsed), 3600)
-            minutes, seconds = divmod(remainder, 60)
-            uptime = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+            uptime = format_uptime(time.time() - state['start_timestamp'])
         
         return {
             'running': state.get('running', False),
             'status': state.get('status', 'unknown'),
-            'error': state.get('error', None),
+            'error': state.get('error') or None,
             'frames_processed': state.get('frames_processed', 0),
             'events_detected': state.get('events_detected', 0),
+            'last_heartbeat': state.get('last_heartbeat', 0.0),
             'uptime': uptime or 'Not running',
             'alive': self.process.is_alive() if self.process else False,
         }
@@ -141,34 +294,98 @@ class CameraWorkerProcess:
     def get_current_frame(self):
         """Get latest frame from worker (non-blocking)"""
         try:
-            if not self.frame_queue.empty():
-                return self.frame_queue.get_nowait()
-        except:
-            pass
-        return None
+            return self.shared_frame.read()
+        except Exception:
+            return None
     
     def is_alive(self):
         """Check if worker process is alive"""
         return self.process and self.process.is_alive()
+    
+    def close(self):
+        """Stop the worker and free its shared memory block"""
+        self.stop()
+        self.shared_frame.close(unlink=True)
 
 
-def _worker_main(camera_id, shared_state, command_queue, frame_queue, stop_flag):
-    """Main worker function running in separate process
-    
-    This runs with CPU affinity set to dedicated core(s) for isolation.
+def _parse_cpu_list(text):
+    """Parse a sysfs CPU list like '0-3,8-11' into a list of ints"""
+    cpus = []
+    for part in text.strip().split(','):
+        if '-' in part:
+            start, end = part.split('-')
+            cpus.extend(range(int(start), int(end) + 1))
+        elif part:
+            cpus.append(int(part))
+    return cpus
+
+
+def _physical_cores():
+    """
+    Group the logical CPUs this process may use into physical cores.
+
+    Returns a list of sibling lists (e.g. [[0, 8], [1, 9], ...]) ordered by
+    NUMA node, so consecutive cameras fill one socket before the next.
+    Linux only - returns [] if sysfs topology is unavailable.
     """
-    # Set CPU affinity for this process (Linux only)
+    allowed = os.sched_getaffinity(0)
+    cpu_root = Path('/sys/devices/system/cpu')
+    
+    node_of = {}
+    for node_dir in Path('/sys/devices/system/node').glob('node[0-9]*'):
+        node = int(node_dir.name[4:])
+        for cpu in _parse_cpu_list((node_dir / 'cpulist').read_text()):
+            node_of[cpu] = node
+    
+    cores = {}
+    for cpu in sorted(allowed):
+        siblings_file = cpu_root / f'cpu{cpu}' / 'topology' / 'thread_siblings_list'
+        if not siblings_file.exists():
+            continue
+        siblings = tuple(c for c in _parse_cpu_list(siblings_file.read_text()) if c in allowed)
+        cores[siblings] = node_of.get(siblings[0], 0)
+    return [list(c) for c, _ in sorted(cores.items(), key=lambda item: (item[1], item[0]))]
+
+
+def _pin_worker(camera_id):
+    """Pin this worker to one physical core (all its SMT siblings)"""
     try:
-        import psutil
-        p = psutil.Process()
-        cpu_count = psutil.cpu_count()
-        # Assign to specific CPU core (round-robin based on camera_id)
-        core_id = camera_id % cpu_count
-        p.cpu_affinity([core_id])
-        print(f"[Worker-{camera_id}] Assigned to CPU core {core_id}")
+        cores = _physical_cores() if hasattr(os, 'sched_setaffinity') else []
+        if cores:
+            # Both hyperthreads of one core share L1/L2, and keeping the core
+            # on one NUMA node means first-touch allocations (frame ring,
+            # model weights) land in that node's local memory
+            siblings = cores[camera_id % len(cores)]
+            os.sched_setaffinity(0, siblings)
+            print(f"[Worker-{camera_id}] Assigned to physical core, CPUs {siblings}")
+        else:
+            import psutil
+            p = psutil.Process()
+            cpu_count = psutil.cpu_count()
+            # Assign to specific CPU core (round-robin based on camera_id)
+            core_id = camera_id % cpu_count
+            p.cpu_affinity([core_id])
+            print(f"[Worker-{camera_id}] Assigned to CPU core {core_id}")
     except Exception as e:
         print(f"[Worker-{camera_id}] Could not set CPU affinity: {e}")
     
+    # SCHED_BATCH: throughput-oriented, the scheduler stops treating the
+    # detection threads as interactive and preempts/migrates them less
+    if hasattr(os, 'SCHED_BATCH'):
+        try:
+            os.sched_setscheduler(0, os.SCHED_BATCH, os.sched_param(0))
+        except OSError as e:
+            print(f"[Worker-{camera_id}] Could not set SCHED_BATCH: {e}")
+
+
+def _worker_main(camera_id, shared_state, command_queue, shared_frame, stop_event):
+    """Main worker function running in separate process
+    
+    This runs with CPU affinity set to a dedicated physical core for isolation.
+    """
+    # Set CPU affinity before anything large is allocated
+    _pin_worker(camera_id)
+    
     # Close Django DB connection (will create new one in this process)
     from django.db import connection
     connection.close()
@@ -180,7 +397,7 @@ def _worker_main(camera_id, shared_state, command_queue, frame_queue, stop_flag)
     
     try:
         _run_worker_loop(
-            camera_id, shared_state, command_queue, frame_queue, stop_flag
+            camera_id, shared_state, command_queue, shared_frame, stop_event
         )
     except Exception as e:
         error_msg = f"Worker crashed: {str(e)}"
@@ -195,7 +412,7 @@ def _worker_main(camera_id, shared_state, command_queue, frame_queue, stop_flag)
         print(f"[Worker-{camera_id}] Process terminated")
 
 
-def _run_worker_loop(camera_id, shared_state, command_queue, frame_queue, stop_flag):
+def _run_worker_loop(camera_id, shared_state, command_queue, shared_frame, stop_event):
     """Main detection loop for worker process"""
     
     # Get camera from database
@@ -222,6 +439,10 @@ def _run_worker_loop(camera_id, shared_state, command_queue, frame_queue, stop_f
         'violence_pose_model': settings.DETECTION_CONFIG.get('VIOLENCE_POSE_MODEL', 'yolov8n-pose.pt'),
         'fire_yolo_model': settings.DETECTION_CONFIG.get('FIRE_YOLO_MODEL', 'yolov8n.pt'),
         'fire_model': settings.DETECTION_CONFIG.get('FIRE_MODEL', 'fire_smoke_yolov8.pt'),
+        'detection_resolution': settings.DETECTION_CONFIG.get('DETECTION_RESOLUTION', 640),
+        'pose_imgsz': settings.DETECTION_CONFIG.get('POSE_IMGSZ', 640),
+        'batch_size': settings.DETECTION_CONFIG.get('INFERENCE_BATCH_SIZE', 16),
+        'motion_gate_ratio': settings.DETECTION_CONFIG.get('MOTION_GATE_RATIO', 0),
         'cashier_zone': [zone['x'], zone['y'], zone['width'], zone['height']],
         'use_polygon_zones': True,  # POLYGON-ONLY MODE
         'cashier_zone_polygon': camera.get_cashier_zone_polygon_points(),
@@ -256,202 +477,320 @@ def _run_worker_loop(camera_id, shared_state, command_queue, frame_queue, stop_f
                 break
         
         print(f"[Worker-{camera_id}] Connection attempt {attempt + 1}/{max_retries}")
-        time.sleep(5)
+        if stop_event.wait(5):  # sleeps, but wakes immediately on stop
+            break
         cap.release()
         cap = _create_rtsp_capture(camera.rtsp_url)
     
     if not cap.isOpened():
         shared_state['error'] = 'Cannot connect to stream'
         shared_state['status'] = 'error'
-        camera.status = 'offline'
-        camera.save()
+        # Plain UPDATE - no model save() round trip on status transitions
+        Camera.objects.filter(pk=camera_id).update(status='offline')
         return
     
     # Update camera status
-    camera.status = 'online'
-    camera.save()
+    Camera.objects.filter(pk=camera_id).update(status='online')
     shared_state['status'] = 'running'
     
-    # Frame buffer for clips
-    frame_buffer = []
+    # Frame buffer for clips (preallocated ring, filled on the first frame)
     buffer_size = 450  # 30 seconds at 15fps
+    frame_buffer = FrameRing(buffer_size)
     
-    # Event cooldown tracking
+    # Event cooldown tracking (shared with the writer thread)
     last_event_time = {}
     event_cooldown = 15  # seconds
+    cooldown_lock = threading.Lock()
+    
+    # Three-stage pipeline so a slow stage never stalls the others:
+    #   reader thread  - grab/decode/reconnect, clip ring -> read_q
+    #   this thread    - detection + cooldown   -> write_q
+    #   writer thread  - Gemini validation, clip encode, DB insert
+    read_q = queue.Queue(maxsize=4)
+    write_q = queue.Queue(maxsize=8)
+    pipeline_stop = threading.Event()
+    
+    def should_run():
+        return not pipeline_stop.is_set() and shared_state['running'] and not stop_event.is_set()
+    
+    def reader():
+        try:
+            read_frames()
+        finally:
+            # The reader owns the capture (it swaps in a new one on reconnect),
+            # so it releases it itself - the main thread may stop waiting for
+            # it while a grab() or reconnect is still blocked
+            cap.release()
+    
+    def read_frames():
+        nonlocal cap
+        frame_count = 0
+        consecutive_failures = 0
+        max_failures = 20
+        last_success_time = time.time()
+        
+        # Heartbeat: publish the frame counter periodically instead of on every
+        # frame (readers only poll status every few seconds)
+        heartbeat_interval = 1.0  # seconds
+        last_heartbeat = 0.0
+        
+        while should_run():
+            # Grab (demux only) every frame, but only decode the frames we use:
+            # every 2nd goes to the clip buffer, every 4th also to preview/detection
+            ret = cap.grab()
+            
+            if not ret:
+                consecutive_failures += 1
+                time_since_success = time.time() - last_success_time
+                
+                if consecutive_failures >= max_failures or time_since_success > 30:
+                    shared_state['status'] = 'reconnecting'
+                    print(f"[Worker-{camera_id}] Stream lost, reconnecting...")
+                    cap.release()
+                    if stop_event.wait(3):
+                        break
+                    cap = _create_rtsp_capture(camera.rtsp_url)
+                    if cap.isOpened():
+                        ret, test_frame = cap.read()
+                        if ret and test_frame is not None:
+                            shared_state['status'] = 'running'
+                            consecutive_failures = 0
+                            last_success_time = time.time()
+                continue
+            
+            # Successful frame grab
+            consecutive_failures = 0
+            last_success_time = time.time()
+            frame_count += 1
+            
+            if last_success_time - last_heartbeat >= heartbeat_interval:
+                shared_state.update(frames_processed=frame_count, last_heartbeat=last_success_time)
+                last_heartbeat = last_success_time
+            
+            if frame_count % 2 != 0:
+                continue  # skipped frame - never decoded
+            
+            ret, frame = cap.retrieve()
+            if not ret or frame is None:
+                continue
+            
+            # Every decoded frame goes to the clip ring here, so clips stay
+            # complete even when detection falls behind
+            frame_buffer.append(frame)
+            
+            if frame_count % 4 != 0:
+                continue
+            
+            # If detection falls behind, drop the oldest frame to keep latency
+            # bounded - that only thins out detection, never the clip
+            _put_latest(read_q, (frame_count, frame))
+        
+        shared_state['frames_processed'] = frame_count  # Final count
+    
+    # Gemini validator - built once per worker. Custom prompts are re-applied
+    # only when the camera's prompt fields change (reload_settings).
+    validator = None
+    prompt_signature = None
+    if GEMINI_AVAILABLE and settings.DETECTION_CONFIG.get('GEMINI_VALIDATION_ENABLED', True):
+        gemini_api_key = getattr(settings, 'GEMINI_API_KEY', '')
+        if gemini_api_key:
+            # camera_id for logging
+            validator = GeminiValidator(api_key=gemini_api_key, camera_id=camera.id)
+    
+    def apply_prompts(signature):
+        """signature = (cash_prompt, violence_prompt, fire_prompt)"""
+        nonlocal prompt_signature
+        if validator is None or signature == prompt_signature:
+            return
+        validator.set_custom_prompts({
+            event_type: prompt for event_type, prompt in zip(('cash', 'violence', 'fire'), signature) if prompt
+        })
+        prompt_signature = signature
     
-    frame_count = 0
-    consecutive_failures = 0
-    max_failures = 20
-    last_success_time = time.time()
+    apply_prompts((camera.gemini_cash_prompt, camera.gemini_violence_prompt, camera.gemini_fire_prompt))
+    
+    def writer():
+        from django.db import connection
+        while True:
+            job = write_q.get()
+            if job is None:
+                break
+            event_type = job['event_type']
+            
+            # Gemini AI Validation - verify detection before saving. Runs here so
+            # the API round trip never holds up frame reading or detection.
+            gemini_validated = True
+            gemini_confidence = 1.0
+            gemini_reason = "Validation skipped"
+            
+            if validator is not None:
+                try:
+                    gemini_validated, gemini_confidence, gemini_reason = validator.validate_event(job['frame'], event_type)
+                    print(f"[Worker-{camera_id}] Gemini validation: {event_type} = {gemini_validated} ({gemini_reason})")
+                    
+                    if not gemini_validated:
+                        print(f"[Worker-{camera_id}] Event rejected by Gemini: {event_type} - {gemini_reason}")
+                        # Release the cooldown taken when the event was queued
+                        with cooldown_lock:
+                            if last_event_time.get(event_type) == job['trigger_time']:
+                                del last_event_time[event_type]
+                        continue  # Skip saving this event
+                except Exception as e:
+                    print(f"[Worker-{camera_id}] Gemini validation error: {e}")
+                    # On error, allow the event (don't block on validation errors)
+            
+            try:
+                clip_path, thumb_path = _save_clip(job['frames'], camera, event_type)
+                if clip_path:
+                    _save_event(camera, job['event_type'], job['confidence'], job['frame_number'], job['bbox'],
+                                clip_path, thumb_path, gemini_validated=gemini_validated,
+                                gemini_confidence=gemini_confidence, gemini_reason=gemini_reason)
+                    shared_state['events_detected'] += 1
+                    print(f"[Worker-{camera_id}] Event saved: {event_type} (Gemini: {gemini_reason})")
+            except Exception as e:
+                print(f"[Worker-{camera_id}] Clip/event save error: {e}")
+                # Keep the long-lived connection, but drop it if the error broke it
+                connection.close_if_unusable_or_obsolete()
+        connection.close()  # this thread's DB connection
+    
+    reader_thread = threading.Thread(target=reader, name=f'worker-{camera_id}-read', daemon=True)
+    writer_thread = threading.Thread(target=writer, name=f'worker-{camera_id}-write', daemon=True)
+    reader_thread.start()
+    writer_thread.start()
     
     print(f"[Worker-{camera_id}] Starting detection loop")
     
-    while shared_state['running'] and stop_flag.value == 0:
+    while should_run():
         # Check for commands
         try:
-            if not command_queue.empty():
-                cmd = command_queue.get_nowait()
-                if cmd == 'stop':
-                    break
-                elif cmd == 'reload_settings':
-                    # Reload camera settings
-                    camera = Camera.objects.get(id=camera_id)
-                    detector.detect_cash = camera.detect_cash
-                    detector.detect_violence = camera.detect_violence
-                    detector.detect_fire = camera.detect_fire
+            # One non-blocking poll (empty() + get_nowait() was two)
+            cmd = command_queue.get_nowait()
+            if cmd == 'stop':
+                break
+            elif cmd == 'reload_settings':
+                # Reload only the fields that can change at runtime
+                # instead of re-fetching the whole camera row
+                fresh = Camera.objects.filter(pk=camera_id).values(
+                    'detect_cash', 'detect_violence', 'detect_fire',
+                    'gemini_cash_prompt', 'gemini_violence_prompt', 'gemini_fire_prompt',
+                ).first()
+                if fresh:
+                    detector.detect_cash = fresh['detect_cash']
+                    detector.detect_violence = fresh['detect_violence']
+                    detector.detect_fire = fresh['detect_fire']
+                    apply_prompts((fresh['gemini_cash_prompt'], fresh['gemini_violence_prompt'], fresh['gemini_fire_prompt']))
+        except queue.Empty:
+            pass
         except:
             pass
         
-        # Read frame
-        ret, frame = cap.read()
-        
-        if not ret or frame is None:
-            consecutive_failures += 1
-            time_since_success = time.time() - last_success_time
-            
-            if consecutive_failures >= max_failures or time_since_success > 30:
-                shared_state['status'] = 'reconnecting'
-                print(f"[Worker-{camera_id}] Stream lost, reconnecting...")
-                cap.release()
-                time.sleep(3)
-                cap = _create_rtsp_capture(camera.rtsp_url)
-                if cap.isOpened():
-                    ret, test_frame = cap.read()
-                    if ret and test_frame is not None:
-                        shared_state['status'] = 'running'
-                        consecutive_failures = 0
-                        last_success_time = time.time()
+        try:
+            frame_count, frame = read_q.get(timeout=1.0)
+        except queue.Empty:
             continue
         
-        # Successful frame read
-        consecutive_failures = 0
-        last_success_time = time.time()
-        frame_count += 1
-        shared_state['frames_processed'] = frame_count
-        
-        # Buffer every 2nd frame for clips
-        if frame_count % 2 == 0:
-            frame_buffer.append(frame.copy())
-            if len(frame_buffer) > buffer_size:
-                frame_buffer.pop(0)
-        
-        # Send frame for live viewing (every 4th frame to reduce queue pressure)
-        if frame_count % 4 == 0:
-            try:
-                if frame_queue.full():
-                    frame_queue.get_nowait()  # Remove old frame
-                frame_queue.put_nowait(frame.copy())
-            except:
-                pass
+        # Publish frame for live viewing (every 4th frame)
+        shared_frame.write(frame)
         
-        # Process detection (every 4th frame)
-        if frame_count % 4 == 0:
-            try:
-                result = detector.process_frame(frame.copy(), draw_overlay=False)
-                
-                # Handle detections
-                if result.get('detections'):
-                    for det in result['detections']:
-                        det_label = det.get('label', '').lower()
-                        confidence = det.get('confidence', 0)
-                        bbox = det.get('bbox')
-                        
-                        if 'cash' in det_label:
-                            event_type = 'cash'
-                        elif 'violence' in det_label:
-                            event_type = 'violence'
-                        elif 'fire' in det_label:
-                            event_type = 'fire'
-                        else:
-                            continue
-                        
-                        # Check cooldown
-                        now = datetime.now()
+        # Process detection (every 4th frame). Without overlays the detectors
+        # only read the frame, so it is shared as-is; read-only makes any
+        # stray in-place write fail loudly instead of corrupting the clip
+        try:
+            frame.setflags(write=False)
+            result = detector.process_frame(frame, draw_overlay=False)
+            
+            # Handle detections
+            if result.get('detections'):
+                for det in result['detections']:
+                    det_label = det.get('label', '').lower()
+                    confidence = det.get('confidence', 0)
+                    bbox = det.get('bbox')
+                    
+                    if 'cash' in det_label:
+                        event_type = 'cash'
+                    elif 'violence' in det_label:
+                        event_type = 'violence'
+                    elif 'fire' in det_label:
+                        event_type = 'fire'
+                    else:
+                        continue
+                    
+                    # Check cooldown (taken now, released by the writer if Gemini rejects)
+                    now = datetime.now()
+                    with cooldown_lock:
                         last_time = last_event_time.get(event_type)
                         if last_time and (now - last_time).total_seconds() < event_cooldown:
                             continue
-                        
-                        # Gemini AI Validation - verify detection before saving
-                        gemini_validated = True
-                        gemini_confidence = 1.0
-                        gemini_reason = "Validation skipped"
-                        
-                        if GEMINI_AVAILABLE and settings.DETECTION_CONFIG.get('GEMINI_VALIDATION_ENABLED', True):
-                            try:
-                                gemini_api_key = getattr(settings, 'GEMINI_API_KEY', '')
-                                if gemini_api_key:
-                                    # Create validator with camera_id for logging
-                                    validator = GeminiValidator(api_key=gemini_api_key, camera_id=camera.id)
-                                    
-                                    # Set custom prompts if defined for this camera
-                                    custom_prompts = {}
-                                    if camera.gemini_cash_prompt:
-                                        custom_prompts['cash'] = camera.gemini_cash_prompt
-                                    if camera.gemini_violence_prompt:
-                                        custom_prompts['violence'] = camera.gemini_violence_prompt
-                                    if camera.gemini_fire_prompt:
-                                        custom_prompts['fire'] = camera.gemini_fire_prompt
-                                    if custom_prompts:
-                                        validator.set_custom_prompts(custom_prompts)
-                                    
-                                    gemini_validated, gemini_confidence, gemini_reason = validator.validate_event(frame, event_type)
-                                    print(f"[Worker-{camera_id}] Gemini validation: {event_type} = {gemini_validated} ({gemini_reason})")
-                                    
-                                    if not gemini_validated:
-                                        print(f"[Worker-{camera_id}] Event rejected by Gemini: {event_type} - {gemini_reason}")
-                                        continue  # Skip saving this event
-                            except Exception as e:
-                                print(f"[Worker-{camera_id}] Gemini validation error: {e}")
-                                # On error, allow the event (don't block on validation errors)
-                        
-                        # Save event with clip (only if Gemini validated)
-                        clip_path, thumb_path = _save_clip(
-                            frame_buffer[-150:] if len(frame_buffer) >= 150 else frame_buffer,
-                            camera, event_type
-                        )
-                        
-                        if clip_path:
-                            _save_event(camera, event_type, confidence, frame_count, bbox, clip_path, thumb_path, 
-                                       gemini_validated=gemini_validated, gemini_confidence=gemini_confidence, gemini_reason=gemini_reason)
-                            shared_state['events_detected'] = shared_state.get('events_detected', 0) + 1
-                            last_event_time[event_type] = now
-                            print(f"[Worker-{camera_id}] Event saved: {event_type} (Gemini: {gemini_reason})")
-                        
-            except Exception as e:
-                error_msg = f"Detection error: {str(e)}"
-                shared_state['error'] = error_msg[:199]
-                print(f"[Worker-{camera_id}] {error_msg}")
-    
-    # Cleanup
-    cap.release()
-    camera.status = 'offline'
-    camera.save()
+                        last_event_time[event_type] = now
+                    
+                    # Hand Gemini validation + clip encode + DB insert to the writer thread
+                    try:
+                        write_q.put_nowait({
+                            'frame': frame,
+                            # Read lazily by the writer; slots reused before the
+                            # encode reaches them are dropped (FrameRingView)
+                            'frames': frame_buffer.latest(150),
+                            'event_type': event_type,
+                            'confidence': confidence,
+                            'frame_number': frame_count,
+                            'bbox': bbox,
+                            'trigger_time': now,
+                        })
+                    except queue.Full:
+                        print(f"[Worker-{camera_id}] Clip writer backlog full, dropping {event_type} event")
+                        with cooldown_lock:
+                            del last_event_time[event_type]
+                    
+        except Exception as e:
+            error_msg = f"Detection error: {str(e)}"
+            shared_state['error'] = error_msg[:199]
+            print(f"[Worker-{camera_id}] {error_msg}")
+    
+    # Cleanup - stop reading, then let the writer finish queued clips
+    pipeline_stop.set()
+    reader_thread.join(timeout=20)  # grab() can block up to the 15s read timeout (the reader releases cap)
+    write_q.put(None)
+    writer_thread.join(timeout=300)
+    Camera.objects.filter(pk=camera_id).update(status='offline')
     print(f"[Worker-{camera_id}] Loop ended")
 
 
+def _put_latest(q, item):
+    """Put into a bounded queue, discarding the oldest item when it is full"""
+    while True:
+        try:
+            q.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                pass
+
 def _create_rtsp_capture(rtsp_url):
-    """Create RTSP capture with optimized settings"""
-    os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = 'rtsp_transport;tcp|stimeout;60000000|max_delay;1000000|fflags;nobuffer+discardcorrupt'
+    """Create RTSP capture with optimized settings (low latency: newest frame only)"""
+    os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = (
+        'rtsp_transport;tcp|stimeout;60000000|max_delay;1000000'
+        '|fflags;nobuffer+discardcorrupt+flush_packets|flags;low_delay'
+        '|probesize;32|analyzeduration;0|reorder_queue_size;0'
+    )
     
     cap = cv2.VideoCapture(rtsp_url, cv2.CAP_FFMPEG)
     cap.set(cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, 30000)
     cap.set(cv2.CAP_PROP_READ_TIMEOUT_MSEC, 15000)
-    cap.set(cv2.CAP_PROP_BUFFERSIZE, 5)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
     
     return cap
 
 
 def _save_clip(frames, camera, event_type):
-    """Save video clip"""
+    """Save video clip (frames piped straight to H.264, NVENC when available)"""
     if not frames or len(frames) == 0:
         return None, None
     
-    import subprocess
-    import uuid
+    from cctv.video_encoding import blit_label, encode_frames_h264, render_label
     
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    unique_id = uuid.uuid4().hex[:6]
     
     clip_dir = Path(settings.MEDIA_ROOT) / 'clips'
     clip_dir.mkdir(parents=True, exist_ok=True)
@@ -459,56 +798,36 @@ def _save_clip(frames, camera, event_type):
     thumb_dir = Path(settings.MEDIA_ROOT) / 'thumbnails'
     thumb_dir.mkdir(parents=True, exist_ok=True)
     
-    temp_filename = f"{camera.camera_id}_{event_type}_{timestamp}_{unique_id}_temp.avi"
     final_filename = f"{camera.camera_id}_{event_type}_{timestamp}.mp4"
-    
-    temp_path = clip_dir / temp_filename
     final_path = clip_dir / final_filename
     
-    height, width = frames[0].shape[:2]
-    fourcc = cv2.VideoWriter_fourcc(*'MJPG')
-    out = cv2.VideoWriter(str(temp_path), fourcc, 15, (width, height))
-    
-    if not out.isOpened():
+    # Copy now - the reader thread keeps filling the ring during the encode and
+    # the view reads a slot as None once it has been reused
+    last_frame = frames[-1]
+    if last_frame is None:
         return None, None
+    last_frame = last_frame.copy()
     
-    for frame in frames:
-        if frame is None:
-            continue
-        label = f"{event_type.upper()} DETECTED"
-        color = {'cash': (0, 255, 0), 'violence': (0, 0, 255), 'fire': (0, 165, 255)}.get(event_type, (255, 255, 255))
-        cv2.rectangle(frame, (10, 10), (250, 45), (0, 0, 0), -1)
-        cv2.putText(frame, label, (15, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-        out.write(frame)
-    
-    out.release()
-    
-    # Convert to H.264
-    try:
-        subprocess.run([
-            'ffmpeg', '-y', '-i', str(temp_path),
-            '-c:v', 'libx264', '-preset', 'fast', '-crf', '23',
-            '-pix_fmt', 'yuv420p', '-r', '15',
-            str(final_path)
-        ], capture_output=True, timeout=180, check=True)
-        
-        temp_path.unlink()
-        
-    except Exception as e:
-        print(f"[Clip] FFmpeg error: {e}")
-        if temp_path.exists():
-            temp_path.unlink()
+    color = {'cash': (0, 255, 0), 'violence': (0, 0, 255), 'fire': (0, 165, 255)}.get(event_type, (255, 255, 255))
+    # Label is rasterized once and slice-copied onto each frame; the copy goes
+    # to the encoder's scratch frame since the sources may be live ring slots
+    label_tile = render_label(f"{event_type.upper()} DETECTED", color)
+    
+    # No MJPG temp file + second transcode pass: one encode straight to MP4
+    ffmpeg_path = settings.DETECTION_CONFIG.get('FFMPEG_PATH', 'ffmpeg')
+    ok, error = encode_frames_h264(frames, final_path, 15, ffmpeg_path=ffmpeg_path,
+                                   overlay=lambda frame: blit_label(frame, label_tile))
+    if not ok:
+        print(f"[Clip] FFmpeg error: {error}")
+        if final_path.exists():
+            final_path.unlink()
         return None, None
     
     # Save thumbnail
     thumb_filename = f"{camera.camera_id}_{event_type}_{timestamp}.jpg"
     thumb_path = thumb_dir / thumb_filename
     
-    thumb_frame = frames[-1].copy()
-    label = f"{event_type.upper()}"
-    color = {'cash': (0, 255, 0), 'violence': (0, 0, 255), 'fire': (0, 165, 255)}.get(event_type, (255, 255, 255))
-    cv2.rectangle(thumb_frame, (10, 10), (150, 45), (0, 0, 0), -1)
-    cv2.putText(thumb_frame, label, (15, 35), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+    thumb_frame = blit_label(last_frame, render_label(event_type.upper(), color, box_width=140, font_scale=0.8))
     cv2.imwrite(str(thumb_path), thumb_frame)
     
     return f'/media/clips/{final_filename}', f'/media/thumbnails/{thumb_filename}'
@@ -518,16 +837,9 @@ def _save_event(camera, event_type, confidence, frame_number, bbox, clip_path, t
                 gemini_validated=True, gemini_confidence=1.0, gemini_reason=""):
     """Save event to database with Gemini validation metadata"""
     try:
-        import json
-        from datetime import datetime
-        
-        # Save JSON metadata file
-        json_dir = Path(settings.MEDIA_ROOT) / 'json'
-        json_dir.mkdir(parents=True, exist_ok=True)
+        from cctv.utils import get_event_log
         
         timestamp = datetime.now()
-        json_filename = f"{event_type}_{camera.camera_id}_{timestamp.strftime('%Y%m%d_%H%M%S')}.json"
-        json_path = json_dir / json_filename
         
         metadata = {
             'timestamp': timestamp.isoformat(),
@@ -546,10 +858,8 @@ def _save_event(camera, event_type, confidence, frame_number, bbox, clip_path, t
             }
         }
         
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
-        
-        json_relative_path = f"json/{json_filename}"
+        # Append to the camera's daily JSONL log (fd kept open per worker)
+        json_log = get_event_log(camera.camera_id).append(metadata)
         
         Event.objects.create(
             branch=camera.branch,
@@ -563,7 +873,7 @@ def _save_event(camera, event_type, confidence, frame_number, bbox, clip_path, t
             bbox_y2=bbox[3] if bbox else 0,
             clip_path=clip_path,
             thumbnail_path=thumbnail_path,
-            metadata=json_relative_path,
+            metadata={**metadata, 'json_log': json_log},
         )
         print(f"[DB] Event saved with Gemini validation: {event_type} - {gemini_reason}")
     except Exception as e:
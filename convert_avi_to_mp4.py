@@ -2,84 +2,491 @@
 Convert AVI videos to MP4 format using FFmpeg
 Usage: python convert_avi_to_mp4.py <input_file.avi> [output_file.mp4]
 """
+import atexit
+import logging
+import os
+import queue
+import shutil
 import sys
 import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
-def convert_avi_to_mp4(input_path, output_path=None):
+# Progress goes through logging; the CLI routes it via a queue to one writer
+# thread, so conversion threads never block on (or interleave) stdout writes
+log = logging.getLogger('convert')
+
+
+class _LevelPrefixFormatter(logging.Formatter):
+    """Progress lines print as-is; warnings and errors get an 'Error: '-style prefix"""
+    
+    def format(self, record):
+        message = super().format(record)
+        if record.levelno >= logging.WARNING:
+            return f"{record.levelname.capitalize()}: {message}"
+        return message
+
+# Video encoder args - NVENC (GPU) when available, otherwise libx264 (CPU)
+# -preset p4 / -tune hq: NVENC's balanced speed/quality preset (p1 fastest - p7 best)
+# -rc vbr -cq 23 -b:v 0: constant-quality VBR, roughly libx264 -crf 23
+NVENC_ARGS = ('-c:v', 'h264_nvenc', '-preset', 'p4', '-tune', 'hq', '-rc', 'vbr', '-cq', '23', '-b:v', '0')
+# -preset fast: encoding speed preset (fast/medium/slow)
+# -crf 23: quality (lower = better, 18-28 is reasonable, 23 is default)
+X264_ARGS = ('-c:v', 'libx264', '-preset', 'fast', '-crf', '23')
+
+# Encoder args per output codec: (NVENC args, CPU fallback args). HEVC/AV1
+# give roughly half the file size of H.264 at similar quality - worth it for
+# archival/analytics copies, but H.264 stays the default since not every
+# browser plays HEVC in MP4
+# -tag:v hvc1: lets Apple/QuickTime players open HEVC MP4s
+# av1_nvenc needs an Ada (RTX 40 series) or newer GPU
+CODEC_ARGS = {
+    'h264': (NVENC_ARGS, X264_ARGS),
+    'hevc': (('-c:v', 'hevc_nvenc', '-preset', 'p4', '-tune', 'hq', '-rc', 'vbr', '-cq', '26', '-b:v', '0', '-tag:v', 'hvc1'),
+             ('-c:v', 'libx265', '-preset', 'fast', '-crf', '28', '-tag:v', 'hvc1')),
+    'av1': (('-c:v', 'av1_nvenc', '-preset', 'p4', '-rc', 'vbr', '-cq', '30', '-b:v', '0'),
+            ('-c:v', 'libsvtav1', '-preset', '8', '-crf', '35')),
+}
+
+# Fixed parts of the conversion command line, built once (see _build_ffmpeg_cmd)
+# -hwaccel cuda -hwaccel_output_format cuda: decode on NVDEC, keep frames on the GPU
+# -pix_fmt yuv420p: 4:2:0 for browser playback (NVDEC output is already 4:2:0 NV12,
+#   forcing a CPU pixel format there would break the GPU-only path)
+# -c:a aac: use AAC audio codec
+# -b:a 128k: audio bitrate
+# -movflags +faststart: moov atom up front so playback starts before the download ends
+# -y: overwrite output file if exists
+_CMD_HEAD = ('ffmpeg', '-hide_banner', '-loglevel', 'error', '-nostats')  # errors only - nothing to buffer on success
+_HWDEC_CMD_HEAD = (*_CMD_HEAD, '-hwaccel', 'cuda', '-hwaccel_output_format', 'cuda')
+_AUDIO_CMD_TAIL = ('-c:a', 'aac', '-b:a', '128k', '-movflags', '+faststart', '-y')
+# (codec, use_nvenc, hw_decode) -> everything after the input file
+_CMD_TAILS = {}
+for _codec, (_nvenc_args, _cpu_args) in CODEC_ARGS.items():
+    _CMD_TAILS[_codec, True, True] = (*_nvenc_args, *_AUDIO_CMD_TAIL)
+    _CMD_TAILS[_codec, True, False] = (*_nvenc_args, '-pix_fmt', 'yuv420p', *_AUDIO_CMD_TAIL)
+    _CMD_TAILS[_codec, False, False] = (*_cpu_args, '-pix_fmt', 'yuv420p', *_AUDIO_CMD_TAIL)
+
+# Concurrent NVENC encoder sessions allowed across all conversion threads.
+# GeForce cards cap the sessions per system (running past it makes ffmpeg fail
+# and fall back to the CPU); Quadro/Tesla/datacenter GPUs have no cap, so raise
+# it with NVENC_SESSIONS=N or --sessions N there
+_NVENC_SESSIONS = max(1, int(os.getenv('NVENC_SESSIONS', '2')))
+_NVENC_SEM = threading.BoundedSemaphore(_NVENC_SESSIONS)
+_NVENC_ACQUIRE_LOCK = threading.Lock()
+
+# Files per ffmpeg process in batch mode on the CPU (with NVENC every output
+# opens its own encoder session, so batches are capped at _NVENC_SESSIONS)
+_BATCH_SIZE_CPU = 8
+
+_ENCODERS = None  # None = not probed yet
+_NVENC_OK = {}  # encoder name -> bool
+_NVDEC_OK = None
+
+
+def _ffmpeg_encoders():
+    """Names of the encoders this ffmpeg build has (listed once per process)"""
+    global _ENCODERS
+    if _ENCODERS is None:
+        try:
+            result = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'],
+                                    capture_output=True, text=True, timeout=15)
+            # Lines look like " V....D h264_nvenc  NVIDIA NVENC H.264 encoder"
+            _ENCODERS = frozenset(line.split()[1] for line in result.stdout.splitlines()
+                                  if len(line.split()) > 1)
+        except (OSError, subprocess.TimeoutExpired):
+            _ENCODERS = frozenset()
+    return _ENCODERS
+
+
+def _nvenc_available(encoder='h264_nvenc'):
+    """Check once per process whether ffmpeg can open a session of an NVENC encoder"""
+    if encoder not in _NVENC_OK:
+        if encoder not in _ffmpeg_encoders():
+            _NVENC_OK[encoder] = False
+        else:
+            try:
+                # Encode one tiny test frame - an ffmpeg build can list
+                # h264_nvenc without a usable GPU/driver behind it
+                result = subprocess.run([
+                    'ffmpeg', '-hide_banner', '-loglevel', 'error',
+                    '-f', 'lavfi', '-i', 'color=black:s=256x256',
+                    '-frames:v', '1', '-c:v', encoder, '-f', 'null', '-'
+                ], capture_output=True, timeout=15)
+                _NVENC_OK[encoder] = result.returncode == 0
+            except (OSError, subprocess.TimeoutExpired):
+                _NVENC_OK[encoder] = False
+    return _NVENC_OK[encoder]
+
+
+def _codec_nvenc_available(codec):
+    """Whether the NVENC encoder for an output codec ('h264', 'hevc', 'av1') works here"""
+    return _nvenc_available(CODEC_ARGS[codec][0][1])
+
+
+def resolve_codec(codec='h264'):
+    """Map 'auto' to the smallest-output codec NVENC can encode here (AV1, HEVC, then H.264)"""
+    if codec != 'auto':
+        return codec
+    for candidate in ('av1', 'hevc'):
+        if _codec_nvenc_available(candidate):
+            return candidate
+    return 'h264'
+
+
+def _nvdec_available():
+    """Check once per process whether this ffmpeg build has the CUDA (NVDEC) hwaccel"""
+    global _NVDEC_OK
+    if _NVDEC_OK is None:
+        try:
+            result = subprocess.run(['ffmpeg', '-hide_banner', '-hwaccels'],
+                                    capture_output=True, text=True, timeout=15)
+            _NVDEC_OK = result.returncode == 0 and 'cuda' in result.stdout.split()
+        except (OSError, subprocess.TimeoutExpired):
+            _NVDEC_OK = False
+    return _NVDEC_OK
+
+
+def set_nvenc_sessions(sessions):
+    """Change the NVENC session limit (before starting conversions)"""
+    global _NVENC_SESSIONS, _NVENC_SEM
+    _NVENC_SESSIONS = max(1, int(sessions))
+    _NVENC_SEM = threading.BoundedSemaphore(_NVENC_SESSIONS)
+
+
+@contextmanager
+def _nvenc_sessions(count):
+    """Hold `count` NVENC session slots for the duration of the block"""
+    sem = _NVENC_SEM
+    count = min(count, _NVENC_SESSIONS)
+    # Take all slots under one lock so two batches can't each grab half and deadlock
+    with _NVENC_ACQUIRE_LOCK:
+        for _ in range(count):
+            sem.acquire()
+    try:
+        yield
+    finally:
+        for _ in range(count):
+            sem.release()
+
+
+def _encode_attempts(codec='h264'):
+    """(use_nvenc, hw_decode) combinations to try, fastest first"""
+    if not _codec_nvenc_available(codec):
+        return [(False, False)]
+    attempts = [(True, False), (False, False)]
+    if _nvdec_available():
+        # Full GPU path first: NVDEC hands CUDA frames straight to NVENC,
+        # no decoded-frame copies over PCIe. Codecs NVDEC can't handle
+        # (e.g. MJPEG on older GPUs) fail fast and fall through
+        attempts.insert(0, (True, True))
+    return attempts
+
+
+def _cmd_tail(codec, use_nvenc, hw_decode=False):
+    """Prebuilt encoder/audio/output args; the CPU path falls back to libx264
+    when this ffmpeg build lacks the codec's software encoder"""
+    if not use_nvenc and CODEC_ARGS[codec][1][1] not in _ffmpeg_encoders():
+        codec = 'h264'
+    return _CMD_TAILS[codec, use_nvenc, hw_decode]
+
+
+def _thread_args(use_nvenc, threads):
+    """Encoder thread cap for the CPU path (None = let the encoder pick)"""
+    # x264 defaults to 1.5x the core count per process, so N parallel
+    # conversions oversubscribe the CPU N times over and thrash
+    if use_nvenc or not threads:
+        return ()
+    return ('-threads', str(threads))
+
+
+def _threads_per_encoder(encoders_at_once):
+    """CPU threads for each of several software encoders running at once"""
+    if encoders_at_once <= 1:
+        return None
+    return max(1, (os.cpu_count() or 1) // encoders_at_once)
+
+
+def _build_ffmpeg_cmd(input_path, output_path, use_nvenc, hw_decode=False, codec='h264', threads=None):
+    """FFmpeg command line (a tuple - Popen takes any sequence) for one conversion"""
+    # (if scaling is ever needed on the GPU path use -vf scale_npp=w=W:h=H, not swscale)
+    head = _HWDEC_CMD_HEAD if hw_decode else _CMD_HEAD
+    return (*head, '-i', os.fspath(input_path), *_cmd_tail(codec, use_nvenc, hw_decode),
+            *_thread_args(use_nvenc, threads), os.fspath(output_path))
+
+
+def _build_two_pass_cmds(input_path, output_path, bitrate, passlog, threads=None):
+    """libx264 two-pass command lines for hitting a target bitrate"""
+    common = [
+        *_CMD_HEAD,
+        '-i', os.fspath(input_path),
+        '-c:v', 'libx264', '-preset', 'medium', '-b:v', bitrate,
+        '-pix_fmt', 'yuv420p',
+        *_thread_args(False, threads),
+        '-passlogfile', os.fspath(passlog),
+    ]
+    return [
+        # Pass 1 only writes the stats log - no audio, output discarded
+        [*common, '-pass', '1', '-an', '-f', 'null', os.devnull],
+        [*common, '-pass', '2', '-c:a', 'aac', '-b:a', '128k',
+         '-movflags', '+faststart', '-y', os.fspath(output_path)],
+    ]
+
+
+def _build_batch_cmd(pairs, use_nvenc, codec='h264', threads=None):
+    """One FFmpeg command line converting several (input, output) pairs"""
+    # Inputs are numbered in order; each output maps its own input's video and
+    # (if present) audio, so file boundaries stay exact - unlike concat + segment
+    tail = (*_cmd_tail(codec, use_nvenc), *_thread_args(use_nvenc, threads))
+    command = list(_CMD_HEAD)
+    for input_path, _ in pairs:
+        command += ('-i', os.fspath(input_path))
+    for n, (_, output_path) in enumerate(pairs):
+        command += ('-map', f'{n}:v:0', '-map', f'{n}:a?', *tail, os.fspath(output_path))
+    return command
+
+
+def _format_size(num_bytes):
+    """Human-readable output size (bytes below 1 MB)"""
+    if num_bytes < 1 << 20:
+        return f"{num_bytes} bytes"
+    return f"{num_bytes / 1048576:.2f} MB"
+
+
+def _run_ffmpeg(command):
+    """
+    Run ffmpeg, keeping only the last lines of its stderr.
+    
+    Returns (return_code, stderr_tail).
+    """
+    proc = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True, errors='replace')
+    # stderr is the only pipe, so reading it here can't deadlock; the deque
+    # bounds memory no matter how much ffmpeg prints
+    tail = deque(proc.stderr, maxlen=64)
+    proc.stderr.close()
+    return proc.wait(), ''.join(tail)
+
+
+def convert_avi_to_mp4(input_path, output_path=None, two_pass_bitrate=None, codec='h264', threads=None):
     """
     Convert AVI video to MP4 format
     
     Args:
         input_path: Path to input AVI file
         output_path: Path to output MP4 file (optional, defaults to same name with .mp4)
+        two_pass_bitrate: Target bitrate (e.g. '2M') for a two-pass libx264 encode
+                          (optional, default is single-pass constant quality)
+        codec: Output video codec - 'h264' (default), 'hevc', 'av1' or 'auto'
+        threads: Thread cap for a CPU encode (optional, set when several run at once)
     """
     input_path = Path(input_path)
     
     if not input_path.exists():
-        print(f"Error: Input file not found: {input_path}")
+        log.error("Input file not found: %s", input_path)
         return False
     
     if not input_path.suffix.lower() in ['.avi', '.AVI']:
-        print(f"Warning: Input file doesn't have .avi extension: {input_path}")
+        log.warning("Input file doesn't have .avi extension: %s", input_path)
     
     # Generate output path if not provided
     if output_path is None:
-        output_path = input_path.with_suffix('.mp4')
+        output_path = _output_path_for(input_path)
     else:
         output_path = Path(output_path)
+        # (only paths with the same extension can name the same file)
+        if (output_path.suffix.lower() == input_path.suffix.lower()
+                and output_path.exists() and output_path.samefile(input_path)):
+            log.error("Output would overwrite the input file: %s", input_path)
+            return False
     
     # Make sure output directory exists
     output_path.parent.mkdir(parents=True, exist_ok=True)
     
-    print(f"Converting: {input_path}")
-    print(f"Output: {output_path}")
-    
-    # FFmpeg command for high-quality MP4 conversion
-    # -i: input file
-    # -c:v libx264: use H.264 video codec
-    # -preset fast: encoding speed preset (fast/medium/slow)
-    # -crf 23: quality (lower = better, 18-28 is reasonable, 23 is default)
-    # -c:a aac: use AAC audio codec
-    # -b:a 128k: audio bitrate
-    command = [
-        'ffmpeg',
-        '-i', str(input_path),
-        '-c:v', 'libx264',
-        '-preset', 'fast',
-        '-crf', '23',
-        '-c:a', 'aac',
-        '-b:a', '128k',
-        '-y',  # Overwrite output file if exists
-        str(output_path)
-    ]
+    log.info("Converting: %s", input_path)
+    log.info("Output: %s", output_path)
+    
+    if two_pass_bitrate:
+        return _convert_two_pass(input_path, output_path, two_pass_bitrate, threads)
+    
+    # FFmpeg command for high-quality MP4 conversion - try the GPU paths
+    # first and fall back (e.g. all NVENC sessions busy, codec not supported
+    # by NVDEC) until the software encoder on the CPU
+    codec = resolve_codec(codec)
+    attempts = _encode_attempts(codec)
     
     try:
-        result = subprocess.run(
-            command,
-            check=True,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
-        print(f"✓ Conversion successful!")
-        print(f"Output file: {output_path}")
-        print(f"Size: {output_path.stat().st_size / (1024*1024):.2f} MB")
+        for n, (use_nvenc, hw_decode) in enumerate(attempts, 1):
+            with _nvenc_sessions(1 if use_nvenc else 0):
+                return_code, stderr = _run_ffmpeg(_build_ffmpeg_cmd(input_path, output_path, use_nvenc, hw_decode, codec, threads))
+            if return_code == 0:
+                break
+            if n < len(attempts):
+                log.warning("%s conversion failed, falling back...", 'NVDEC+NVENC' if hw_decode else 'NVENC')
+        else:
+            log.error("Conversion failed:")
+            if stderr:
+                log.error("%s", stderr)
+            return False
+        
+        log.info("✓ Conversion successful!")
+        log.info("Output file: %s", output_path)
+        log.info("Size: %s", _format_size(os.stat(output_path).st_size))
         return True
         
-    except subprocess.CalledProcessError as e:
-        print(f"Error during conversion:")
-        if e.stderr:
-            print(e.stderr)
+    except FileNotFoundError:
+        log.error("FFmpeg not found. Please install FFmpeg:")
+        log.error("  Windows: choco install ffmpeg")
+        log.error("  Or download from: https://ffmpeg.org/download.html")
         return False
+
+
+def _convert_two_pass(input_path, output_path, bitrate, threads=None):
+    """Two-pass libx264 conversion; the pass log lives in a temp dir that is always removed"""
+    passlog_dir = tempfile.mkdtemp(prefix='ffmpeg2pass_')
+    try:
+        for command in _build_two_pass_cmds(input_path, output_path, bitrate, Path(passlog_dir) / 'pass', threads):
+            return_code, stderr = _run_ffmpeg(command)
+            if return_code != 0:
+                log.error("Two-pass conversion failed:")
+                if stderr:
+                    log.error("%s", stderr)
+                return False
+        
+        log.info("✓ Conversion successful (two-pass, %s)!", bitrate)
+        log.info("Output file: %s", output_path)
+        log.info("Size: %s", _format_size(os.stat(output_path).st_size))
+        return True
+        
     except FileNotFoundError:
-        print("Error: FFmpeg not found. Please install FFmpeg:")
-        print("  Windows: choco install ffmpeg")
-        print("  Or download from: https://ffmpeg.org/download.html")
+        log.error("FFmpeg not found. Please install FFmpeg.")
         return False
+    finally:
+        shutil.rmtree(passlog_dir, ignore_errors=True)
+
+def _output_location(video_file, output_dir_fs=None):
+    """(directory, file name) strings of the MP4 for a source video - plain
+    string slicing, no intermediate Path objects in the per-file loop"""
+    name = video_file.name
+    dot = name.rfind('.')
+    stem = name[:dot] if dot > 0 else name
+    directory = output_dir_fs if output_dir_fs else os.path.dirname(os.fspath(video_file))
+    if name[dot:].lower() == '.mp4' and not output_dir_fs:
+        # Never write over the source (e.g. converting x.MP4, or any case-insensitive filesystem)
+        candidate = os.path.join(directory, stem + '.mp4')
+        if os.path.exists(candidate) and os.path.samefile(candidate, video_file):
+            return directory, stem + '_converted.mp4'
+    return directory, stem + '.mp4'
+
+
+def _output_path_for(video_file, output_dir=None):
+    """MP4 path for a source video (next to it, or in output_dir)"""
+    directory, name = _output_location(video_file, os.fspath(output_dir) if output_dir else None)
+    return Path(directory, name)
+
+
+def _convert_group(pairs, codec='h264', threads=None):
+    """
+    Convert several (input, output) pairs in a single ffmpeg process.
+    
+    Saves the per-file process startup and encoder init. If the batch fails
+    (e.g. one unreadable input) the group is retried file by file.
+    Returns one success flag per pair.
+    """
+    for _, output_path in pairs:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    log.info("Converting batch of %d: %s", len(pairs), ', '.join(p.name for p, _ in pairs))
+    
+    use_nvenc = _codec_nvenc_available(codec)
+    start = time.perf_counter()
+    try:
+        with _nvenc_sessions(len(pairs) if use_nvenc else 0):
+            return_code, stderr = _run_ffmpeg(_build_batch_cmd(pairs, use_nvenc, codec, threads))
+    except FileNotFoundError:
+        log.error("FFmpeg not found. Please install FFmpeg.")
+        return [False] * len(pairs)
+    elapsed = time.perf_counter() - start
+    
+    if return_code == 0:
+        log.info("✓ Batch of %d converted in %.1fs", len(pairs), elapsed)
+        return [True] * len(pairs)
+    
+    log.warning("Batch conversion failed after %.1fs, converting files one by one...", elapsed)
+    if stderr:
+        log.error("%s", stderr)
+    return [convert_avi_to_mp4(input_path, output_path, codec=codec, threads=threads)
+            for input_path, output_path in pairs]
+
+
+def convert_batch(files, out_dir=None, batch_size=None, codec='h264'):
+    """
+    Convert many (small) videos with one ffmpeg process per batch of files
+    
+    Args:
+        files: Input video paths
+        out_dir: Output directory (optional, defaults to next to each input)
+        batch_size: Files per ffmpeg process (default: the NVENC session limit
+                    with NVENC, else 8)
+        codec: Output video codec - 'h264' (default), 'hevc', 'av1' or 'auto'
+    
+    Returns:
+        One success flag per input file
+    """
+    pairs = [(Path(f), _output_path_for(Path(f), out_dir)) for f in files]
+    codec = resolve_codec(codec)
+    use_nvenc = _codec_nvenc_available(codec)
+    if batch_size is None:
+        batch_size = _NVENC_SESSIONS if use_nvenc else _BATCH_SIZE_CPU
+    batch_size = max(1, batch_size)
+    if use_nvenc:
+        batch_size = min(batch_size, _NVENC_SESSIONS)
+    
+    results = []
+    for i in range(0, len(pairs), batch_size):
+        results.extend(_convert_group(pairs[i:i + batch_size], codec, _threads_per_encoder(batch_size)))
+    return results
+
+
+def _listed_names(directory, listings):
+    """Names in a directory, listed once per directory via the listings cache"""
+    names = listings.get(directory)
+    if names is None:
+        try:
+            with os.scandir(directory) as entries:
+                names = {entry.name for entry in entries}
+        except OSError:
+            names = set()  # output directory doesn't exist yet
+        listings[directory] = names
+    return names
+
+
+# Extensions picked up by convert_directory (matched case-insensitively)
+_VIDEO_EXTS = frozenset({'avi', 'mov', 'mkv', 'wmv', 'flv'})
+
+
+def _iter_videos(root, recursive=False):
+    """Yield video files under root with a single os.scandir walk"""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        stack.append(entry.path)
+                elif entry.is_file():
+                    name = entry.name
+                    dot = name.rfind('.')
+                    if dot >= 0 and name[dot + 1:].lower() in _VIDEO_EXTS:
+                        yield Path(entry.path)
 
-def convert_directory(input_dir, output_dir=None, recursive=False):
+
+def convert_directory(input_dir, output_dir=None, recursive=False, jobs=None, two_pass_bitrate=None,
+                      batch_size=None, codec='h264'):
     """
     Convert all AVI files in a directory
     
@@ -87,62 +494,95 @@ def convert_directory(input_dir, output_dir=None, recursive=False):
         input_dir: Directory containing AVI files
         output_dir: Output directory (optional, defaults to same directory)
         recursive: Search subdirectories (default: False)
+        jobs: Conversions to run at once (default: the NVENC session limit
+              with NVENC, otherwise one per CPU core)
+        two_pass_bitrate: Target bitrate for a two-pass libx264 encode (optional)
+        batch_size: Convert this many files per ffmpeg process (optional,
+                    see convert_batch; not combined with two-pass)
+        codec: Output video codec - 'h264' (default), 'hevc', 'av1' or 'auto'
     """
     input_dir = Path(input_dir)
     
     if not input_dir.is_dir():
-        print(f"Error: Not a directory: {input_dir}")
+        log.error("Not a directory: %s", input_dir)
         return
     
-    # Find all AVI files
-    if recursive:
-        avi_files = list(input_dir.rglob('*.avi')) + list(input_dir.rglob('*.AVI'))
-    else:
-        avi_files = list(input_dir.glob('*.avi')) + list(input_dir.glob('*.AVI'))
-    
-    # Also find other common video formats
-    video_extensions = ['*.mov', '*.MOV', '*.mkv', '*.MKV', '*.wmv', '*.WMV', '*.flv', '*.FLV']
-    for ext in video_extensions:
-        if recursive:
-            avi_files.extend(input_dir.rglob(ext))
-        else:
-            avi_files.extend(input_dir.glob(ext))
+    # Find all AVI files (and other common video formats) in one pass
+    avi_files = sorted(_iter_videos(input_dir, recursive))
     
     if not avi_files:
-        print(f"No video files found in: {input_dir}")
+        log.info("No video files found in: %s", input_dir)
         return
     
-    print(f"Found {len(avi_files)} video file(s)")
-    print()
+    log.info("Found %d video file(s)", len(avi_files))
     
     success_count = 0
     failed_count = 0
     
-    for i, video_file in enumerate(avi_files, 1):
-        print(f"[{i}/{len(avi_files)}] Processing: {video_file.name}")
+    # Skip files that are already converted before queueing anything - each
+    # output directory is listed once instead of stat-ing every output path
+    # (one round-trip instead of one per file on network storage)
+    pending = []
+    queued_outputs = set()
+    listings = {}
+    output_dir_fs = os.fspath(output_dir) if output_dir else None
+    for video_file in avi_files:
+        out_dir, out_name = _output_location(video_file, output_dir_fs)
         
-        if output_dir:
-            output_path = Path(output_dir) / video_file.with_suffix('.mp4').name
-        else:
-            output_path = video_file.with_suffix('.mp4')
-        
-        # Skip if MP4 already exists
-        if output_path.exists():
-            print(f"  ⊙ Skipping - MP4 already exists")
-            print()
+        if out_name in _listed_names(out_dir, listings):
+            log.info("  ⊙ Skipping %s - MP4 already exists", video_file.name)
             continue
-        
-        if convert_avi_to_mp4(video_file, output_path):
-            success_count += 1
-        else:
-            failed_count += 1
-        print()
+        output_path = os.path.join(out_dir, out_name)  # str - ffmpeg argv takes it as-is
+        if output_path in queued_outputs:
+            # e.g. clip.avi and clip.mov would both write clip.mp4
+            log.info("  ⊙ Skipping %s - %s is already queued", video_file.name, out_name)
+            continue
+        queued_outputs.add(output_path)
+        pending.append((video_file, output_path))
+    
+    codec = resolve_codec(codec)
+    use_nvenc = _codec_nvenc_available(codec)
+    if jobs is None:
+        jobs = _NVENC_SESSIONS if use_nvenc else (os.cpu_count() or 1)
+    
+    # Group the files - one ffmpeg process per group in batch mode, else one per file
+    if batch_size and not two_pass_bitrate:
+        batch_size = max(1, batch_size)
+        if use_nvenc:
+            batch_size = min(batch_size, _NVENC_SESSIONS)
+        groups = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        threads = _threads_per_encoder(max(1, jobs) * batch_size)
+        convert = lambda group: _convert_group(group, codec, threads)
+    else:
+        groups = [[pair] for pair in pending]
+        threads = _threads_per_encoder(max(1, jobs))
+        convert = lambda group: [convert_avi_to_mp4(*group[0], two_pass_bitrate, codec, threads)]
+    
+    # The work happens in ffmpeg child processes, so threads are enough to
+    # keep several conversions running at once
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = {executor.submit(convert, group): group for group in groups}
+        for future in as_completed(futures):
+            group = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                log.error("Failed to convert %s: %s", ', '.join(f.name for f, _ in group), e)
+                results = [False] * len(group)
+            for (video_file, _), ok in zip(group, results):
+                if ok:
+                    success_count += 1
+                else:
+                    failed_count += 1
+                done += 1
+                log.info("[%d/%d] Done: %s", done, len(pending), video_file.name)
     
-    print(f"=" * 60)
-    print(f"Conversion complete!")
-    print(f"  Success: {success_count}")
-    print(f"  Failed: {failed_count}")
-    print(f"  Total: {len(avi_files)}")
+    log.info("=" * 60)
+    log.info("Conversion complete!")
+    log.info("  Success: %d", success_count)
+    log.info("  Failed: %d", failed_count)
+    log.info("  Total: %d", len(avi_files))
 
 if __name__ == '__main__':
     if len(sys.argv) < 2:
@@ -151,29 +591,74 @@ if __name__ == '__main__':
         print("  Directory:   python convert_avi_to_mp4.py <directory> [-r]")
         print()
         print("Options:")
-        print("  -r    Recursive - search subdirectories")
+        print("  -r      Recursive - search subdirectories")
+        print("  -j N    Convert N files at once (default: NVENC session limit, else CPU count)")
+        print("  -b N    Batch mode - convert N files per ffmpeg process (many small clips)")
+        print("  --sessions N         Concurrent NVENC sessions (default: 2 or $NVENC_SESSIONS;")
+        print("                       raise on Quadro/Tesla GPUs, which have no session cap)")
+        print("  --codec C            h264 (default), hevc, av1 or auto (smallest NVENC can do)")
+        print("  --two-pass BITRATE   Two-pass libx264 at a target bitrate (e.g. 2M) instead of CRF")
         print()
         print("Examples:")
         print('  python convert_avi_to_mp4.py video.avi')
         print('  python convert_avi_to_mp4.py video.avi converted.mp4')
         print('  python convert_avi_to_mp4.py media/uploads/test/')
         print('  python convert_avi_to_mp4.py testing/ -r')
+        print('  python convert_avi_to_mp4.py testing/ -r -j 4')
+        print('  python convert_avi_to_mp4.py training_clips/ -b 8')
+        print('  python convert_avi_to_mp4.py video.avi --two-pass 2M')
+        print('  python convert_avi_to_mp4.py archive/ -r --codec hevc')
         sys.exit(1)
     
     input_arg = sys.argv[1]
     input_path = Path(input_arg)
     
+    two_pass_bitrate = None
+    if '--two-pass' in sys.argv:
+        two_pass_bitrate = sys.argv[sys.argv.index('--two-pass') + 1]
+    
+    codec = 'h264'
+    if '--codec' in sys.argv:
+        codec = sys.argv[sys.argv.index('--codec') + 1].lower()
+        if codec != 'auto' and codec not in CODEC_ARGS:
+            print(f"Error: Unknown codec: {codec} (use h264, hevc, av1 or auto)")
+            sys.exit(1)
+    
+    if '--sessions' in sys.argv:
+        set_nvenc_sessions(sys.argv[sys.argv.index('--sessions') + 1])
+    
+    # Log records are queued by the workers and written by a single listener
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(_LevelPrefixFormatter())
+    listener = QueueListener(log_queue, handler)
+    root_logger = logging.getLogger()
+    root_logger.addHandler(QueueHandler(log_queue))
+    root_logger.setLevel(logging.INFO)
+    listener.start()
+    atexit.register(listener.stop)  # flush remaining records on exit
+    
     # Check if it's a directory or file
     if input_path.is_dir():
         # Check for recursive flag
         recursive = '-r' in sys.argv or '--recursive' in sys.argv
         output_dir = None
         
+        jobs = None
+        for flag in ('-j', '--jobs'):
+            if flag in sys.argv:
+                jobs = int(sys.argv[sys.argv.index(flag) + 1])
+        
+        batch_size = None
+        for flag in ('-b', '--batch'):
+            if flag in sys.argv:
+                batch_size = int(sys.argv[sys.argv.index(flag) + 1])
+        
         # Check if second arg is output dir (not a flag)
         if len(sys.argv) > 2 and not sys.argv[2].startswith('-'):
             output_dir = sys.argv[2]
         
-        convert_directory(input_path, output_dir, recursive)
+        convert_directory(input_path, output_dir, recursive, jobs, two_pass_bitrate, batch_size, codec)
     else:
-        output_path = sys.argv[2] if len(sys.argv) > 2 else None
-        convert_avi_to_mp4(input_path, output_path)
+        output_path = sys.argv[2] if len(sys.argv) > 2 and not sys.argv[2].startswith('-') else None
+        convert_avi_to_mp4(input_path, output_path, two_pass_bitrate, codec)
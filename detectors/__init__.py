@@ -1,11 +1,38 @@
 """
 Detection modules for Hotel Cash Detector
+
+Detector classes are imported lazily on first access, so importing
+detectors.gemini_validator (or just get_device) doesn't pull in cv2,
+ultralytics and every detector module.
 """
-from .base_detector import BaseDetector
-from .cash_detector import CashTransactionDetector
-from .violence_detector import ViolenceDetector
-from .fire_detector import FireDetector
-from .unified_detector import UnifiedDetector
+import copy
+import functools
+import importlib
+import threading
+from types import MappingProxyType
+
+_LAZY = {
+    'BaseDetector': '.base_detector',
+    'CashTransactionDetector': '.cash_detector',
+    'ViolenceDetector': '.violence_detector',
+    'FireDetector': '.fire_detector',
+    'UnifiedDetector': '.unified_detector',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = value  # later lookups skip __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@functools.lru_cache(maxsize=None)
+def _torch():
+    """Import torch on first use only"""
+    import torch
+    return torch
 
 
 def get_device(use_gpu_setting: str = 'auto') -> str:
@@ -21,24 +48,29 @@ def get_device(use_gpu_setting: str = 'auto') -> str:
     Returns:
         'cuda' or 'cpu'
     """
-    import torch
-    
-    # Normalize the setting
-    if isinstance(use_gpu_setting, bool):
-        use_gpu = use_gpu_setting
+    return _resolve_device(_normalize_gpu_setting(use_gpu_setting))
+
+
+_GPU_TRUTHY = frozenset({'true', '1', 'yes', 'gpu', 'cuda', 't', 'y'})
+_GPU_AUTO = frozenset({'auto', ''})
+
+
+def _normalize_gpu_setting(use_gpu_setting):
+    """USE_GPU setting -> True (force GPU), False (force CPU) or None (auto)"""
+    if use_gpu_setting is True or use_gpu_setting is False:
+        return use_gpu_setting
     elif isinstance(use_gpu_setting, str):
-        setting_lower = use_gpu_setting.lower().strip()
-        if setting_lower == 'auto':
-            use_gpu = None  # Will auto-detect
-        elif setting_lower in ('true', '1', 'yes', 'gpu', 'cuda'):
-            use_gpu = True
-        else:
-            use_gpu = False
-    else:
-        use_gpu = None  # Default to auto
-    
-    # Determine device
-    cuda_available = torch.cuda.is_available()
+        setting = use_gpu_setting.strip().lower()
+        if setting in _GPU_AUTO:
+            return None  # Will auto-detect (unset/empty env var included)
+        return setting in _GPU_TRUTHY
+    return None  # Default to auto
+
+
+@functools.lru_cache(maxsize=4)
+def _resolve_device(use_gpu):
+    """Device for a normalized setting - CUDA is probed once per setting, not per call"""
+    cuda_available = _torch().cuda.is_available()
     
     if use_gpu is True:
         if cuda_available:
@@ -53,14 +85,77 @@ def get_device(use_gpu_setting: str = 'auto') -> str:
         return 'cuda' if cuda_available else 'cpu'
 
 
-def get_device_info() -> dict:
+_torch_devices = {}  # 'cuda'/'cpu' -> shared torch.device
+
+
+def get_torch_device(use_gpu_setting: str = 'auto'):
+    """
+    Same as get_device(), but returns a shared torch.device object.
+    
+    Resolve it once when a detector loads and keep it - passing the same
+    torch.device to .to() in per-frame code skips re-parsing a device string.
+    """
+    name = get_device(use_gpu_setting)
+    device = _torch_devices.get(name)
+    if device is None:
+        device = _torch_devices.setdefault(name, _torch().device(name))
+    return device
+
+
+def clear_device_cache():
+    """Forget cached device lookups (tests / after changing CUDA_VISIBLE_DEVICES)"""
+    _resolve_device.cache_clear()
+    get_device_info.cache_clear()
+    _torch_devices.clear()
+
+
+_shared_models = {}  # (weights path, device, half) -> loaded YOLO
+_shared_models_lock = threading.Lock()
+
+
+def load_shared_yolo(model_path, device: str, half: bool = None):
+    """
+    Load a YOLO .pt model whose weights are shared process-wide.
+    
+    Every camera worker builds its own detectors, so without this each one
+    holds a private copy of the same weights in RAM/VRAM. The first call per
+    (path, device, half) loads and fuses the model; later calls get a shallow
+    copy of the wrapper - own predictor state, same underlying nn.Module.
+    `half` (default: on CUDA) stores the weights as FP16 - callers must then
+    predict with the same half= value.
+    """
+    from ultralytics import YOLO
+    
+    if half is None:
+        half = device == 'cuda'
+    key = (str(model_path), device, half)
+    with _shared_models_lock:
+        base = _shared_models.get(key)
+        if base is None:
+            base = YOLO(str(model_path))
+            base.to(device)
+            # Fuse/convert once up front so predictors never modify the
+            # shared module while another camera's inference is running
+            base.fuse()
+            if half:
+                base.model.half()
+            _shared_models[key] = base
+    
+    model = copy.copy(base)
+    model.predictor = None
+    model.overrides = dict(base.overrides)
+    return model
+
+
+@functools.lru_cache(maxsize=1)
+def get_device_info() -> MappingProxyType:
     """
     Get detailed information about the current device configuration.
     
     Returns:
-        Dictionary with device information
+        Read-only mapping with device information (cached after the first call)
     """
-    import torch
+    torch = _torch()
     
     info = {
         'cuda_available': torch.cuda.is_available(),
@@ -76,7 +171,7 @@ def get_device_info() -> dict:
         info['gpu_count'] = torch.cuda.device_count()
         info['device'] = 'cuda'
     
-    return info
+    return MappingProxyType(info)
 
 
 __all__ = [
@@ -86,5 +181,8 @@ __all__ = [
     'FireDetector',
     'UnifiedDetector',
     'get_device',
-    'get_device_info'
+    'get_torch_device',
+    'get_device_info',
+    'clear_device_cache',
+    'load_shared_yolo'
 ]
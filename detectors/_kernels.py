@@ -0,0 +1,93 @@
+"""
+Per-frame person geometry for the cash detector.
+
+extract_people() turns one frame's pose output into per-person centers,
+cashier-zone flags and wrist positions in a single pass. It is compiled
+with Numba when installed (pip install numba); without it the same code
+runs as plain Python, so results are identical either way.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit(...)"""
+        def decorator(func):
+            return func
+        return decorator
+
+# COCO keypoint indices
+LEFT_SHOULDER, RIGHT_SHOULDER = 5, 6
+LEFT_WRIST, RIGHT_WRIST = 9, 10
+LEFT_HIP, RIGHT_HIP = 11, 12
+
+
+@njit(cache=True)
+def point_in_polygon(x, y, polygon):
+    """Ray casting point-in-polygon test; polygon is an (M, 2) array"""
+    n = polygon.shape[0]
+    if n < 3:
+        return False
+
+    inside = False
+    xinters = 0.0
+    p1x, p1y = polygon[0, 0], polygon[0, 1]
+    for i in range(1, n + 1):
+        p2x, p2y = polygon[i % n, 0], polygon[i % n, 1]
+        if y > min(p1y, p2y):
+            if y <= max(p1y, p2y):
+                if x <= max(p1x, p2x):
+                    if p1y != p2y:
+                        xinters = (y - p1y) * (p2x - p1x) / (p2y - p1y) + p1x
+                    if p1x == p2x or x <= xinters:
+                        inside = not inside
+        p1x, p1y = p2x, p2y
+
+    return inside
+
+
+@njit(cache=True)
+def extract_people(kpts, boxes, cashier_polygon, hand_confidence):
+    """
+    Geometry for N people from (N, 17, 3) keypoints and (N, 4) xyxy boxes.
+
+    Returns:
+        centers: (N, 2) int - hip center, else shoulder center, else bbox center
+        in_zone: (N,) bool - center inside cashier_polygon (empty = no zone)
+        wrists: (N, 2, 3) float - left/right wrist x, y (truncated), confidence
+        wrist_ok: (N, 2) bool - wrist confidence >= hand_confidence
+    """
+    n = kpts.shape[0]
+    centers = np.empty((n, 2), np.int64)
+    in_zone = np.zeros(n, np.bool_)
+    wrists = np.zeros((n, 2, 3), np.float64)
+    wrist_ok = np.zeros((n, 2), np.bool_)
+
+    for p in range(n):
+        if kpts[p, LEFT_HIP, 2] > 0.3 and kpts[p, RIGHT_HIP, 2] > 0.3:
+            cx = int((kpts[p, LEFT_HIP, 0] + kpts[p, RIGHT_HIP, 0]) / 2)
+            cy = int((kpts[p, LEFT_HIP, 1] + kpts[p, RIGHT_HIP, 1]) / 2)
+        elif kpts[p, LEFT_SHOULDER, 2] > 0.3 and kpts[p, RIGHT_SHOULDER, 2] > 0.3:
+            cx = int((kpts[p, LEFT_SHOULDER, 0] + kpts[p, RIGHT_SHOULDER, 0]) / 2)
+            cy = int((kpts[p, LEFT_SHOULDER, 1] + kpts[p, RIGHT_SHOULDER, 1]) / 2)
+        else:
+            # Box corners are truncated to ints first, like the bbox tuple
+            cx = int((int(boxes[p, 0]) + int(boxes[p, 2])) / 2)
+            cy = int((int(boxes[p, 1]) + int(boxes[p, 3])) / 2)
+        centers[p, 0] = cx
+        centers[p, 1] = cy
+        in_zone[p] = point_in_polygon(cx, cy, cashier_polygon)
+
+        for k in range(2):
+            idx = LEFT_WRIST + k
+            if kpts[p, idx, 2] >= hand_confidence:
+                wrist_ok[p, k] = True
+                wrists[p, k, 0] = int(kpts[p, idx, 0])
+                wrists[p, k, 1] = int(kpts[p, idx, 1])
+                wrists[p, k, 2] = kpts[p, idx, 2]
+
+    return centers, in_zone, wrists, wrist_ok
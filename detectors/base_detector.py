@@ -6,6 +6,7 @@ from dataclasses import dataclass
 from typing import List, Tuple, Optional, Dict, Any
 import numpy as np
 from datetime import datetime
+from collections import deque
 
 
 @dataclass
@@ -42,7 +43,7 @@ class BaseDetector(ABC):
         self.config = config or {}
         self.is_initialized = False
         self.frame_count = 0
-        self.detection_history: List[Detection] = []
+        self.detection_history = deque(maxlen=1000)  # Recent detections only
         
     @abstractmethod
     def initialize(self) -> bool:
@@ -62,24 +63,27 @@ class BaseDetector(ABC):
         """
         pass
     
-    def process_frame(self, frame: np.ndarray) -> List[Detection]:
-        """Process a frame and update history"""
+    def process_frame(self, frame: np.ndarray, inference_input: Tuple = None) -> List[Detection]:
+        """Process a frame and update history
+        
+        inference_input is an optional (downscaled_frame, scale) pair shared by
+        detectors that can run their model on a smaller copy of the frame.
+        """
         self.frame_count += 1
         
         if not self.is_initialized:
             if not self.initialize():
                 return []
         
-        detections = self.detect(frame)
+        if inference_input is None:
+            detections = self.detect(frame)
+        else:
+            detections = self.detect(frame, inference_input)
         
         for det in detections:
             det.frame_number = self.frame_count
             self.detection_history.append(det)
         
-        # Keep only recent history (last 1000 detections)
-        if len(self.detection_history) > 1000:
-            self.detection_history = self.detection_history[-500:]
-        
         return detections
     
     def draw_detections(self, frame: np.ndarray, detections: List[Detection]) -> np.ndarray:
@@ -113,4 +117,4 @@ class BaseDetector(ABC):
     def reset(self):
         """Reset the detector state"""
         self.frame_count = 0
-        self.detection_history = []
+        self.detection_history = deque(maxlen=1000)
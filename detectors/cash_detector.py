@@ -15,11 +15,14 @@ Detection Flow:
 This ensures we only detect REAL cash transactions:
 Customer pays → Cashier receives → Cashier deposits in drawer
 """
+import math
+import os
 import cv2
 import numpy as np
 from typing import List, Dict, Tuple, Optional
 from collections import deque
 from .base_detector import BaseDetector, Detection
+from ._kernels import extract_people
 
 
 class CashTransactionDetector(BaseDetector):
@@ -36,7 +39,6 @@ class CashTransactionDetector(BaseDetector):
     def __init__(self, config: Dict = None):
         super().__init__(config)
         self.pose_model = None
-        self.person_model = None
         
         # Cashier zone (where cashier stands) - rectangle format
         self.cashier_zone = config.get('cashier_zone', [100, 100, 400, 300])
@@ -49,6 +51,7 @@ class CashTransactionDetector(BaseDetector):
         self.use_polygon_zones = config.get('use_polygon_zones', True)
         self.cashier_zone_polygon = config.get('cashier_zone_polygon', None)
         self.cash_drawer_zone_polygon = config.get('cash_drawer_zone_polygon', None)
+        self._recompute_zone_cache()
         
         # Video dimensions
         self.video_width = config.get('video_width', 1920)
@@ -56,7 +59,22 @@ class CashTransactionDetector(BaseDetector):
         
         # Detection parameters
         self.hand_touch_distance = config.get('hand_touch_distance', 100)
+        self._hand_touch_distance_sq = self.hand_touch_distance ** 2  # compared against squared distances
         self.pose_confidence = config.get('pose_confidence', 0.5)
+        
+        # Pose inference size for every predict call (the CUDA paths letterbox
+        # frames to this once). Keypoints come back in frame coordinates, but
+        # they get coarser as this shrinks - recheck hand_touch_distance if
+        # you lower it
+        self.pose_imgsz = config.get('pose_imgsz', 640)
+        self._letterbox_cache = None
+        self._pinned_batch = None  # Pinned host staging buffer (CUDA only)
+        self.device = 'cpu'
+        self.torch_device = None  # Shared torch.device, set in initialize()
+        self.half = False  # FP16 inference (CUDA only)
+        
+        # Max frames per detect_batch() call (the exported engine's max batch)
+        self.batch_size = max(1, int(config.get('batch_size', 16)))
         self.min_cash_confidence = config.get('min_cash_confidence', 0.70)
         
         # Hand tracking duration (frames to track after touch)
@@ -83,38 +101,55 @@ class CashTransactionDetector(BaseDetector):
         # Frame counter
         self.frame_count = 0
         
+        # Source frames between detect() calls (caller's frame skip). Counters
+        # advance by this much so tracking/cooldown windows stay in video frames
+        self.frame_stride = max(1, int(config.get('frame_stride', 1)))
+        
         # Hand keypoint indices (COCO format)
         self.LEFT_WRIST = 9
         self.RIGHT_WRIST = 10
         
     def initialize(self) -> bool:
-        """Load YOLO models for person and pose detection"""
+        """Load the YOLO pose model (people + hand keypoints)"""
         try:
             from ultralytics import YOLO
             from pathlib import Path
-            from . import get_device
+            from . import get_device, get_torch_device, load_shared_yolo
             
             # Get model paths from config or use defaults
             models_dir = Path(self.config.get('models_dir', 'models'))
             
-            # Get model names from config (default to yolov8s for better accuracy)
+            # Get model name from config (default to yolov8s for better accuracy).
+            # The pose model's boxes are the person detections - no separate
+            # person model is loaded
             pose_model_name = self.config.get('pose_model', 'yolov8s-pose.pt')
-            yolo_model_name = self.config.get('yolo_model', 'yolov8s.pt')
             
             # Get device based on USE_GPU setting
             use_gpu_setting = self.config.get('use_gpu', 'auto')
             device = get_device(use_gpu_setting)
+            self.device = device
+            self.torch_device = get_torch_device(use_gpu_setting)  # for per-frame .to() calls
+            # FP16 pose inference on CUDA (use_fp16=False keeps FP32 weights)
+            self.half = device == 'cuda' and bool(self.config.get('use_fp16', True))
             
-            print(f"🎮 Cash Detector using device: {device.upper()}")
+            print(f"🎮 Cash Detector using device: {device.upper()}{' (FP16)' if self.half else ''}")
             if device == 'cuda':
                 import torch
                 print(f"   GPU: {torch.cuda.get_device_name(0)}")
             
             # Load pose model for hand detection
             pose_model_path = models_dir / pose_model_name
-            if pose_model_path.exists():
-                self.pose_model = YOLO(str(pose_model_path))
-                self.pose_model.to(device)  # Move to GPU
+            engine_path = pose_model_path.with_suffix('.engine')
+            if device == 'cuda' and pose_model_path.exists() and (
+                    self.config.get('force_reexport', False)
+                    or (self.config.get('export_engine', False) and not engine_path.exists())):
+                self._export_pose_engine(pose_model_path)
+            if device == 'cuda' and engine_path.exists():
+                # Prefer a pre-exported TensorRT FP16 engine (manage.py export_pose_engine)
+                self.pose_model = YOLO(str(engine_path), task='pose')
+                print(f"✅ Loaded TensorRT pose engine: {engine_path}")
+            elif pose_model_path.exists():
+                self.pose_model = load_shared_yolo(pose_model_path, device, half=self.half)
                 print(f"✅ Loaded pose model: {pose_model_path} on {device}")
             else:
                 # Download if not exists
@@ -122,15 +157,6 @@ class CashTransactionDetector(BaseDetector):
                 self.pose_model.to(device)  # Move to GPU
                 print(f"✅ Downloaded and loaded pose model: {pose_model_name} on {device}")
             
-            # Load person detection model as backup
-            person_model_path = models_dir / yolo_model_name
-            if person_model_path.exists():
-                self.person_model = YOLO(str(person_model_path))
-                self.person_model.to(device)  # Move to GPU
-            else:
-                self.person_model = YOLO(yolo_model_name)
-                self.person_model.to(device)  # Move to GPU
-            
             self.is_initialized = True
             return True
             
@@ -138,6 +164,43 @@ class CashTransactionDetector(BaseDetector):
             print(f"❌ Failed to initialize CashTransactionDetector: {e}")
             return False
     
+    def _export_pose_engine(self, pose_model_path) -> bool:
+        """
+        Export the pose .pt to a TensorRT FP16 engine next to it (same as
+        manage.py export_pose_engine), for export_engine/force_reexport.
+        
+        The input size is fixed at pose_imgsz - both inference paths feed
+        letterboxed pose_imgsz squares - with a dynamic batch up to batch_size.
+        A lock file keeps concurrently starting camera workers from
+        exporting the same engine twice; the loser just uses the .pt.
+        """
+        from ultralytics import YOLO
+        
+        lock_path = pose_model_path.with_suffix('.engine.lock')
+        try:
+            lock_fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            print(f"[CashDetect] Engine export already running ({lock_path}), using {pose_model_path.name}")
+            return False
+        try:
+            print(f"[CashDetect] Exporting TensorRT engine for {pose_model_path.name} "
+                  f"(imgsz={self.pose_imgsz}, batch<={self.batch_size})...")
+            YOLO(str(pose_model_path)).export(
+                format='engine',
+                half=True,
+                dynamic=True,
+                batch=self.batch_size,
+                imgsz=self.pose_imgsz,
+                device=0,
+            )
+            return True
+        except Exception as e:
+            print(f"⚠️ TensorRT export failed, using {pose_model_path.name}: {e}")
+            return False
+        finally:
+            os.close(lock_fd)
+            os.remove(lock_path)
+    
     def update_video_dimensions(self, width: int, height: int):
         """Update video dimensions"""
         self.video_width = width
@@ -146,14 +209,17 @@ class CashTransactionDetector(BaseDetector):
     def set_cashier_zone(self, zone: List[int]):
         """Update the cashier zone [x, y, w, h]"""
         self.cashier_zone = zone
+        self._recompute_zone_cache()
     
     def set_cash_drawer_zone(self, zone: List[int]):
         """Update the cash drawer zone [x, y, w, h]"""
         self.cash_drawer_zone = zone
+        self._recompute_zone_cache()
     
     def set_hand_touch_distance(self, distance: int):
         """Update hand touch distance threshold"""
         self.hand_touch_distance = max(10, min(500, distance))
+        self._hand_touch_distance_sq = self.hand_touch_distance ** 2
     
     def set_hand_tracking_duration(self, frames: int):
         """Update hand tracking duration (frames after touch)"""
@@ -167,6 +233,46 @@ class CashTransactionDetector(BaseDetector):
         if cash_drawer_polygon:
             self.cash_drawer_zone_polygon = cash_drawer_polygon
             self.use_polygon_zones = True
+        self._recompute_zone_cache()
+    
+    def _recompute_zone_cache(self):
+        """
+        Cache the active zone polygons and their bounding boxes.
+        
+        Called whenever a zone changes, so the per-person predicates don't
+        re-validate the polygons on every call and can reject points outside
+        the bounding box without ray casting. Polygons that aren't usable
+        (polygons off, or < 3 points) are cached as None.
+        """
+        def usable(polygon):
+            return polygon if self.use_polygon_zones and polygon and len(polygon) >= 3 else None
+        
+        def bounds(polygon):
+            if polygon is None:
+                return None
+            xs = [float(p[0]) for p in polygon]
+            ys = [float(p[1]) for p in polygon]
+            return (min(xs), min(ys), max(xs), max(ys))
+        
+        self._cashier_poly = usable(self.cashier_zone_polygon)
+        self._drawer_poly = usable(self.cash_drawer_zone_polygon)
+        self._cashier_bounds = bounds(self._cashier_poly)
+        self._drawer_bounds = bounds(self._drawer_poly)
+        
+        # (M, 2) array handed to extract_people (empty = no zone)
+        if self._cashier_poly is not None:
+            self._cashier_poly_array = np.asarray(self._cashier_poly, dtype=np.float64).reshape(-1, 2)
+        else:
+            self._cashier_poly_array = np.empty((0, 2), dtype=np.float64)
+    
+    def _point_in_zone(self, point: Tuple[int, int], polygon: List, bounds: Tuple) -> bool:
+        """Bounding-box reject, then ray casting against a cached zone polygon"""
+        if polygon is None:
+            return False  # polygon-only mode
+        x, y = point
+        if x < bounds[0] or x > bounds[2] or y < bounds[1] or y > bounds[3]:
+            return False
+        return self._point_in_polygon(point, polygon)
     
     def _point_in_polygon(self, point: Tuple[int, int], polygon: List) -> bool:
         """Check if a point is inside a polygon using ray casting algorithm"""
@@ -193,19 +299,11 @@ class CashTransactionDetector(BaseDetector):
     
     def is_in_cashier_zone(self, point: Tuple[int, int]) -> bool:
         """Check if a point is inside the cashier zone (polygon only)"""
-        if self.use_polygon_zones and self.cashier_zone_polygon and len(self.cashier_zone_polygon) >= 3:
-            return self._point_in_polygon(point, self.cashier_zone_polygon)
-        
-        # No polygon defined - return False (polygon-only mode)
-        return False
+        return self._point_in_zone(point, self._cashier_poly, self._cashier_bounds)
     
     def is_in_cash_drawer_zone(self, point: Tuple[int, int]) -> bool:
         """Check if a point is inside the cash drawer zone (polygon only)"""
-        if self.use_polygon_zones and self.cash_drawer_zone_polygon and len(self.cash_drawer_zone_polygon) >= 3:
-            return self._point_in_polygon(point, self.cash_drawer_zone_polygon)
-        
-        # No polygon defined - return False (polygon-only mode)
-        return False
+        return self._point_in_zone(point, self._drawer_poly, self._drawer_bounds)
     
     def get_person_center(self, keypoints: np.ndarray, bbox: Tuple[int, int, int, int]) -> Tuple[int, int]:
         """
@@ -258,23 +356,15 @@ class CashTransactionDetector(BaseDetector):
         but polygon mode is the primary mode now.
         """
         # For polygon zones, use center point (polygon-only mode)
-        if self.use_polygon_zones and self.cashier_zone_polygon and len(self.cashier_zone_polygon) >= 3:
-            center = self.get_person_center(keypoints, bbox)
-            return self._point_in_polygon(center, self.cashier_zone_polygon)
-        
-        # No valid polygon defined - return False (polygon-only mode)
-        return False
+        if self._cashier_poly is None:
+            return False
+        return self.is_in_cashier_zone(self.get_person_center(keypoints, bbox))
     
     def is_box_in_cashier_zone(self, bbox: Tuple[int, int, int, int], threshold: float = 0.3) -> bool:
         """Check if a bounding box overlaps with cashier zone (polygon-only)"""
         # For polygon zones, check center point
-        if self.use_polygon_zones and self.cashier_zone_polygon and len(self.cashier_zone_polygon) >= 3:
-            x1, y1, x2, y2 = bbox
-            center = (int((x1 + x2) / 2), int((y1 + y2) / 2))
-            return self._point_in_polygon(center, self.cashier_zone_polygon)
-        
-        # No valid polygon defined - return False (polygon-only mode)
-        return False
+        x1, y1, x2, y2 = bbox
+        return self.is_in_cashier_zone((int((x1 + x2) / 2), int((y1 + y2) / 2)))
     
     def get_hand_positions(self, keypoints: np.ndarray, confidence_threshold: float = 0.3) -> Dict:
         """Extract hand (wrist) positions from pose keypoints"""
@@ -301,6 +391,46 @@ class CashTransactionDetector(BaseDetector):
         """Calculate Euclidean distance between two hand positions"""
         return np.sqrt((hand1[0] - hand2[0])**2 + (hand1[1] - hand2[1])**2)
     
+    def _close_hand_pairs(self, people_hands: List[Dict]) -> List[Tuple]:
+        """
+        Cashier-customer hand pairs closer than hand_touch_distance.
+        
+        Hands are split into cashier (in zone) and customer arrays and all
+        pairwise squared distances are computed in one NumPy expression, so
+        cashier-cashier / customer-customer pairs are never even compared.
+        Returns (i, j, hand1_name, hand1_pos, hand2_name, hand2_pos, distance)
+        with i < j (hand1 belongs to person i), in the same order as the old
+        nested person/hand loops.
+        """
+        cashier_hands, customer_hands = [], []  # (hand order, person idx, name, pos)
+        order = 0
+        for idx, person in enumerate(people_hands):
+            side = cashier_hands if person.get('in_cashier_zone', False) else customer_hands
+            for hand_name, hand_pos in person.get('hands', {}).items():
+                side.append((order, idx, hand_name, hand_pos))
+                order += 1
+        
+        if not cashier_hands or not customer_hands:
+            return []
+        
+        cashier_xy = np.array([h[3][:2] for h in cashier_hands], dtype=np.float64)
+        customer_xy = np.array([h[3][:2] for h in customer_hands], dtype=np.float64)
+        diff = cashier_xy[:, None, :] - customer_xy[None, :, :]
+        dist_sq = (diff * diff).sum(axis=-1)
+        rows, cols = np.nonzero(dist_sq < self._hand_touch_distance_sq)
+        
+        pairs = []
+        for r, c in zip(rows.tolist(), cols.tolist()):
+            cashier_hand, customer_hand = cashier_hands[r], customer_hands[c]
+            first, second = ((cashier_hand, customer_hand) if cashier_hand[1] < customer_hand[1]
+                             else (customer_hand, cashier_hand))
+            pairs.append((first, second, float(dist_sq[r, c])))
+        # Person pair first, then each person's hand order
+        pairs.sort(key=lambda p: (p[0][1], p[1][1], p[0][0], p[1][0]))
+        
+        return [(first[1], second[1], first[2], first[3], second[2], second[3], d2 ** 0.5)
+                for first, second, d2 in pairs]
+    
     def detect_hand_proximity(self, people_hands: List[Dict]) -> List[Dict]:
         """
         Detect when hands from CASHIER and CLIENT are close together.
@@ -313,51 +443,31 @@ class CashTransactionDetector(BaseDetector):
         """
         proximity_events = []
         
-        for i, person1 in enumerate(people_hands):
-            for j, person2 in enumerate(people_hands):
-                if i >= j:
-                    continue
-                
-                # STRICT: One must be IN zone (cashier), one must be OUTSIDE (customer)
-                p1_in = person1.get('in_cashier_zone', False)
-                p2_in = person2.get('in_cashier_zone', False)
-                
-                # XOR check: exactly one in zone, one outside
-                is_cashier_customer_pair = (p1_in and not p2_in) or (not p1_in and p2_in)
-                
-                if not is_cashier_customer_pair:
-                    # Skip: both are customers OR both are cashiers
-                    continue
-                
-                # Check all hand combinations between cashier and customer
-                for hand1_name, hand1_pos in person1.get('hands', {}).items():
-                    for hand2_name, hand2_pos in person2.get('hands', {}).items():
-                        distance = self.calculate_hand_distance(hand1_pos[:2], hand2_pos[:2])
-                        hand_confidence = min(hand1_pos[2], hand2_pos[2])
-                        
-                        # STRICT: Only accept if distance is within threshold
-                        if distance < self.hand_touch_distance:
-                            # Calculate midpoint of the hand interaction
-                            midpoint = (
-                                (hand1_pos[0] + hand2_pos[0]) // 2,
-                                (hand1_pos[1] + hand2_pos[1]) // 2
-                            )
-                            
-                            # Calculate score based on distance (closer = higher score)
-                            distance_score = max(0, 1 - (distance / self.hand_touch_distance))
-                            
-                            proximity_events.append({
-                                'person1_idx': i,
-                                'person2_idx': j,
-                                'person1_role': 'cashier' if p1_in else 'client',
-                                'person2_role': 'cashier' if p2_in else 'client',
-                                'hand1': hand1_name,
-                                'hand2': hand2_name,
-                                'distance': distance,
-                                'midpoint': midpoint,
-                                'confidence': hand_confidence,
-                                'distance_score': distance_score
-                            })
+        for i, j, hand1_name, hand1_pos, hand2_name, hand2_pos, distance in self._close_hand_pairs(people_hands):
+            p1_in = people_hands[i].get('in_cashier_zone', False)
+            p2_in = people_hands[j].get('in_cashier_zone', False)
+            
+            # Calculate midpoint of the hand interaction
+            midpoint = (
+                (hand1_pos[0] + hand2_pos[0]) // 2,
+                (hand1_pos[1] + hand2_pos[1]) // 2
+            )
+            
+            # Calculate score based on distance (closer = higher score)
+            distance_score = max(0, 1 - (distance / self.hand_touch_distance))
+            
+            proximity_events.append({
+                'person1_idx': i,
+                'person2_idx': j,
+                'person1_role': 'cashier' if p1_in else 'client',
+                'person2_role': 'cashier' if p2_in else 'client',
+                'hand1': hand1_name,
+                'hand2': hand2_name,
+                'distance': distance,
+                'midpoint': midpoint,
+                'confidence': min(hand1_pos[2], hand2_pos[2]),
+                'distance_score': distance_score
+            })
         
         return proximity_events
     
@@ -377,47 +487,249 @@ class CashTransactionDetector(BaseDetector):
         
         This ensures we only detect REAL cash transactions.
         """
-        detections = []
-        
         if not self.is_initialized:
-            return detections
+            return []
         
+        # Nothing can fire during the post-detection cooldown, so don't
+        # pay for pose inference on those frames
+        if self._in_cooldown():
+            self._skip_cooldown_frame()
+            return []
+        
+        letterbox = None
         try:
-            self.frame_count += 1
+            # Run pose estimation
+            if self.device == 'cuda':
+                # Stage through the pinned buffer as a batch of one: the
+                # uint8 H2D copy is async instead of Ultralytics copying a
+                # pageable float tensor synchronously
+                batch, letterbox = self._preprocess_batch([frame])
+                results = self.pose_model(batch, verbose=False, conf=self.pose_confidence, half=self.half)
+            else:
+                results = self.pose_model(frame, verbose=False, conf=self.pose_confidence, half=self.half,
+                                          imgsz=self.pose_imgsz)
+        except Exception as e:
+            print(f"⚠️ Cash detection error: {e}")
+            return []
+        
+        result = results[0] if results and len(results) > 0 else None
+        return self._process_pose_result(frame, result, letterbox, self._fetch_pose_arrays([result])[0])
+    
+    def detect_batch(self, frames: List[np.ndarray]) -> List[Tuple[List[Detection], Dict]]:
+        """
+        Batched variant of detect() for offline video processing.
+        
+        Runs ONE pose inference call over all frames (Ultralytics accepts a
+        list of images), then replays the two-step state machine per frame
+        in order. Returns a (detections, debug_info) tuple for every frame.
+        """
+        if not self.is_initialized or not frames:
+            return [([], {}) for _ in frames]
+        
+        # Whole batch inside the cooldown window - skip the inference call
+        if self._in_cooldown(len(frames)):
+            outputs = []
+            for _ in frames:
+                self._skip_cooldown_frame()
+                outputs.append(([], self.last_detection_debug))
+            return outputs
+        
+        letterbox = None
+        try:
+            if all(f.shape == frames[0].shape for f in frames):
+                # Fixed-resolution batch: letterbox once into a BCHW tensor so
+                # Ultralytics skips its per-image preprocessing
+                batch, letterbox = self._preprocess_batch(frames)
+                results = self.pose_model(batch, verbose=False, conf=self.pose_confidence, half=self.half)
+            else:
+                results = self.pose_model(list(frames), verbose=False, conf=self.pose_confidence, half=self.half,
+                                          imgsz=self.pose_imgsz)
+        except Exception as e:
+            print(f"⚠️ Cash batch detection error: {e}")
+            return [([], {}) for _ in frames]
+        
+        outputs = []
+        arrays = self._fetch_pose_arrays(results)
+        for frame, result, pose_arrays in zip(frames, results, arrays):
+            self.last_detection_debug = {}
+            detections = self._process_pose_result(frame, result, letterbox, pose_arrays)
+            outputs.append((detections, self.last_detection_debug))
+        return outputs
+    
+    def skip_frame(self):
+        """
+        Account for a process_frame() call the caller skipped (e.g. static scene).
+        
+        Advances the frame counter - and the touch-tracking timeout while a
+        transaction is pending - exactly as process_frame() on a frame with no
+        people would: +1 from BaseDetector.process_frame, +frame_stride from
+        _process_pose_result.
+        """
+        self.frame_count += 1 + self.frame_stride
+        if self.tracking_cashier_hands:
+            self.frames_since_touch += self.frame_stride
+            if self.frames_since_touch > self.hand_tracking_duration:
+                self._reset_tracking("Frames skipped - timeout")
+    
+    def _in_cooldown(self, num_frames: int = 1) -> bool:
+        """True if the next num_frames frames all fall in the post-detection cooldown"""
+        if self.tracking_cashier_hands:
+            return False
+        last_frame = self.frame_count + self.frame_stride * num_frames
+        return last_frame - self.last_transaction_frame <= self.transaction_cooldown
+    
+    def _skip_cooldown_frame(self):
+        """Advance one frame without inference while in cooldown"""
+        self.frame_count += self.frame_stride
+        self.last_detection_debug = {
+            'people': [],
+            'transaction_events': [],
+            'num_people': 0,
+            'num_cashier': 0,
+            'num_client': 0,
+            'state': 'COOLDOWN'
+        }
+    
+    def _letterbox_params(self, h: int, w: int) -> Tuple:
+        """Resize/pad geometry for fitting (h, w) into pose_imgsz, cached per resolution"""
+        if self._letterbox_cache is None or self._letterbox_cache[0] != (h, w):
+            size = self.pose_imgsz
+            scale = min(size / h, size / w)
+            new_w, new_h = int(round(w * scale)), int(round(h * scale))
+            pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+            self._letterbox_cache = ((h, w), scale, new_w, new_h, pad_x, pad_y)
+        return self._letterbox_cache[1:]
+    
+    def _preprocess_batch(self, frames: List[np.ndarray]):
+        """
+        Build a contiguous (B, 3, S, S) float tensor from same-sized BGR frames.
+        
+        Returns the tensor and (scale, pad_x, pad_y) for mapping results back
+        to frame coordinates.
+        """
+        import torch
+        
+        h, w = frames[0].shape[:2]
+        scale, new_w, new_h, pad_x, pad_y = self._letterbox_params(h, w)
+        size = self.pose_imgsz
+        shape = (len(frames), size, size, 3)
+        
+        if self.device == 'cuda':
+            # Reuse a page-locked staging buffer so the H2D copy is async
+            if self._pinned_batch is None or tuple(self._pinned_batch.shape) != shape:
+                self._pinned_batch = torch.empty(shape, dtype=torch.uint8).pin_memory()
+            host = self._pinned_batch
+            batch = host.numpy()
+            batch.fill(114)
+        else:
+            batch = np.full(shape, 114, dtype=np.uint8)
+        
+        for i, frame in enumerate(frames):
+            batch[i, pad_y:pad_y + new_h, pad_x:pad_x + new_w] = cv2.resize(
+                frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        
+        if self.device == 'cuda':
+            # Copy raw uint8 (4x fewer bytes than float), then BGR->RGB,
+            # BHWC->BCHW and normalize on the GPU
+            tensor = host.to(self.torch_device, non_blocking=True)
+            tensor = tensor.flip(-1).permute(0, 3, 1, 2).contiguous().float() / 255.0
+            return tensor, (scale, pad_x, pad_y)
+        
+        # BGR->RGB, BHWC->BCHW in one contiguous copy
+        batch = np.ascontiguousarray(batch[..., ::-1].transpose(0, 3, 1, 2))
+        tensor = torch.from_numpy(batch).float() / 255.0
+        return tensor, (scale, pad_x, pad_y)
+    
+    def _fetch_pose_arrays(self, results) -> List[Optional[Tuple[np.ndarray, np.ndarray]]]:
+        """
+        Copy keypoints and boxes of every result to host numpy arrays.
+        
+        On CUDA all device-to-host copies are queued non-blocking (into
+        pinned memory) and waited on once, instead of one synchronous
+        .cpu() round trip per tensor. None for results without people data.
+        """
+        pending = []
+        for result in results:
+            if result is None or result.keypoints is None or result.boxes is None:
+                pending.append(None)
+            elif self.device == 'cuda':
+                pending.append((result.keypoints.data.to('cpu', non_blocking=True),
+                                result.boxes.xyxy.to('cpu', non_blocking=True)))
+            else:
+                pending.append((result.keypoints.data.cpu(), result.boxes.xyxy.cpu()))
+        
+        if self.device == 'cuda' and any(p is not None for p in pending):
+            import torch
+            torch.cuda.current_stream(self.torch_device).synchronize()
+        
+        return [None if p is None else (p[0].numpy(), p[1].numpy()) for p in pending]
+    
+    def _process_pose_result(self, frame: np.ndarray, result, letterbox: Tuple = None,
+                             pose_arrays: Tuple = None) -> List[Detection]:
+        """Run the two-step transaction logic on one frame's pose result"""
+        detections = []
+        
+        try:
+            self.frame_count += self.frame_stride
             
             # Update video dimensions from frame
             h, w = frame.shape[:2]
             if w != self.video_width or h != self.video_height:
                 self.update_video_dimensions(w, h)
             
-            # Run pose estimation
-            results = self.pose_model(frame, verbose=False, conf=self.pose_confidence)
-            
-            if not results or len(results) == 0:
+            if result is None:
                 # No people detected - check if we should timeout pending transaction
                 if self.tracking_cashier_hands:
-                    self.frames_since_touch += 1
+                    self.frames_since_touch += self.frame_stride
                     if self.frames_since_touch > self.hand_tracking_duration:
                         self._reset_tracking("No people detected - timeout")
                 return detections
             
-            result = results[0]
-            
             # Extract people and their hand positions
             people_hands = []
             cashier_zone_people = []
             customer_zone_people = []
             debug_people = []
             
-            if result.keypoints is not None and result.boxes is not None:
-                keypoints_data = result.keypoints.data.cpu().numpy()
-                boxes = result.boxes.xyxy.cpu().numpy()
+            if pose_arrays is None and result.keypoints is not None and result.boxes is not None:
+                pose_arrays = self._fetch_pose_arrays([result])[0]
+            
+            if pose_arrays is not None:
+                keypoints_data, boxes = pose_arrays
+                
+                if letterbox is not None:
+                    # Map letterboxed coordinates back to the original frame
+                    scale, pad_x, pad_y = letterbox
+                    keypoints_data[..., 0] = (keypoints_data[..., 0] - pad_x) / scale
+                    keypoints_data[..., 1] = (keypoints_data[..., 1] - pad_y) / scale
+                    boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad_x) / scale
+                    boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad_y) / scale
+                
+                # Centers, zone flags and wrists for everyone in one compiled pass
+                people = None
+                if keypoints_data.ndim == 3 and keypoints_data.shape[1] > 12 and keypoints_data.shape[2] >= 3:
+                    people = extract_people(
+                        np.ascontiguousarray(keypoints_data, dtype=np.float64),
+                        np.ascontiguousarray(boxes, dtype=np.float64),
+                        self._cashier_poly_array,
+                        0.3
+                    )
                 
                 for idx, (kpts, box) in enumerate(zip(keypoints_data, boxes)):
                     bbox = tuple(map(int, box))
-                    hands = self.get_hand_positions(kpts)
-                    center = self.get_person_center(kpts, bbox)
-                    in_zone = self.is_person_in_cashier_zone(kpts, bbox)
+                    if people is not None:
+                        centers, in_zones, wrists, wrist_ok = people
+                        hands = {}
+                        for k, hand_name in enumerate(('left', 'right')):
+                            if wrist_ok[idx, k]:
+                                wx, wy, wc = wrists[idx, k]
+                                hands[hand_name] = (int(wx), int(wy), float(wc))
+                        center = (int(centers[idx, 0]), int(centers[idx, 1]))
+                        in_zone = bool(in_zones[idx])
+                    else:
+                        hands = self.get_hand_positions(kpts)
+                        center = self.get_person_center(kpts, bbox)
+                        in_zone = self.is_person_in_cashier_zone(kpts, bbox)
                     
                     person_info = {
                         'idx': idx,
@@ -453,7 +765,7 @@ class CashTransactionDetector(BaseDetector):
             # ==================== STEP 2: CHECK CASH DRAWER DEPOSIT ====================
             # If we're tracking after a touch, check if cashier's hand goes to drawer
             if self.tracking_cashier_hands and self.pending_transaction:
-                self.frames_since_touch += 1
+                self.frames_since_touch += self.frame_stride
                 
                 # Check timeout
                 if self.frames_since_touch > self.hand_tracking_duration:
@@ -568,52 +880,37 @@ class CashTransactionDetector(BaseDetector):
         """
         touch_events = []
         
-        for i, person1 in enumerate(people_hands):
-            for j, person2 in enumerate(people_hands):
-                if i >= j:
-                    continue
-                
-                p1_in = person1.get('in_cashier_zone', False)
-                p2_in = person2.get('in_cashier_zone', False)
-                
-                # Must be exactly one cashier + one customer
-                if not ((p1_in and not p2_in) or (not p1_in and p2_in)):
-                    continue
-                
-                # Check all hand combinations
-                for hand1_name, hand1_pos in person1.get('hands', {}).items():
-                    for hand2_name, hand2_pos in person2.get('hands', {}).items():
-                        distance = self.calculate_hand_distance(hand1_pos[:2], hand2_pos[:2])
-                        
-                        if distance < self.hand_touch_distance:
-                            midpoint = (
-                                (hand1_pos[0] + hand2_pos[0]) // 2,
-                                (hand1_pos[1] + hand2_pos[1]) // 2
-                            )
-                            
-                            # Identify cashier and customer
-                            if p1_in:
-                                cashier_idx, customer_idx = i, j
-                                cashier_hand, customer_hand = hand1_name, hand2_name
-                            else:
-                                cashier_idx, customer_idx = j, i
-                                cashier_hand, customer_hand = hand2_name, hand1_name
-                            
-                            touch_events.append({
-                                'cashier_idx': cashier_idx,
-                                'customer_idx': customer_idx,
-                                'person1_idx': i,
-                                'person2_idx': j,
-                                'person1_role': 'cashier' if p1_in else 'client',
-                                'person2_role': 'cashier' if p2_in else 'client',
-                                'cashier_hand': cashier_hand,
-                                'customer_hand': customer_hand,
-                                'hand1': hand1_name,
-                                'hand2': hand2_name,
-                                'distance': distance,
-                                'midpoint': midpoint,
-                                'confidence': min(hand1_pos[2], hand2_pos[2])
-                            })
+        for i, j, hand1_name, hand1_pos, hand2_name, hand2_pos, distance in self._close_hand_pairs(people_hands):
+            p1_in = people_hands[i].get('in_cashier_zone', False)
+            
+            midpoint = (
+                (hand1_pos[0] + hand2_pos[0]) // 2,
+                (hand1_pos[1] + hand2_pos[1]) // 2
+            )
+            
+            # Identify cashier and customer
+            if p1_in:
+                cashier_idx, customer_idx = i, j
+                cashier_hand, customer_hand = hand1_name, hand2_name
+            else:
+                cashier_idx, customer_idx = j, i
+                cashier_hand, customer_hand = hand2_name, hand1_name
+            
+            touch_events.append({
+                'cashier_idx': cashier_idx,
+                'customer_idx': customer_idx,
+                'person1_idx': i,
+                'person2_idx': j,
+                'person1_role': 'cashier' if p1_in else 'client',
+                'person2_role': 'client' if p1_in else 'cashier',
+                'cashier_hand': cashier_hand,
+                'customer_hand': customer_hand,
+                'hand1': hand1_name,
+                'hand2': hand2_name,
+                'distance': distance,
+                'midpoint': midpoint,
+                'confidence': min(hand1_pos[2], hand2_pos[2])
+            })
         
         return touch_events
     
@@ -669,7 +966,15 @@ class CashTransactionDetector(BaseDetector):
         self.pending_transaction = None
         self.tracking_cashier_hands = False
         self.frames_since_touch = 0
-        self.cashier_hand_history.clear()
+        self.cashier_hand_history = deque(maxlen=30)  # Fresh deque, no O(n) clear
+    
+    def reset(self):
+        """Reset detector state, including any in-progress two-step tracking"""
+        super().reset()
+        self._reset_tracking()
+        self.touch_frame = -1
+        self.last_transaction_frame = -100
+        self.last_detection_debug = {}
     
     def draw_cashier_zone(self, frame: np.ndarray) -> np.ndarray:
         """Draw the cashier zone overlay on frame - POLYGON ONLY"""
@@ -705,7 +1010,8 @@ class CashTransactionDetector(BaseDetector):
         
         try:
             # Run pose estimation
-            results = self.pose_model(frame, verbose=False, conf=self.pose_confidence)
+            results = self.pose_model(frame, verbose=False, conf=self.pose_confidence, half=self.half,
+                                      imgsz=self.pose_imgsz)
             
             if not results or len(results) == 0:
                 return frame
@@ -771,10 +1077,11 @@ class CashTransactionDetector(BaseDetector):
                             # Calculate distance
                             dx = hand1_pos[0] - hand2_pos[0]
                             dy = hand1_pos[1] - hand2_pos[1]
-                            distance = int(np.sqrt(dx*dx + dy*dy))
+                            dist_sq = dx*dx + dy*dy
+                            distance = int(math.sqrt(dist_sq))
                             
                             # Color based on detection validity
-                            is_close = distance < self.hand_touch_distance
+                            is_close = dist_sq < self._hand_touch_distance_sq
                             
                             if is_close and is_valid_pair:
                                 # VALID: Cashier-client close hands - GREEN
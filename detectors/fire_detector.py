@@ -31,6 +31,7 @@ class FireDetector(BaseDetector):
         
         self.yolo_model = None
         self.use_yolo = True  # Try YOLO first
+        self.half = False  # FP16 inference (CUDA only)
         
         # Detection parameters - STRICT thresholds
         self.fire_confidence = config.get('fire_confidence', 0.70)
@@ -73,12 +74,22 @@ class FireDetector(BaseDetector):
         
         self.is_initialized = False
         
+    def reset(self):
+        """Reset detector state - swap in fresh history buffers"""
+        super().reset()
+        self.consecutive_fire = 0
+        self.consecutive_smoke = 0
+        self.last_fire_frame = -100
+        self.frame_history = deque(maxlen=10)
+        self.fire_mask_history = deque(maxlen=10)
+        self._last_flicker = 0.0
+    
     def initialize(self) -> bool:
         """Initialize the detector - use trained fire/smoke YOLO model"""
         try:
             from ultralytics import YOLO
             from pathlib import Path
-            from . import get_device
+            from . import get_device, load_shared_yolo
             
             # Get device based on USE_GPU setting
             use_gpu_setting = self.config.get('use_gpu', 'auto')
@@ -96,9 +107,16 @@ class FireDetector(BaseDetector):
             
             # Try to load the trained fire/smoke detection model first
             fire_model_path = models_dir / fire_model_name
-            if fire_model_path.exists():
-                self.yolo_model = YOLO(str(fire_model_path))
-                self.yolo_model.to(device)  # Move to GPU
+            engine_path = fire_model_path.with_suffix('.engine')
+            self.half = device == 'cuda'
+            if device == 'cuda' and engine_path.exists():
+                # Prefer a pre-exported TensorRT FP16 engine (manage.py export_pose_engine --model ...)
+                self.yolo_model = YOLO(str(engine_path), task='detect')
+                self.use_yolo = True
+                print(f"[OK] Fire detector loaded TensorRT engine: {engine_path}")
+                self.fire_classes = self.yolo_model.names
+            elif fire_model_path.exists():
+                self.yolo_model = load_shared_yolo(fire_model_path, device)
                 self.use_yolo = True
                 print(f"[OK] Fire detector loaded: {fire_model_path} on {device}")
                 
@@ -261,7 +279,7 @@ class FireDetector(BaseDetector):
         
         return smoke_regions
     
-    def detect(self, frame: np.ndarray) -> List[Detection]:
+    def detect(self, frame: np.ndarray, inference_input: Tuple = None) -> List[Detection]:
         """Detect fire and smoke in the frame using YOLO or color-based fallback"""
         detections = []
         
@@ -271,7 +289,7 @@ class FireDetector(BaseDetector):
         try:
             # Use YOLO fire/smoke model if available (PRIMARY METHOD - most accurate)
             if self.use_yolo and self.yolo_model is not None:
-                return self.detect_with_yolo(frame)
+                return self.detect_with_yolo(frame, inference_input)
             
             # Fallback to color-based detection
             return self.detect_with_color(frame)
@@ -280,13 +298,14 @@ class FireDetector(BaseDetector):
             print(f"[WARNING] Fire detection error: {e}")
             return detections
     
-    def detect_with_yolo(self, frame: np.ndarray) -> List[Detection]:
+    def detect_with_yolo(self, frame: np.ndarray, inference_input: Tuple = None) -> List[Detection]:
         """Detect fire and smoke using trained YOLO model"""
         detections = []
         
         try:
-            # Run YOLO inference
-            results = self.yolo_model(frame, verbose=False, conf=0.25)
+            # Run YOLO inference (on the shared downscaled copy if given)
+            model_frame, scale = inference_input or (frame, 1.0)
+            results = self.yolo_model(model_frame, verbose=False, conf=0.25, half=self.half)
             
             if not results or len(results) == 0:
                 self.consecutive_fire = max(0, self.consecutive_fire - 1)
@@ -300,6 +319,8 @@ class FireDetector(BaseDetector):
             
             if result.boxes is not None and len(result.boxes) > 0:
                 boxes = result.boxes.xyxy.cpu().numpy()
+                if scale != 1.0:
+                    boxes *= scale  # back to full-frame pixels
                 confidences = result.boxes.conf.cpu().numpy()
                 classes = result.boxes.cls.cpu().numpy()
                 
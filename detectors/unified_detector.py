@@ -9,6 +9,7 @@ import numpy as np
 from typing import List, Dict, Optional
 from datetime import datetime
 from pathlib import Path
+from collections import deque
 
 from .base_detector import Detection
 from .cash_detector import CashTransactionDetector
@@ -51,18 +52,36 @@ class UnifiedDetector:
         # GPU/CPU setting - passed to all sub-detectors
         use_gpu = self.config.get('use_gpu', 'auto')
         
+        # Long side the violence/fire models see. They letterbox to 640 anyway,
+        # so the frame is downscaled once here instead of once per model
+        self.detection_resolution = self.config.get('detection_resolution', 640)
+        
+        # Motion gate for live streams: skip cash/violence inference while the
+        # scene is static. Ratio of changed pixels (in an 80x45 grayscale
+        # thumbnail) needed to run the models; 0 disables the gate
+        self.motion_gate_ratio = self.config.get('motion_gate_ratio', 0)
+        self._motion_reference = None
+        self._static_ticks = 0
+        
         # Initialize individual detectors with model names and GPU setting
         self.cash_detector = CashTransactionDetector({
             'models_dir': models_dir,
             'pose_model': cash_pose_model,  # Use full pose model for accurate hand tracking
-            'yolo_model': cash_pose_model,  # Fallback to pose model
             'use_gpu': use_gpu,
+            'use_fp16': self.config.get('use_fp16', True),  # FP16 pose inference on CUDA
+            'pose_imgsz': self.config.get('pose_imgsz', 640),
+            # Max frames per detect_batch() call - also the TensorRT engine's max batch
+            'batch_size': self.config.get('batch_size', 16),
+            # Build the TensorRT pose engine at startup if missing (or always, to rebuild)
+            'export_engine': self.config.get('export_engine', False),
+            'force_reexport': self.config.get('force_reexport', False),
             'cashier_zone': self.config.get('cashier_zone', [100, 100, 400, 300]),
             'hand_touch_distance': self.config.get('hand_touch_distance', 100),
             'pose_confidence': self.config.get('pose_confidence', 0.5),
             'min_transaction_frames': self.config.get('min_transaction_frames', 1),
             'cash_confidence': self.config.get('cash_confidence', 0.5),
             'show_pose_overlay': self.config.get('show_pose_overlay', False),
+            'frame_stride': self.config.get('frame_stride', 1),
         })
         
         self.violence_detector = ViolenceDetector({
@@ -86,10 +105,13 @@ class UnifiedDetector:
         # Detection state
         self.is_initialized = False
         self.frame_count = 0
-        self.all_detections: List[Detection] = []
+        # Bounded history - running counters keep the summary totals exact
+        self.all_detections = deque(maxlen=1000)
+        self.total_detections = 0
+        self.detection_counts = {'CASH': 0, 'VIOLENCE': 0, 'FIRE': 0}
         
-        # Alert tracking
-        self.alerts_history: List[Dict] = []
+        # Alert tracking (last 100 alerts)
+        self.alerts_history = deque(maxlen=100)
         self.alert_callbacks = []
         
         # Detection toggles
@@ -168,11 +190,7 @@ class UnifiedDetector:
             'frame_number': self.frame_count
         }
         
-        self.alerts_history.append(alert_info)
-        
-        # Keep only last 100 alerts
-        if len(self.alerts_history) > 100:
-            self.alerts_history = self.alerts_history[-50:]
+        self.alerts_history.append(alert_info)  # deque drops the oldest
         
         # Call registered callbacks
         for callback in self.alert_callbacks:
@@ -211,17 +229,30 @@ class UnifiedDetector:
         all_detections = []
         new_alerts = []
         
+        # Static scene - people-based detectors have nothing new to see.
+        # Fire still runs (a fire can grow slowly enough to look static)
+        motion = self._has_motion(frame)
+        
+        # One shared downscale for the violence/fire models; cash keeps the
+        # full frame (it letterboxes itself and needs precise hand positions)
+        inference_input = None
+        if (self.detect_violence and motion) or self.detect_fire:
+            inference_input = self._inference_input(frame)
+        
         # Run all enabled detectors
-        if self.detect_cash:
+        if self.detect_cash and motion:
             cash_detections = self.cash_detector.process_frame(frame)
             all_detections.extend(cash_detections)
+        elif self.detect_cash:
+            # Keep the touch -> drawer timeout counting in video frames
+            self.cash_detector.skip_frame()
         
-        if self.detect_violence:
-            violence_detections = self.violence_detector.process_frame(frame)
+        if self.detect_violence and motion:
+            violence_detections = self.violence_detector.process_frame(frame, inference_input)
             all_detections.extend(violence_detections)
         
         if self.detect_fire:
-            fire_detections = self.fire_detector.process_frame(frame)
+            fire_detections = self.fire_detector.process_frame(frame, inference_input)
             all_detections.extend(fire_detections)
         
         # Trigger alerts for new detections
@@ -234,14 +265,50 @@ class UnifiedDetector:
             frame = self.draw_overlays(frame, all_detections)
         
         self.all_detections.extend(all_detections)
+        self.total_detections += len(all_detections)
+        for det in all_detections:
+            if det.label in self.detection_counts:
+                self.detection_counts[det.label] += 1
         
         return {
             'frame': frame,
             'detections': [d.to_dict() for d in all_detections],
             'alerts': new_alerts,
-            'frame_number': self.frame_count
+            'frame_number': self.frame_count,
+            'motion_skipped': not motion,
         }
     
+    def _has_motion(self, frame: np.ndarray) -> bool:
+        """Cheap motion check against the last frame the models actually saw"""
+        if not self.motion_gate_ratio:
+            return True
+        
+        # Downscale first - converting 3600 pixels is cheaper than 2M
+        small = cv2.cvtColor(cv2.resize(frame, (80, 45), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        reference = self._motion_reference
+        if reference is not None and self._static_ticks < 30:
+            changed = np.count_nonzero(cv2.absdiff(small, reference) > 12)
+            if changed < self.motion_gate_ratio * small.size:
+                self._static_ticks += 1
+                return False
+        
+        # Compare against the last processed frame (not just the previous
+        # tick) so slow movement still accumulates into a trigger; a forced
+        # run every 30 static ticks keeps the trackers from going stale
+        self._motion_reference = small
+        self._static_ticks = 0
+        return True
+    
+    def _inference_input(self, frame: np.ndarray) -> Optional[tuple]:
+        """Downscale a frame to detection_resolution, returning (small_frame, scale back to full size)"""
+        h, w = frame.shape[:2]
+        long_side = max(h, w)
+        if not self.detection_resolution or long_side <= self.detection_resolution:
+            return None
+        scale = self.detection_resolution / long_side
+        small = cv2.resize(frame, (int(round(w * scale)), int(round(h * scale))), interpolation=cv2.INTER_AREA)
+        return small, long_side / self.detection_resolution
+    
     def draw_overlays(self, frame: np.ndarray, detections: List[Detection]) -> np.ndarray:
         """Draw all detection overlays on frame"""
         # Draw cashier zone only if show_zone_overlay is enabled (hidden by default)
@@ -364,26 +431,20 @@ class UnifiedDetector:
         """Get summary of all detections"""
         summary = {
             'total_frames': self.frame_count,
-            'total_detections': len(self.all_detections),
-            'by_type': {
-                'CASH': 0,
-                'VIOLENCE': 0,
-                'FIRE': 0
-            },
-            'recent_alerts': self.alerts_history[-10:]
+            'total_detections': self.total_detections,
+            'by_type': dict(self.detection_counts),
+            'recent_alerts': list(self.alerts_history)[-10:]
         }
         
-        for det in self.all_detections:
-            if det.label in summary['by_type']:
-                summary['by_type'][det.label] += 1
-        
         return summary
     
     def reset(self):
         """Reset all detectors"""
         self.frame_count = 0
-        self.all_detections = []
-        self.alerts_history = []
+        self.all_detections = deque(maxlen=1000)
+        self.total_detections = 0
+        self.detection_counts = {'CASH': 0, 'VIOLENCE': 0, 'FIRE': 0}
+        self.alerts_history = deque(maxlen=100)
         
         self.cash_detector.reset()
         self.violence_detector.reset()
@@ -39,6 +39,7 @@ class ViolenceDetector(BaseDetector):
     def __init__(self, config: Dict = None):
         super().__init__(config)
         self.pose_model = None
+        self.half = False  # FP16 inference (CUDA only)
         
         # Detection parameters - EXTREMELY strict to reduce false positives
         self.violence_confidence = config.get('violence_confidence', 0.85)
@@ -46,7 +47,9 @@ class ViolenceDetector(BaseDetector):
         self.motion_threshold = config.get('motion_threshold', 150)  # Very high motion
         
         # Cashier zone exclusion (normal transactions shouldn't trigger violence)
-        self.cashier_zone = config.get('cashier_zone', None)
+        self.cashier_zone = None
+        self._zone_xyxy = None  # packed int32 [x1, y1, x2, y2] for vectorized tests
+        self.set_cashier_zone(config.get('cashier_zone', None))
         
         # Tracking state
         self.previous_keypoints = {}
@@ -55,8 +58,8 @@ class ViolenceDetector(BaseDetector):
         self.last_violence_frame = -100
         self.violence_cooldown = 150  # Long cooldown between alerts
         
-        # Motion history per person
-        self.person_motion_history = {}  # person_id -> deque of motion values
+        # Motion history per person (keyed by detection index, an int)
+        self.person_motion_history = {}  # person_idx -> deque of motion values
         
         # Keypoint indices (COCO format)
         self.NOSE = 0
@@ -74,7 +77,7 @@ class ViolenceDetector(BaseDetector):
         try:
             from ultralytics import YOLO
             from pathlib import Path
-            from . import get_device
+            from . import get_device, load_shared_yolo
             
             # Get device based on USE_GPU setting
             use_gpu_setting = self.config.get('use_gpu', 'auto')
@@ -91,9 +94,14 @@ class ViolenceDetector(BaseDetector):
             pose_model_name = self.config.get('pose_model', 'yolov8s-pose.pt')
             
             pose_model_path = models_dir / pose_model_name
-            if pose_model_path.exists():
-                self.pose_model = YOLO(str(pose_model_path))
-                self.pose_model.to(device)  # Move to GPU
+            engine_path = pose_model_path.with_suffix('.engine')
+            self.half = device == 'cuda'
+            if device == 'cuda' and engine_path.exists():
+                # Prefer a pre-exported TensorRT FP16 engine (manage.py export_pose_engine)
+                self.pose_model = YOLO(str(engine_path), task='pose')
+                print(f"[OK] Violence detector loaded TensorRT engine: {engine_path}")
+            elif pose_model_path.exists():
+                self.pose_model = load_shared_yolo(pose_model_path, device)
                 print(f"[OK] Violence detector loaded pose model: {pose_model_path} on {device}")
             else:
                 self.pose_model = YOLO(pose_model_name)
@@ -108,9 +116,33 @@ class ViolenceDetector(BaseDetector):
             print(f"[ERROR] Failed to initialize ViolenceDetector: {e}")
             return False
     
+    def reset(self):
+        """Reset detector state - swap in fresh dicts rather than clearing in place"""
+        super().reset()
+        self.previous_keypoints = {}
+        self.previous_positions = {}
+        self.person_motion_history = {}
+        self.consecutive_violence = 0
+        self.last_violence_frame = -100
+    
     def set_cashier_zone(self, zone: List[int]):
         """Set cashier zone for exclusion from violence detection"""
         self.cashier_zone = zone
+        if zone is None:
+            self._zone_xyxy = None
+        else:
+            zx, zy, zw, zh = zone
+            self._zone_xyxy = np.array([zx, zy, zx + zw, zy + zh], dtype=np.int32)
+    
+    def bboxes_in_cashier_zone(self, boxes: np.ndarray) -> np.ndarray:
+        """Vectorized is_in_cashier_zone over an (N, 4) xyxy array - bool mask of centers in zone"""
+        if self._zone_xyxy is None or len(boxes) == 0:
+            return np.zeros(len(boxes), dtype=bool)
+        boxes = boxes.astype(np.int32, copy=False)
+        cx = (boxes[:, 0] + boxes[:, 2]) // 2
+        cy = (boxes[:, 1] + boxes[:, 3]) // 2
+        z = self._zone_xyxy
+        return (cx >= z[0]) & (cx <= z[2]) & (cy >= z[1]) & (cy <= z[3])
     
     def is_in_cashier_zone(self, bbox: Tuple[int, int, int, int]) -> bool:
         """Check if bounding box is mostly inside cashier zone"""
@@ -234,7 +266,7 @@ class ViolenceDetector(BaseDetector):
         
         return altercations
     
-    def detect(self, frame: np.ndarray) -> List[Detection]:
+    def detect(self, frame: np.ndarray, inference_input: Tuple = None) -> List[Detection]:
         """
         Detect violence in the frame
         
@@ -250,8 +282,9 @@ class ViolenceDetector(BaseDetector):
             return detections
         
         try:
-            # Run pose estimation
-            results = self.pose_model(frame, verbose=False)
+            # Run pose estimation (on the shared downscaled copy if given)
+            model_frame, scale = inference_input or (frame, 1.0)
+            results = self.pose_model(model_frame, verbose=False, half=self.half)
             
             if not results or len(results) == 0:
                 self.consecutive_violence = max(0, self.consecutive_violence - 2)
@@ -263,26 +296,31 @@ class ViolenceDetector(BaseDetector):
             if result.keypoints is not None and result.boxes is not None:
                 keypoints_data = result.keypoints.data.cpu().numpy()
                 boxes = result.boxes.xyxy.cpu().numpy()
+                if scale != 1.0:
+                    # Back to full-frame pixels so zones and motion thresholds keep their meaning
+                    keypoints_data[..., :2] *= scale
+                    boxes *= scale
+                # One NumPy pass for every person's cashier zone check
+                in_zone_mask = self.bboxes_in_cashier_zone(boxes)
                 
                 for idx, (kpts, box) in enumerate(zip(keypoints_data, boxes)):
                     bbox = tuple(map(int, box))
-                    person_id = f"person_{idx}"
                     
                     # Calculate motion from previous frame
                     current_motion = 0.0
-                    if person_id in self.previous_keypoints:
-                        current_motion = self.calculate_motion(kpts, self.previous_keypoints[person_id])
-                    self.previous_keypoints[person_id] = kpts.copy()
+                    if idx in self.previous_keypoints:
+                        current_motion = self.calculate_motion(kpts, self.previous_keypoints[idx])
+                    self.previous_keypoints[idx] = kpts.copy()
                     
                     # Track motion history for this person (average over last 5 frames)
-                    if person_id not in self.person_motion_history:
-                        self.person_motion_history[person_id] = deque(maxlen=5)
-                    self.person_motion_history[person_id].append(current_motion)
+                    if idx not in self.person_motion_history:
+                        self.person_motion_history[idx] = deque(maxlen=5)
+                    self.person_motion_history[idx].append(current_motion)
                     
-                    avg_motion = np.mean(self.person_motion_history[person_id]) if self.person_motion_history[person_id] else 0
+                    avg_motion = np.mean(self.person_motion_history[idx]) if self.person_motion_history[idx] else 0
                     
                     # Check if in cashier zone
-                    in_cashier = self.is_in_cashier_zone(bbox)
+                    in_cashier = bool(in_zone_mask[idx])
                     
                     person_info = {
                         'idx': idx,
@@ -295,7 +333,7 @@ class ViolenceDetector(BaseDetector):
                     people.append(person_info)
             
             # Clean up old person tracking (remove people not seen for a while)
-            current_ids = {f"person_{p['idx']}" for p in people}
+            current_ids = {p['idx'] for p in people}
             old_ids = set(self.person_motion_history.keys()) - current_ids
             for old_id in old_ids:
                 del self.person_motion_history[old_id]
@@ -1,6 +1,11 @@
 import multiprocessing
+import os
 
 bind = "127.0.0.1:8000"
+# Camera workers are threads inside the Gunicorn worker - cameras are only
+# supported with a single worker: every worker (including one respawned after
+# a crash) starts them in post_fork, so more workers would open each camera
+# (and load each model) more than once
 workers = 1
 threads = 4
 worker_class = "gthread"
@@ -8,6 +13,14 @@ worker_connections = 1000
 timeout = 120
 keepalive = 5
 
+# Import Django once in the master; workers share those pages copy-on-write.
+# Detection models are NOT loaded here - they load after fork (see post_fork)
+# so no CUDA context is shared across processes.
+preload_app = True
+
+# Tell CctvConfig.ready() that startup is handled by the post_fork hook
+os.environ['CCTV_WORKER_BOOTSTRAP'] = 'post_fork'
+
 # Logging
 accesslog = "/var/log/gunicorn/access.log"
 errorlog = "/var/log/gunicorn/error.log"
@@ -20,4 +33,16 @@ proc_name = "hotel-cctv"
 daemon = False
 # pidfile removed - systemd manages the process (DELETE any pidfile line)
 user = "ubuntu"
-group = "ubuntu"
\ No newline at end of file
+group = "ubuntu"
+
+
+def pre_fork(server, worker):
+    """Don't let forked workers inherit the master's DB connections"""
+    from django.db import connections
+    connections.close_all()
+
+
+def post_fork(server, worker):
+    """Start camera detection workers inside the Gunicorn worker (workers = 1 only)"""
+    from cctv.apps import start_background_workers
+    start_background_workers()
@@ -74,6 +74,9 @@ if DB_ENGINE == 'postgresql':
             'PASSWORD': os.getenv('DB_PASSWORD', '00oo00oo'),
             'HOST': os.getenv('DB_HOST', 'localhost'),
             'PORT': os.getenv('DB_PORT', '5432'),
+            # Reuse connections instead of reconnecting per request/event
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '600')),
+            'CONN_HEALTH_CHECKS': True,
         }
     }
 else:
@@ -173,6 +176,7 @@ DETECTION_CONFIG = {
     # Default detection thresholds (can be overridden per camera)
     'CONFIDENCE_THRESHOLD': float(os.getenv('CASH_DETECTION_CONFIDENCE', '0.5')),
     'POSE_CONFIDENCE': 0.5,
+    # Pixels in the original frame; recheck it after changing POSE_IMGSZ
     'HAND_TOUCH_DISTANCE': 80,
     'MIN_TRANSACTION_FRAMES': 1,
     
@@ -191,6 +195,18 @@ DETECTION_CONFIG = {
     # Processing
     'FRAME_SKIP': 2,
     'ALERT_COOLDOWN': 30,
+    # Long side (px) frames are downscaled to before violence/fire inference
+    'DETECTION_RESOLUTION': int(os.getenv('DETECTION_RESOLUTION', '640')),
+    # Input size of the cash pose model - smaller is faster but gives
+    # coarser wrist positions
+    'POSE_IMGSZ': int(os.getenv('POSE_IMGSZ', '640')),
+    # Live streams skip cash/violence inference unless at least this share of
+    # a tiny grayscale thumbnail changed since the last inference (0 = off)
+    'MOTION_GATE_RATIO': float(os.getenv('MOTION_GATE_RATIO', '0.002')),
+    # Frames per batched pose inference call when processing uploaded videos
+    'INFERENCE_BATCH_SIZE': int(os.getenv('INFERENCE_BATCH_SIZE', '16')),
+    # Max uploaded test videos processed at once (each loads its own models)
+    'TEST_PROCESS_WORKERS': int(os.getenv('TEST_PROCESS_WORKERS', '1')),
     
     # RTSP settings
     'RTSP_TIMEOUT': int(os.getenv('RTSP_TIMEOUT', '10')),
@@ -205,6 +221,26 @@ DETECTION_CONFIG = {
     'GEMINI_VALIDATION_ENABLED': os.getenv('GEMINI_VALIDATION_ENABLED', 'True').lower() == 'true',
 }
 
+# Logging - startup/bootstrap messages go through the 'cctv' loggers
+# (set CCTV_LOG_LEVEL=WARNING to silence them in production)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'simple': {'format': '[%(name)s] %(levelname)s %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'simple'},
+    },
+    'loggers': {
+        'cctv': {
+            'handlers': ['console'],
+            'level': os.getenv('CCTV_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # Gemini API Key for event validation
 # Supports both spellings (GEMINI and GIMINI for compatibility)
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', os.getenv('GIMINI_API_KEY', ''))